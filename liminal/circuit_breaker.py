@@ -0,0 +1,332 @@
+"""Define circuit breaker helpers."""
+
+from __future__ import annotations
+
+from collections import deque
+from collections.abc import Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass
+from enum import StrEnum
+from http import HTTPStatus
+import re
+import time
+from typing import Final
+
+from httpx import TransportError
+
+from liminal.errors import CircuitOpenError, LiminalError
+from liminal.transport import Call
+
+DEFAULT_FAILURE_RATE_THRESHOLD: Final[float] = 0.5
+DEFAULT_HALF_OPEN_MAX_CALLS: Final[int] = 1
+DEFAULT_MINIMUM_CALLS: Final[int] = 10
+DEFAULT_OPEN_DURATION: Final[float] = 30.0
+DEFAULT_SLOW_CALL_DURATION: Final[float] = 30.0
+DEFAULT_WINDOW_SIZE: Final[int] = 20
+
+# Path segments that identify a resource (rather than an endpoint):
+_ID_SEGMENT_PATTERN: Final[re.Pattern[str]] = re.compile(r"/\d+(?=/|$)")
+
+
+def get_endpoint_key(endpoint: str) -> str:
+    """Get the key of the circuit that guards an endpoint.
+
+    Resource IDs are replaced by a placeholder, so that (for example) every thread is
+    guarded by the same circuit.
+
+    Args:
+    ----
+        endpoint: The endpoint to get the key for.
+
+    Returns:
+    -------
+        The circuit key.
+
+    """
+    return _ID_SEGMENT_PATTERN.sub("/{id}", endpoint.split("?", 1)[0])
+
+
+class CircuitState(StrEnum):
+    """Define the state of a circuit."""
+
+    # Requests are allowed (and their outcomes tracked):
+    CLOSED = "closed"
+
+    # Requests fail fast until the circuit has been open for long enough:
+    OPEN = "open"
+
+    # A limited number of probe requests are allowed to test whether the endpoint has
+    # recovered:
+    HALF_OPEN = "half_open"
+
+
+@dataclass(frozen=True, kw_only=True)
+class CircuitBreakerConfig:
+    """Define the configuration of the client's (per-endpoint) circuit breakers."""
+
+    # The fraction of failed (or slow) requests that opens a circuit:
+    failure_rate_threshold: float = DEFAULT_FAILURE_RATE_THRESHOLD
+
+    # Requests that take longer than this (in seconds) count as failures:
+    slow_call_duration: float = DEFAULT_SLOW_CALL_DURATION
+
+    # The number of recent requests whose outcomes are tracked (and the minimum number
+    # of them before the failure rate is considered):
+    window_size: int = DEFAULT_WINDOW_SIZE
+    minimum_calls: int = DEFAULT_MINIMUM_CALLS
+
+    # How long (in seconds) a circuit stays open before probe requests are allowed:
+    open_duration: float = DEFAULT_OPEN_DURATION
+
+    # The number of probe requests that must succeed to close a circuit:
+    half_open_max_calls: int = DEFAULT_HALF_OPEN_MAX_CALLS
+
+    def __post_init__(self) -> None:
+        """Perform some post-init validation.
+
+        Raises
+        ------
+            LiminalError: If the configuration is invalid.
+
+        """
+        if not 0.0 < self.failure_rate_threshold <= 1.0:
+            msg = f"Invalid failure rate threshold: {self.failure_rate_threshold}"
+            raise LiminalError(msg)
+        if not 0 < self.minimum_calls <= self.window_size:
+            msg = (
+                f"Invalid minimum number of calls ({self.minimum_calls}) for a window "
+                f"of {self.window_size}"
+            )
+            raise LiminalError(msg)
+        if self.half_open_max_calls < 1:
+            msg = f"Invalid number of half-open calls: {self.half_open_max_calls}"
+            raise LiminalError(msg)
+
+
+@dataclass(frozen=True, kw_only=True)
+class CircuitBreakerStats:
+    """Define a snapshot of a circuit breaker."""
+
+    state: CircuitState
+
+    # The outcomes of the requests in the current window:
+    calls: int
+    failures: int
+    failure_rate: float
+
+    # The number of requests that have been rejected since the circuit last opened:
+    rejected_calls: int
+
+
+class CircuitBreaker:
+    """Define a circuit breaker for a single endpoint."""
+
+    def __init__(self, key: str, config: CircuitBreakerConfig) -> None:
+        """Initialize.
+
+        Args:
+        ----
+            key: The key of the endpoint that the circuit guards.
+            config: The circuit breaker configuration.
+
+        """
+        self._config = config
+        self._failures = 0
+        self._key = key
+        self._opened_at = 0.0
+        self._outcomes: deque[bool] = deque(maxlen=config.window_size)
+        self._probe_successes = 0
+        self._probes = 0
+        self._rejected_calls = 0
+        self._state = CircuitState.CLOSED
+
+    @property
+    def state(self) -> CircuitState:
+        """Return the state of the circuit.
+
+        Returns
+        -------
+            The state of the circuit.
+
+        """
+        if (
+            self._state is CircuitState.OPEN
+            and time.monotonic() - self._opened_at >= self._config.open_duration
+        ):
+            self._state = CircuitState.HALF_OPEN
+            self._probe_successes = 0
+        return self._state
+
+    def _close(self) -> None:
+        """Close the circuit (and forget past outcomes)."""
+        self._failures = 0
+        self._outcomes.clear()
+        self._state = CircuitState.CLOSED
+
+    def _open(self) -> None:
+        """Open the circuit."""
+        self._opened_at = time.monotonic()
+        self._rejected_calls = 0
+        self._state = CircuitState.OPEN
+
+    def _allow(self) -> bool:
+        """Allow a request through the circuit.
+
+        Returns
+        -------
+            Whether the request is a probe (of a half-open circuit).
+
+        Raises
+        ------
+            CircuitOpenError: If the circuit is not allowing requests.
+
+        """
+        state = self.state
+        if state is CircuitState.OPEN or (
+            state is CircuitState.HALF_OPEN
+            and self._probes + self._probe_successes >= self._config.half_open_max_calls
+        ):
+            self._rejected_calls += 1
+            msg = f"The circuit for {self._key} is {state}; failing fast"
+            raise CircuitOpenError(msg)
+
+        if state is CircuitState.HALF_OPEN:
+            self._probes += 1
+            return True
+        return False
+
+    def _record(self, *, failed: bool | None, is_probe: bool) -> None:
+        """Record the outcome of a request.
+
+        Args:
+        ----
+            failed: Whether the request failed (or None if it was abandoned).
+            is_probe: Whether the request was a probe (of a half-open circuit).
+
+        """
+        if is_probe:
+            self._probes -= 1
+            if failed is None or self._state is not CircuitState.HALF_OPEN:
+                # The probe was abandoned (or another probe already failed):
+                return
+            if failed:
+                self._open()
+                return
+            self._probe_successes += 1
+            if self._probe_successes >= self._config.half_open_max_calls:
+                self._close()
+            return
+
+        if failed is None or self._state is not CircuitState.CLOSED:
+            # The request was abandoned (or sent before the circuit opened):
+            return
+
+        if len(self._outcomes) == self._outcomes.maxlen:
+            self._failures -= self._outcomes[0]
+        self._outcomes.append(failed)
+        self._failures += failed
+
+        if (
+            len(self._outcomes) >= self._config.minimum_calls
+            and self._failures / len(self._outcomes)
+            >= self._config.failure_rate_threshold
+        ):
+            self._open()
+
+    def get_stats(self) -> CircuitBreakerStats:
+        """Get a snapshot of the circuit breaker.
+
+        Returns
+        -------
+            A CircuitBreakerStats object.
+
+        """
+        calls = len(self._outcomes)
+        return CircuitBreakerStats(
+            state=self.state,
+            calls=calls,
+            failures=self._failures,
+            failure_rate=self._failures / calls if calls else 0.0,
+            rejected_calls=self._rejected_calls,
+        )
+
+    @contextmanager
+    def guard(self, *, check_latency: bool = True) -> Iterator[Call]:
+        """Guard a request with the circuit breaker.
+
+        Transport errors, server errors, rate limiting, and (optionally) slow responses
+        count as failures. Requests that are abandoned before a response is received
+        (e.g., cancelled) are not counted either way.
+
+        Args:
+        ----
+            check_latency: Whether slow responses count as failures.
+
+        Yields:
+        ------
+            A call, whose status code should be set once a response is received.
+
+        """
+        is_probe = self._allow()
+        call = Call()
+        failed: bool | None = None
+
+        try:
+            yield call
+        except TransportError:
+            failed = True
+            raise
+        finally:
+            if failed is None and call.status_code is not None:
+                failed = (
+                    call.status_code >= HTTPStatus.INTERNAL_SERVER_ERROR
+                    or call.status_code == HTTPStatus.TOO_MANY_REQUESTS
+                    or (
+                        check_latency
+                        and time.monotonic() - call.started_at
+                        >= self._config.slow_call_duration
+                    )
+                )
+            self._record(failed=failed, is_probe=is_probe)
+
+
+class CircuitBreakerRegistry:
+    """Define a registry of per-endpoint circuit breakers."""
+
+    def __init__(self, config: CircuitBreakerConfig | None = None) -> None:
+        """Initialize.
+
+        Args:
+        ----
+            config: An optional circuit breaker configuration.
+
+        """
+        self._breakers: dict[str, CircuitBreaker] = {}
+        self._config = config or CircuitBreakerConfig()
+
+    def get(self, endpoint: str) -> CircuitBreaker:
+        """Get the circuit breaker that guards an endpoint.
+
+        Args:
+        ----
+            endpoint: The endpoint to get the circuit breaker for.
+
+        Returns:
+        -------
+            A circuit breaker.
+
+        """
+        key = get_endpoint_key(endpoint)
+        if (breaker := self._breakers.get(key)) is None:
+            breaker = self._breakers[key] = CircuitBreaker(key, self._config)
+        return breaker
+
+    def get_stats(self) -> dict[str, CircuitBreakerStats]:
+        """Get a snapshot of every circuit breaker.
+
+        Returns
+        -------
+            A dictionary of circuit keys to CircuitBreakerStats objects.
+
+        """
+        return {key: breaker.get_stats() for key, breaker in self._breakers.items()}
@@ -2,29 +2,56 @@
 
 from __future__ import annotations
 
+import asyncio
 from collections.abc import AsyncIterator
-from contextlib import asynccontextmanager
-from json.decoder import JSONDecodeError
-from typing import Any, Final
-
-from httpx import AsyncClient, Cookies, HTTPStatusError, Response
-from mashumaro.codecs.json import json_decode
-from mashumaro.exceptions import (
-    MissingField,
-    SuitableVariantNotFoundError,
-    UnserializableDataError,
-)
+from types import TracebackType
+from typing import Any, Final, Self, TypedDict, Unpack
+
+from httpx import URL, AsyncClient, Cookies, HTTPStatusError, Response, TransportError
 
 from liminal.auth import AuthProvider
+from liminal.circuit_breaker import (
+    CircuitBreakerConfig,
+    CircuitBreakerRegistry,
+    CircuitBreakerStats,
+)
 from liminal.const import LOGGER
 from liminal.endpoints.llm import LLMEndpoint
+from liminal.endpoints.llm.catalog import ModelInstanceCatalogConfig
 from liminal.endpoints.prompt import PromptEndpoint
+from liminal.endpoints.prompt.cache import AnalyzeCacheConfig
+from liminal.endpoints.prompt.disk_cache import DiskCacheConfig
 from liminal.endpoints.thread import ThreadEndpoint
 from liminal.errors import RequestError
+from liminal.helpers.decoder import DECODE_ERRORS, decode
+from liminal.helpers.identity import IdentityMap
+from liminal.helpers.singleflight import SingleFlight
 from liminal.helpers.typing import ValidatedResponseT
+from liminal.limiter import AdaptiveLimiter, ConcurrencyLimitConfig, ConcurrencyStats
+from liminal.retry import Retrier, RetryPolicy
+from liminal.tracing import Tracer, TracingConfig
+from liminal.transport import PoolStats, RequestGate, TransportConfig, get_pool_stats
 
 DEFAULT_REQUEST_TIMEOUT: Final[int] = 60
 
+# Requests with these methods are coalesced (when identical requests are in flight):
+COALESCED_METHODS: Final[frozenset[str]] = frozenset({"GET", "HEAD"})
+
+
+class ClientOptions(TypedDict, total=False):
+    """Define the optional client configuration (used by the authenticate methods)."""
+
+    analyze_cache_config: AnalyzeCacheConfig
+    circuit_breaker_config: CircuitBreakerConfig
+    coalesce_requests: bool
+    concurrency_limit_config: ConcurrencyLimitConfig
+    disk_cache_config: DiskCacheConfig
+    model_instance_catalog_config: ModelInstanceCatalogConfig
+    retain_raw_findings: bool
+    retry_policy: RetryPolicy
+    tracing_config: TracingConfig
+    transport_config: TransportConfig
+
 
 class Client:
     """Define the client class."""
@@ -34,6 +61,16 @@ class Client:
         api_server_url: str,
         *,
         httpx_client: AsyncClient | None = None,
+        analyze_cache_config: AnalyzeCacheConfig | None = None,
+        circuit_breaker_config: CircuitBreakerConfig | None = None,
+        coalesce_requests: bool = True,
+        concurrency_limit_config: ConcurrencyLimitConfig | None = None,
+        disk_cache_config: DiskCacheConfig | None = None,
+        model_instance_catalog_config: ModelInstanceCatalogConfig | None = None,
+        retain_raw_findings: bool = False,
+        retry_policy: RetryPolicy | None = None,
+        tracing_config: TracingConfig | None = None,
+        transport_config: TransportConfig | None = None,
     ) -> None:
         """Initialize.
 
@@ -41,18 +78,92 @@ class Client:
         ----
             api_server_url: The URL of the Liminal API server.
             httpx_client: An optional HTTPX client to use.
+            analyze_cache_config: An optional configuration for the local cache of
+                analysis findings (by default, findings are not cached).
+            circuit_breaker_config: An optional configuration for the per-endpoint
+                circuit breakers (failure rate and latency thresholds, etc.).
+            coalesce_requests: Whether identical concurrent GET requests should share
+                one network call (and decoded result).
+            concurrency_limit_config: An optional configuration for the adaptive limit
+                on concurrent requests.
+            disk_cache_config: An optional configuration for the encrypted on-disk
+                cache of cleanse and hydrate results (by default, they are not
+                cached).
+            model_instance_catalog_config: An optional configuration for the cached
+                catalog that model instances are looked up in (TTL, etc.).
+            retain_raw_findings: Whether analysis findings should retain their raw
+                JSON, which is spliced into the bodies of cleanse, submit, and stream
+                requests (rather than re-encoding every finding).
+            retry_policy: An optional policy for retrying failed requests (by default,
+                idempotent requests are retried twice after transient failures).
+            tracing_config: An optional configuration for request and stream tracing
+                (sampling, payload logging, redaction, etc.).
+            transport_config: An optional configuration for the HTTP transport (pool
+                limits, keep-alive, HTTP/2, etc.).
 
         """
         self._api_server_url = api_server_url
+        self._api_server_host = URL(api_server_url).host
         self._httpx_client = httpx_client
+        self._transport_config = transport_config or TransportConfig()
+        self._request_gate = RequestGate(self._transport_config.max_requests_per_host)
+        self._circuit_breakers = CircuitBreakerRegistry(circuit_breaker_config)
+        self._coalesce_requests = coalesce_requests
+        self._identity_map = IdentityMap()
+        self._limiter = AdaptiveLimiter(concurrency_limit_config)
+        self._retrier = Retrier(retry_policy)
+        self._single_flight = SingleFlight()
+        self._tracer = Tracer(tracing_config)
+
+        # An HTTPX client that is owned (and pooled) by this object; created lazily
+        # when no usable client is provided:
+        self._owned_httpx_client: AsyncClient | None = None
 
         # Token information:
         self._session_id: str | None = None
 
         # Define endpoints:
-        self.llm = LLMEndpoint(self._request_and_validate)
-        self.prompt = PromptEndpoint(self._request_and_validate, self._stream)
-        self.thread = ThreadEndpoint(self._request_and_validate)
+        self.llm = LLMEndpoint(
+            self._request_and_validate, model_instance_catalog_config
+        )
+        self.prompt = PromptEndpoint(
+            self._request_and_validate,
+            self._stream,
+            self._tracer.redact,
+            analyze_cache_config,
+            disk_cache_config,
+            retain_raw_findings=retain_raw_findings,
+        )
+        self.thread = ThreadEndpoint(
+            self._request_and_validate, self._stream, self._identity_map
+        )
+
+    async def __aenter__(self) -> Self:
+        """Enter the client's async context.
+
+        Returns
+        -------
+            The client.
+
+        """
+        return self
+
+    async def __aexit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_val: BaseException | None,
+        exc_tb: TracebackType | None,
+    ) -> None:
+        """Exit the client's async context (closing any owned connections).
+
+        Args:
+        ----
+            exc_type: The type of the exception that was raised (if any).
+            exc_val: The exception that was raised (if any).
+            exc_tb: The traceback of the exception that was raised (if any).
+
+        """
+        await self.aclose()
 
     @classmethod
     async def authenticate_from_auth_provider(
@@ -61,6 +172,7 @@ class Client:
         auth_provider: AuthProvider,
         *,
         httpx_client: AsyncClient | None = None,
+        **options: Unpack[ClientOptions],
     ) -> Client:
         """Authenticate with the Liminal API server (using the auth provider).
 
@@ -69,13 +181,14 @@ class Client:
             api_server_url: The URL of the Liminal API server.
             auth_provider: The auth provider to use.
             httpx_client: An optional HTTPX client to use.
+            **options: Additional options to pass to the client.
 
         Returns:
         -------
             A new client instance.
 
         """
-        client = cls(api_server_url, httpx_client=httpx_client)
+        client = cls(api_server_url, httpx_client=httpx_client, **options)
         provider_access_token = await auth_provider.get_access_token()
         liminal_auth_response = await client._request(
             "GET",
@@ -92,6 +205,7 @@ class Client:
         session_id: str,
         *,
         httpx_client: AsyncClient | None = None,
+        **options: Unpack[ClientOptions],
     ) -> Client:
         """Authenticate with the Liminal API server (using a session).
 
@@ -101,13 +215,14 @@ class Client:
             httpx_client: An optional HTTPX client to use.
             session_id: The session ID to use. If not provided, the session that was
                 used to authenticate the user initially will be used.
+            **options: Additional options to pass to the client.
 
         Returns:
         -------
             A new client instance.
 
         """
-        client = cls(api_server_url, httpx_client=httpx_client)
+        client = cls(api_server_url, httpx_client=httpx_client, **options)
         session_id_response = await client._request(
             "GET", "/api/v1/users/me", cookies={"session": session_id}
         )
@@ -121,6 +236,7 @@ class Client:
         token: str,
         *,
         httpx_client: AsyncClient | None = None,
+        **options: Unpack[ClientOptions],
     ) -> Client:
         """Authenticate with the Liminal API server (using a Liminal-provided token).
 
@@ -129,9 +245,10 @@ class Client:
             api_server_url: The URL of the Liminal API server.
             token: The token to use.
             httpx_client: An optional HTTPX client to use.
+            **options: Additional options to pass to the client.
 
         """
-        client = cls(api_server_url, httpx_client=httpx_client)
+        client = cls(api_server_url, httpx_client=httpx_client, **options)
         liminal_auth_response = await client._request(
             "POST",
             "/api/v1/auth/test-automation/login",
@@ -140,6 +257,52 @@ class Client:
         client._save_session_id_from_auth_response(liminal_auth_response)
         return client
 
+    async def aclose(self) -> None:
+        """Close any connections (and the on-disk cache) owned by this client.
+
+        HTTPX clients provided by the caller are left untouched, as their lifecycle is
+        owned by the caller.
+        """
+        self.prompt.close()
+        if self._owned_httpx_client and not self._owned_httpx_client.is_closed:
+            await self._owned_httpx_client.aclose()
+        self._owned_httpx_client = None
+
+    def get_circuit_breaker_stats(self) -> dict[str, CircuitBreakerStats]:
+        """Get a snapshot of the circuit breakers (keyed by endpoint).
+
+        Returns
+        -------
+            A dictionary of endpoints to CircuitBreakerStats objects.
+
+        """
+        return self._circuit_breakers.get_stats()
+
+    def get_concurrency_stats(self) -> ConcurrencyStats:
+        """Get a snapshot of the adaptive concurrency limit.
+
+        Returns
+        -------
+            A ConcurrencyStats object.
+
+        """
+        return self._limiter.get_stats()
+
+    def get_pool_stats(self) -> PoolStats:
+        """Get a snapshot of the connection pool occupancy.
+
+        Returns
+        -------
+            A PoolStats object.
+
+        """
+        httpx_client = (
+            self._httpx_client
+            if self._httpx_client and not self._httpx_client.is_closed
+            else self._owned_httpx_client
+        )
+        return get_pool_stats(httpx_client, self._request_gate.in_flight)
+
     @property
     def session_id(self) -> str | None:
         """Return the session ID.
@@ -169,24 +332,28 @@ class Client:
             raw_cookies["session"] = self._session_id
         return Cookies(raw_cookies)
 
-    @asynccontextmanager
-    async def _get_httpx_client(self) -> AsyncIterator[AsyncClient]:
+    def _get_httpx_client(self) -> AsyncClient:
         """Get an HTTPX client.
 
+        If a usable HTTPX client was provided, it is returned; otherwise, a long-lived
+        client (and its connection pool) is lazily created and owned by this object,
+        so that connections are reused across every endpoint.
+
         Returns
         -------
             An HTTPX client.
 
         """
-        if running_client := self._httpx_client and not self._httpx_client.is_closed:
-            client = self._httpx_client
-        else:
-            client = AsyncClient(timeout=DEFAULT_REQUEST_TIMEOUT)
+        if self._httpx_client and not self._httpx_client.is_closed:
+            return self._httpx_client
 
-        yield client
+        if not self._owned_httpx_client or self._owned_httpx_client.is_closed:
+            LOGGER.debug("Creating a pooled HTTPX client")
+            self._owned_httpx_client = self._transport_config.create_httpx_client(
+                timeout=DEFAULT_REQUEST_TIMEOUT
+            )
 
-        if not running_client:
-            await client.aclose()
+        return self._owned_httpx_client
 
     async def _request(
         self,
@@ -197,6 +364,8 @@ class Client:
         cookies: dict[str, str] | None = None,
         params: dict[str, str] | None = None,
         json: dict[str, Any] | None = None,
+        content: bytes | None = None,
+        idempotent: bool | None = None,
     ) -> Response:
         """Make a request to the Liminal API server and return a response.
 
@@ -208,6 +377,9 @@ class Client:
             cookies: The cookies to use.
             params: The query parameters to use.
             json: The JSON body to use.
+            content: An already-encoded JSON body to use (instead of a JSON body).
+            idempotent: Whether the request can safely be retried after any transient
+                failure (if this is not provided, it is determined by the retry policy).
 
         Returns:
         -------
@@ -220,30 +392,62 @@ class Client:
         """
         url = f"{self._api_server_url}{endpoint}"
         cookie_jar = self._create_cookie_jar(cookies)
+        if content is not None:
+            headers = {**(headers or {}), "Content-Type": "application/json"}
+        self._retrier.record_request()
+
+        attempt = 0
+        while True:
+            error: TransportError | None = None
+            response: Response | None = None
+            try:
+                response = await self._send(
+                    method,
+                    endpoint,
+                    headers=headers,
+                    cookies=cookie_jar,
+                    params=params,
+                    json=json,
+                    content=content,
+                )
+            except TransportError as err:
+                error = err
 
-        async with self._get_httpx_client() as client:
-            response = await client.request(
+            delay = self._retrier.get_delay(
+                attempt,
                 method,
+                endpoint,
+                response=response,
+                error=error,
+                idempotent=idempotent,
+            )
+            if delay is None:
+                break
+
+            LOGGER.debug(
+                "Retrying request to %s in %.3f seconds (attempt %s failed)",
                 url,
-                headers=headers,
-                cookies=cookie_jar,
-                params=params,
-                json=json,
-                timeout=DEFAULT_REQUEST_TIMEOUT,
+                delay,
+                attempt + 1,
             )
+            await asyncio.sleep(delay)
+            attempt += 1
 
-            try:
-                response.raise_for_status()
-            except HTTPStatusError as err:
-                msg = (
-                    f"Error while sending request to {url}: "
-                    f"{err.response.content.decode()}"
-                )
-                raise RequestError(msg) from err
+        if response is None:
+            msg = f"Error while sending request to {url}: {error}"
+            raise RequestError(msg) from error
+
+        try:
+            response.raise_for_status()
+        except HTTPStatusError as err:
+            msg = (
+                f"Error while sending request to {url}: {err.response.content.decode()}"
+            )
+            raise RequestError(msg) from err
 
-            LOGGER.debug("Received data from %s: %s", url, response.content)
+        self._tracer.trace_response(url, response.content)
 
-            return response
+        return response
 
     async def _request_and_validate(
         self,
@@ -255,6 +459,8 @@ class Client:
         cookies: dict[str, str] | None = None,
         params: dict[str, str] | None = None,
         json: dict[str, Any] | None = None,
+        content: bytes | None = None,
+        idempotent: bool | None = None,
     ) -> ValidatedResponseT:
         """Make a request to the Liminal API server and validate the response.
 
@@ -267,30 +473,60 @@ class Client:
             cookies: The cookies to use.
             params: The query parameters to use.
             json: The JSON body to use.
+            content: An already-encoded JSON body to use (instead of a JSON body).
+            idempotent: Whether the request can safely be retried after any transient
+                failure (if this is not provided, it is determined by the retry policy).
 
         Returns:
         -------
-            A validated response object.
+            A validated response object (which is shared by identical concurrent
+            requests, when they are coalesced).
 
         Raises:
         ------
             RequestError: If the response could not be validated.
 
         """
-        response = await self._request(
-            method, endpoint, headers=headers, cookies=cookies, params=params, json=json
-        )
 
-        try:
-            return json_decode(response.content, expected_response_type)
-        except (
-            JSONDecodeError,
-            MissingField,
-            SuitableVariantNotFoundError,
-            UnserializableDataError,
-        ) as err:
-            msg = f"Could not validate response: {err}"
-            raise RequestError(msg) from err
+        async def request_and_validate() -> ValidatedResponseT:
+            response = await self._request(
+                method,
+                endpoint,
+                headers=headers,
+                cookies=cookies,
+                params=params,
+                json=json,
+                content=content,
+                idempotent=idempotent,
+            )
+
+            try:
+                with self._identity_map.activate():
+                    return decode(response.content, expected_response_type)
+            except DECODE_ERRORS as err:
+                msg = f"Could not validate response: {err}"
+                raise RequestError(msg) from err
+
+        if (
+            not self._coalesce_requests
+            or method not in COALESCED_METHODS
+            or json
+            or content
+        ):
+            return await request_and_validate()
+
+        # Identical concurrent requests share one network call (and decoded result):
+        key = (
+            method,
+            endpoint,
+            expected_response_type,
+            self._session_id,
+            *(
+                frozenset(values.items()) if values else None
+                for values in (headers, cookies, params)
+            ),
+        )
+        return await self._single_flight.run(key, request_and_validate)
 
     def _save_session_id_from_auth_response(self, auth_response: Response) -> None:
         """Save a session cookie value from an auth response.
@@ -303,6 +539,55 @@ class Client:
         LOGGER.debug("Saving session cookie from auth response")
         self._session_id = auth_response.cookies["session"]
 
+    async def _send(
+        self,
+        method: str,
+        endpoint: str,
+        *,
+        headers: dict[str, str] | None,
+        cookies: Cookies,
+        params: dict[str, str] | None,
+        json: dict[str, Any] | None,
+        content: bytes | None,
+    ) -> Response:
+        """Send a single request to the Liminal API server.
+
+        Args:
+        ----
+            method: The HTTP method to use.
+            endpoint: The endpoint to request.
+            headers: The headers to use.
+            cookies: The cookies to use.
+            params: The query parameters to use.
+            json: The JSON body to use.
+            content: An already-encoded JSON body to use (instead of a JSON body).
+
+        Returns:
+        -------
+            An HTTPX Response object.
+
+        """
+        client = self._get_httpx_client()
+        with self._circuit_breakers.get(endpoint).guard() as call:
+            async with (
+                self._limiter.acquire(call, endpoint),
+                self._request_gate.enter(self._api_server_host),
+            ):
+                # Time spent waiting for the limiter or the gate isn't latency:
+                call.start()
+                response = await client.request(
+                    method,
+                    f"{self._api_server_url}{endpoint}",
+                    headers=headers,
+                    cookies=cookies,
+                    params=params,
+                    json=json,
+                    content=content,
+                    timeout=DEFAULT_REQUEST_TIMEOUT,
+                )
+                call.status_code = response.status_code
+        return response
+
     async def _stream(
         self,
         method: str,
@@ -312,7 +597,8 @@ class Client:
         cookies: dict[str, str] | None = None,
         params: dict[str, str] | None = None,
         json: dict[str, Any] | None = None,
-    ) -> AsyncIterator[str]:
+        content: bytes | None = None,
+    ) -> AsyncIterator[bytes]:
         """Make a request to the Liminal API server and return a streaming response.
 
         Args:
@@ -323,26 +609,53 @@ class Client:
             cookies: The cookies to use.
             params: The query parameters to use.
             json: The JSON body to use.
+            content: An already-encoded JSON body to use (instead of a JSON body).
 
         Returns:
         -------
-            An AsyncIterator containing the raw JSON response chunks.
+            An AsyncIterator containing the raw response chunks (as they arrive, so a
+            chunk may contain any part of one or more JSON objects).
+
+        Raises:
+        ------
+            RequestError: If the response fails for any reason.
 
         """
         url = f"{self._api_server_url}{endpoint}"
         cookie_jar = self._create_cookie_jar(cookies)
-
-        async with (
-            self._get_httpx_client() as client,
-            client.stream(
-                method,
-                url,
-                headers=headers,
-                cookies=cookie_jar,
-                params=params,
-                json=json,
-            ) as resp,
-        ):
-            async for line in resp.aiter_lines():
-                LOGGER.info("Received line of streaming response: %s", line)
-                yield line
+        if content is not None:
+            headers = {**(headers or {}), "Content-Type": "application/json"}
+
+        client = self._get_httpx_client()
+        with self._circuit_breakers.get(endpoint).guard(check_latency=False) as call:
+            async with (
+                self._limiter.acquire(call, endpoint, check_latency=False),
+                self._request_gate.enter(self._api_server_host),
+            ):
+                call.start()
+                async with client.stream(
+                    method,
+                    url,
+                    headers=headers,
+                    cookies=cookie_jar,
+                    params=params,
+                    json=json,
+                    content=content,
+                ) as resp:
+                    call.status_code = resp.status_code
+                    try:
+                        resp.raise_for_status()
+                    except HTTPStatusError as err:
+                        await resp.aread()
+                        msg = (
+                            f"Error while sending request to {url}: "
+                            f"{resp.content.decode()}"
+                        )
+                        raise RequestError(msg) from err
+
+                    chunks: AsyncIterator[bytes] = resp.aiter_bytes()
+                    if self._tracer.sample():
+                        chunks = self._tracer.trace_stream(url, chunks)
+
+                    async for chunk in chunks:
+                        yield chunk
@@ -5,6 +5,10 @@ from __future__ import annotations
 from collections.abc import Awaitable, Callable
 from typing import cast
 
+from liminal.endpoints.llm.catalog import (
+    ModelInstanceCatalog,
+    ModelInstanceCatalogConfig,
+)
 from liminal.endpoints.llm.models import ModelInstance
 from liminal.endpoints.llm.schemas import GetAvailableModelInstancesResponse
 from liminal.errors import ModelInstanceUnknownError
@@ -15,19 +19,49 @@ class LLMEndpoint:
     """Define the LLM endpoint."""
 
     def __init__(
-        self, request_and_validate: Callable[..., Awaitable[ValidatedResponseT]]
+        self,
+        request_and_validate: Callable[..., Awaitable[ValidatedResponseT]],
+        catalog_config: ModelInstanceCatalogConfig | None = None,
     ) -> None:
         """Initialize.
 
         Args:
         ----
             request_and_validate: The function to request and validate a response.
+            catalog_config: An optional configuration for the model instance catalog.
 
         """
+        self._catalog = ModelInstanceCatalog(
+            self._fetch_model_instances, catalog_config
+        )
         self._request_and_validate = request_and_validate
 
-    async def get_available_model_instances(self) -> list[ModelInstance]:
-        """Get available model instances.
+    def _check_model_instance(
+        self, model_instance: ModelInstance | None, description: str
+    ) -> ModelInstance:
+        """Check that a model instance from the catalog is usable.
+
+        Args:
+        ----
+            model_instance: The model instance (if it is known).
+            description: A description of how the model instance was looked up.
+
+        Returns:
+        -------
+            The model instance.
+
+        Raises:
+        ------
+            ModelInstanceUnknownError: When the model instance is unknown.
+
+        """
+        if model_instance is None or len(model_instance.model_connections) <= 0:
+            msg = f"Unknown model instance {description}"
+            raise ModelInstanceUnknownError(msg)
+        return model_instance
+
+    async def _fetch_model_instances(self) -> list[ModelInstance]:
+        """Fetch every available model instance.
 
         Returns
         -------
@@ -42,9 +76,28 @@ class LLMEndpoint:
         )
         return response.data
 
+    async def get_available_model_instances(self) -> list[ModelInstance]:
+        """Get available model instances.
+
+        This always fetches the latest model instances (and refreshes the catalog that
+        model instances are looked up in).
+
+        Returns
+        -------
+            A list of available model instances.
+
+        """
+        model_instances = await self._fetch_model_instances()
+        self._catalog.update(model_instances)
+        return model_instances
+
     async def get_model_instance(self, model_instance_name: str) -> ModelInstance:
         """Get a model instance by name.
 
+        Model instances are looked up in a cached catalog, which is refreshed in the
+        background once it expires; call `invalidate_model_instances` to force a
+        refresh (e.g., after a model instance is created).
+
         Args:
         ----
             model_instance_name: The name of the model instance to retrieve.
@@ -53,25 +106,32 @@ class LLMEndpoint:
         -------
             The model instance.
 
-        Raises:
-        ------
-            ModelInstanceUnknownError: When the model instance is unknown.
+        """
+        return self._check_model_instance(
+            await self._catalog.get_by_name(model_instance_name),
+            f"name: {model_instance_name}",
+        )
+
+    async def get_model_instance_by_id(self, model_instance_id: int) -> ModelInstance:
+        """Get a model instance by ID.
+
+        Model instances are looked up in the same cached catalog as
+        `get_model_instance`.
+
+        Args:
+        ----
+            model_instance_id: The ID of the model instance to retrieve.
+
+        Returns:
+        -------
+            The model instance.
 
         """
-        model_instances = await self.get_available_model_instances()
-
-        try:
-            model_instance = next(
-                instance
-                for instance in model_instances
-                if instance.name == model_instance_name
-            )
-        except StopIteration as err:
-            msg = f"Unknown model instance name: {model_instance_name}"
-            raise ModelInstanceUnknownError(msg) from err
-
-        if len(model_instance.model_connections) <= 0:
-            msg = f"Unknown model instance name: {model_instance_name}"
-            raise ModelInstanceUnknownError(msg)
+        return self._check_model_instance(
+            await self._catalog.get_by_id(model_instance_id),
+            f"ID: {model_instance_id}",
+        )
 
-        return model_instance
+    def invalidate_model_instances(self) -> None:
+        """Invalidate the model instance catalog (so the next lookup refreshes it)."""
+        self._catalog.invalidate()
@@ -0,0 +1,152 @@
+"""Define the model instance catalog."""
+
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+import time
+from typing import Final
+
+from liminal.const import LOGGER
+from liminal.endpoints.llm.models import ModelInstance
+
+DEFAULT_CATALOG_MAX_STALE: Final[float] = 3600.0
+DEFAULT_CATALOG_TTL: Final[float] = 300.0
+
+
+@dataclass(frozen=True, kw_only=True)
+class ModelInstanceCatalogConfig:
+    """Define the configuration of the model instance catalog."""
+
+    # How long (in seconds) the catalog is fresh after it is fetched:
+    ttl: float = DEFAULT_CATALOG_TTL
+
+    # How long (in seconds) after it expires a stale catalog is still used (while it is
+    # refreshed in the background); beyond that, lookups wait for a refresh:
+    max_stale: float = DEFAULT_CATALOG_MAX_STALE
+
+
+class ModelInstanceCatalog:
+    """Define a cached catalog of model instances, indexed by name and ID."""
+
+    def __init__(
+        self,
+        fetch: Callable[[], Awaitable[list[ModelInstance]]],
+        config: ModelInstanceCatalogConfig | None = None,
+    ) -> None:
+        """Initialize.
+
+        Args:
+        ----
+            fetch: The function that fetches every available model instance.
+            config: An optional catalog configuration.
+
+        """
+        self._by_id: dict[int, ModelInstance] = {}
+        self._by_name: dict[str, ModelInstance] = {}
+        self._config = config or ModelInstanceCatalogConfig()
+        self._fetch = fetch
+        self._fetched_at: float | None = None
+        self._refresh_task: asyncio.Task[None] | None = None
+
+    async def _ensure_fresh(self) -> None:
+        """Ensure that the catalog is fresh enough to be used."""
+        if self._fetched_at is None:
+            await self._refresh()
+            return
+
+        age = time.monotonic() - self._fetched_at
+        if age >= self._config.ttl + self._config.max_stale:
+            await self._refresh()
+        elif age >= self._config.ttl:
+            # Serve the stale catalog while it is revalidated in the background:
+            self._start_refresh()
+
+    def _on_refresh_done(self, task: asyncio.Task[None]) -> None:
+        """Handle the completion of a refresh.
+
+        Args:
+        ----
+            task: The refresh task.
+
+        """
+        self._refresh_task = None
+        if not task.cancelled() and (err := task.exception()):
+            LOGGER.warning("Could not refresh the model instance catalog: %s", err)
+
+    async def _refresh(self) -> None:
+        """Refresh the catalog (sharing any refresh that is already in progress)."""
+        await asyncio.shield(self._start_refresh())
+
+    def _start_refresh(self) -> asyncio.Task[None]:
+        """Start refreshing the catalog (unless a refresh is already in progress).
+
+        Returns
+        -------
+            The refresh task.
+
+        """
+        if self._refresh_task is None:
+
+            async def refresh() -> None:
+                self.update(await self._fetch())
+
+            self._refresh_task = asyncio.create_task(refresh())
+            self._refresh_task.add_done_callback(self._on_refresh_done)
+        return self._refresh_task
+
+    async def get_by_id(self, model_instance_id: int) -> ModelInstance | None:
+        """Get a model instance by ID.
+
+        Args:
+        ----
+            model_instance_id: The ID of the model instance.
+
+        Returns:
+        -------
+            The model instance (or None if it is unknown).
+
+        """
+        await self._ensure_fresh()
+        return self._by_id.get(model_instance_id)
+
+    async def get_by_name(self, model_instance_name: str) -> ModelInstance | None:
+        """Get a model instance by name.
+
+        Args:
+        ----
+            model_instance_name: The name of the model instance.
+
+        Returns:
+        -------
+            The model instance (or None if it is unknown).
+
+        """
+        await self._ensure_fresh()
+        return self._by_name.get(model_instance_name)
+
+    def invalidate(self) -> None:
+        """Invalidate the catalog, so that the next lookup waits for a refresh."""
+        self._by_id = {}
+        self._by_name = {}
+        self._fetched_at = None
+
+    def update(self, model_instances: list[ModelInstance]) -> None:
+        """Replace the catalog with freshly fetched model instances.
+
+        Args:
+        ----
+            model_instances: Every available model instance.
+
+        """
+        by_name: dict[str, ModelInstance] = {}
+        for model_instance in model_instances:
+            # If names are duplicated, the first instance wins:
+            by_name.setdefault(model_instance.name, model_instance)
+
+        self._by_id = {
+            model_instance.id: model_instance for model_instance in model_instances
+        }
+        self._by_name = by_name
+        self._fetched_at = time.monotonic()
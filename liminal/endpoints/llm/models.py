@@ -7,10 +7,10 @@ from datetime import datetime
 
 from mashumaro import field_options
 
-from liminal.helpers.model import BaseModel
+from liminal.helpers.model import BaseModel, interned
 
 
-@dataclass(frozen=True, kw_only=True)
+@dataclass(frozen=True, kw_only=True, slots=True)
 class ModelConnection(BaseModel):
     """Define the model for an LLM model connection."""
 
@@ -21,8 +21,8 @@ class ModelConnection(BaseModel):
 
     # Fields:
     credentials: dict[str, str] | None = field(default_factory=dict)
-    model: str
-    provider_key: str = field(metadata=field_options(alias="providerKey"))
+    model: str = field(metadata=interned())
+    provider_key: str = field(metadata=interned("providerKey"))
 
     # Timestamps:
     created_at: datetime = field(metadata=field_options(alias="createdAt"))
@@ -32,7 +32,7 @@ class ModelConnection(BaseModel):
     updated_at: datetime = field(metadata=field_options(alias="updatedAt"))
 
 
-@dataclass(frozen=True, kw_only=True)
+@dataclass(frozen=True, kw_only=True, slots=True)
 class ModelInstance(BaseModel):
     """Define the model for an LLM model instance that Liminal supports."""
 
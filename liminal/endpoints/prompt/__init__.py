@@ -2,13 +2,32 @@
 
 from __future__ import annotations
 
-from collections.abc import AsyncIterator, Awaitable, Callable
+from collections.abc import AsyncIterable, AsyncIterator, Awaitable, Callable, Iterable
 import json
 from typing import Any, cast
 
-from mashumaro.codecs.json import json_decode
-
 from liminal.const import LOGGER, SOURCE
+from liminal.endpoints.prompt.batch import DEFAULT_BATCH_CONCURRENCY, AnalyzeResult
+from liminal.endpoints.prompt.cache import (
+    AnalyzeCache,
+    AnalyzeCacheConfig,
+    AnalyzeCacheStats,
+)
+from liminal.endpoints.prompt.disk_cache import (
+    DiskCache,
+    DiskCacheConfig,
+    DiskCacheStats,
+)
+from liminal.endpoints.prompt.document import (
+    DocumentAnalysisConfig,
+    merge_findings,
+    split_document,
+)
+from liminal.endpoints.prompt.hydrator import LocalHydrator
+from liminal.endpoints.prompt.incremental import (
+    IncrementalAnalysisConfig,
+    IncrementalAnalyzer,
+)
 from liminal.endpoints.prompt.models import (
     AnalysisFindings,
     CleanseData,
@@ -16,12 +35,19 @@ from liminal.endpoints.prompt.models import (
     StreamResponseChunk,
     SubmitData,
 )
+from liminal.endpoints.prompt.pipeline import PromptPipeline, PromptPipelineConfig
 from liminal.endpoints.prompt.schemas import (
     AnalyzeResponse,
     CleanseResponse,
     HydrateResponse,
+    RetainedAnalyzeResponse,
     SubmitResponse,
 )
+from liminal.errors import LiminalError
+from liminal.helpers.batch import map_concurrently
+from liminal.helpers.decoder import DECODE_ERRORS, get_decoder
+from liminal.helpers.encoder import encode_json
+from liminal.helpers.stream import JSONStreamParser
 from liminal.helpers.typing import ValidatedResponseT
 
 
@@ -31,7 +57,12 @@ class PromptEndpoint:
     def __init__(
         self,
         request_and_validate: Callable[..., Awaitable[ValidatedResponseT]],
-        stream: Callable[..., AsyncIterator[str]],
+        stream: Callable[..., AsyncIterator[bytes]],
+        redact: Callable[[bytes], str],
+        analyze_cache_config: AnalyzeCacheConfig | None = None,
+        disk_cache_config: DiskCacheConfig | None = None,
+        *,
+        retain_raw_findings: bool = False,
     ) -> None:
         """Initialize.
 
@@ -39,11 +70,60 @@ class PromptEndpoint:
         ----
             request_and_validate: The request and validate function.
             stream: The stream function.
+            redact: The function used to redact payloads before they are logged.
+            analyze_cache_config: An optional configuration for the analyze cache (if
+                this is not provided, analysis findings are not cached).
+            disk_cache_config: An optional configuration for the encrypted on-disk
+                cache of cleanse and hydrate results (if this is not provided, they
+                are not cached).
+            retain_raw_findings: Whether analysis findings should retain their raw
+                JSON (so that cleanse, submit, and stream requests splice it into their
+                bodies, rather than re-encoding every finding).
 
         """
+        self._analyze_cache = (
+            AnalyzeCache(analyze_cache_config) if analyze_cache_config else None
+        )
+        self._disk_cache = DiskCache(disk_cache_config) if disk_cache_config else None
         self._request_and_validate = request_and_validate
+        self._redact = redact
+        self._retain_raw_findings = retain_raw_findings
         self._stream = stream
 
+    async def _fetch_findings(
+        self, model_instance_id: int, prompt: str
+    ) -> AnalysisFindings:
+        """Analyze a prompt for sensitive data (bypassing the analyze cache).
+
+        Args:
+        ----
+            model_instance_id: The ID of the model instance to analyze the prompt with.
+            prompt: The prompt to analyze.
+
+        Returns:
+        -------
+            An object that contains identified sensitive data ("findings").
+
+        """
+        response = cast(
+            AnalyzeResponse,
+            await self._request_and_validate(
+                "POST",
+                "/api/v1/prompts/analyze",
+                (
+                    RetainedAnalyzeResponse
+                    if self._retain_raw_findings
+                    else AnalyzeResponse
+                ),
+                json={
+                    "modelInstanceId": model_instance_id,
+                    "source": SOURCE,
+                    "text": prompt,
+                },
+            ),
+        )
+        return response.data
+
     def _generate_payload_for_request(
         self,
         model_instance_id: int,
@@ -76,15 +156,49 @@ class PromptEndpoint:
         }
 
         if findings:
-            payload["findings"] = [
+            # Retained raw findings are spliced into the request body as-is:
+            payload["findings"] = findings.get_raw_findings() or [
                 finding.to_dict(by_alias=True) for finding in findings.findings
             ]
 
         return payload
 
+    async def _stream_chunks(self, body: bytes) -> AsyncIterator[StreamResponseChunk]:
+        """Submit a prompt and stream the chunks of the response.
+
+        Args:
+        ----
+            body: The (encoded) request body.
+
+        Yields:
+        ------
+            The response chunks.
+
+        """
+        decoder = get_decoder(StreamResponseChunk)
+        parser = JSONStreamParser()
+
+        async for frame in parser.iter_frames(
+            self._stream("POST", "/api/v1/prompts/submit", content=body)
+        ):
+            try:
+                yield decoder.decode(frame)
+            except DECODE_ERRORS:
+                LOGGER.warning(
+                    "Stream returned invalid JSON chunk: %s", self._redact(frame)
+                )
+
+        if remainder := parser.remainder:
+            LOGGER.warning(
+                "Stream returned incomplete JSON chunk: %s", self._redact(remainder)
+            )
+
     async def analyze(self, model_instance_id: int, prompt: str) -> AnalysisFindings:
         """Analyze a prompt for sensitive data.
 
+        If the analyze cache is enabled, findings for repeated prompts are served from
+        it.
+
         Args:
         ----
             model_instance_id: The ID of the model instance to analyze the prompt with.
@@ -95,20 +209,138 @@ class PromptEndpoint:
             An object that contains identified sensitive data ("findings").
 
         """
-        response = cast(
-            AnalyzeResponse,
-            await self._request_and_validate(
-                "POST",
-                "/api/v1/prompts/analyze",
-                AnalyzeResponse,
-                json={
-                    "modelInstanceId": model_instance_id,
-                    "source": SOURCE,
-                    "text": prompt,
-                },
-            ),
-        )
-        return response.data
+        if self._analyze_cache:
+            return await self._analyze_cache.get_or_fetch(
+                model_instance_id,
+                prompt,
+                lambda: self._fetch_findings(model_instance_id, prompt),
+            )
+        return await self._fetch_findings(model_instance_id, prompt)
+
+    async def analyze_many(
+        self,
+        model_instance_id: int,
+        prompts: Iterable[str] | AsyncIterable[str],
+        *,
+        concurrency: int = DEFAULT_BATCH_CONCURRENCY,
+        ordered: bool = True,
+    ) -> AsyncIterator[AnalyzeResult]:
+        """Analyze many prompts for sensitive data (concurrently).
+
+        Prompts are consumed lazily, so any number of them (from any iterable) can be
+        analyzed. A prompt that fails to be analyzed does not abort the batch; its
+        result contains the error instead.
+
+        Args:
+        ----
+            model_instance_id: The ID of the model instance to analyze the prompts with.
+            prompts: The prompts to analyze.
+            concurrency: The maximum number of prompts to analyze at once.
+            ordered: Whether results should be yielded in the order of the prompts (as
+                opposed to as soon as each is analyzed).
+
+        Yields:
+        ------
+            A result for each prompt.
+
+        """
+
+        async def analyze(prompt: str) -> AnalysisFindings | LiminalError:
+            try:
+                return await self.analyze(model_instance_id, prompt)
+            except LiminalError as err:
+                return err
+
+        async for index, prompt, outcome in map_concurrently(
+            analyze, prompts, concurrency=concurrency, ordered=ordered
+        ):
+            if isinstance(outcome, LiminalError):
+                yield AnalyzeResult(index=index, prompt=prompt, error=outcome)
+            else:
+                yield AnalyzeResult(index=index, prompt=prompt, findings=outcome)
+
+    async def analyze_document(
+        self,
+        model_instance_id: int,
+        document: str,
+        *,
+        config: DocumentAnalysisConfig | None = None,
+    ) -> AnalysisFindings:
+        """Analyze a (large) document for sensitive data.
+
+        Documents that are longer than a window are split into overlapping windows,
+        which are analyzed concurrently; the findings are then moved to their position
+        in the document (and deduplicated where windows overlap).
+
+        Args:
+        ----
+            model_instance_id: The ID of the model instance to analyze the document
+                with.
+            document: The document to analyze.
+            config: An optional document analysis configuration.
+
+        Returns:
+        -------
+            An object that contains identified sensitive data ("findings").
+
+        """
+        config = config or DocumentAnalysisConfig()
+        windows = split_document(document, config)
+        if len(windows) == 1:
+            return await self.analyze(model_instance_id, document)
+
+        window_findings = [
+            (window, findings.findings)
+            async for _, window, findings in map_concurrently(
+                lambda window: self.analyze(model_instance_id, document[window]),
+                windows,
+                concurrency=config.concurrency,
+                ordered=False,
+            )
+        ]
+        return AnalysisFindings(findings=merge_findings(window_findings))
+
+    def close(self) -> None:
+        """Close the encrypted on-disk cache (if it is enabled)."""
+        if self._disk_cache:
+            self._disk_cache.close()
+
+    def get_analyze_cache_stats(self) -> AnalyzeCacheStats | None:
+        """Get a snapshot of the analyze cache.
+
+        Returns
+        -------
+            An AnalyzeCacheStats object (or None if the analyze cache is disabled).
+
+        """
+        return self._analyze_cache.get_stats() if self._analyze_cache else None
+
+    def get_disk_cache_stats(self) -> DiskCacheStats | None:
+        """Get a snapshot of the encrypted on-disk cache.
+
+        Returns
+        -------
+            A DiskCacheStats object (or None if the on-disk cache is disabled).
+
+        """
+        return self._disk_cache.get_stats() if self._disk_cache else None
+
+    def invalidate_analyze_cache(self, *, policy_version: str | None = None) -> None:
+        """Invalidate the analyze cache (e.g., after the Liminal policies change).
+
+        Args:
+        ----
+            policy_version: The new policy version that findings are cached for. If this
+                is not provided, the policy version is unchanged.
+
+        """
+        if self._analyze_cache:
+            self._analyze_cache.invalidate(policy_version=policy_version)
+
+    def invalidate_disk_cache(self) -> None:
+        """Invalidate the encrypted on-disk cache (for every process that shares it)."""
+        if self._disk_cache:
+            self._disk_cache.clear()
 
     async def cleanse(
         self,
@@ -134,19 +366,32 @@ class PromptEndpoint:
             An object that contains a cleansed version of the prompt.
 
         """
-        payload = self._generate_payload_for_request(
-            model_instance_id, prompt, thread_id=thread_id, findings=findings
+        body = encode_json(
+            self._generate_payload_for_request(
+                model_instance_id, prompt, thread_id=thread_id, findings=findings
+            )
         )
-        response = cast(
-            CleanseResponse,
-            await self._request_and_validate(
-                "POST",
-                "/api/v1/prompts/cleanse",
+
+        async def fetch() -> CleanseData:
+            response = cast(
                 CleanseResponse,
-                json=payload,
-            ),
-        )
-        return response.data
+                await self._request_and_validate(
+                    "POST",
+                    "/api/v1/prompts/cleanse",
+                    CleanseResponse,
+                    content=body,
+                    # Without a thread, each request creates one:
+                    idempotent=thread_id is not None,
+                ),
+            )
+            return response.data
+
+        # Results are only cached for existing threads (since each new thread gets its
+        # own tokens):
+        if self._disk_cache and thread_id is not None:
+            key = self._disk_cache.get_key("cleanse", body.decode())
+            return await self._disk_cache.get_or_fetch(key, CleanseData, fetch)
+        return await fetch()
 
     async def hydrate(
         self,
@@ -169,21 +414,99 @@ class PromptEndpoint:
             An object that contains a rehydrated version of the prompt.
 
         """
-        response = cast(
-            HydrateResponse,
-            await self._request_and_validate(
-                "POST",
-                "/api/v1/prompts/hydrate",
+        payload = {
+            "modelInstanceId": model_instance_id,
+            "source": SOURCE,
+            "text": prompt,
+            "threadId": thread_id,
+        }
+
+        async def fetch() -> HydrateData:
+            response = cast(
                 HydrateResponse,
-                json={
-                    "modelInstanceId": model_instance_id,
-                    "source": SOURCE,
-                    "text": prompt,
-                    "threadId": thread_id,
-                },
-            ),
+                await self._request_and_validate(
+                    "POST",
+                    "/api/v1/prompts/hydrate",
+                    HydrateResponse,
+                    json=payload,
+                    # Without a thread, each request creates one:
+                    idempotent=thread_id is not None,
+                ),
+            )
+            return response.data
+
+        # Results are only cached for existing threads (since each new thread gets its
+        # own tokens):
+        if self._disk_cache and thread_id is not None:
+            key = self._disk_cache.get_key(
+                "hydrate", json.dumps(payload, sort_keys=True)
+            )
+            return await self._disk_cache.get_or_fetch(key, HydrateData, fetch)
+        return await fetch()
+
+    def incremental_analyzer(
+        self,
+        model_instance_id: int,
+        *,
+        config: IncrementalAnalysisConfig | None = None,
+    ) -> IncrementalAnalyzer:
+        """Create an analyzer that re-analyzes only the edited parts of a text.
+
+        Args:
+        ----
+            model_instance_id: The ID of the model instance to analyze texts with.
+            config: An optional incremental analysis configuration.
+
+        Returns:
+        -------
+            An IncrementalAnalyzer object.
+
+        """
+        return IncrementalAnalyzer(self, model_instance_id, config=config)
+
+    def local_hydrator(self, prompt: str, cleansed: CleanseData) -> LocalHydrator:
+        """Create a hydrator that rehydrates text without calling the API.
+
+        Args:
+        ----
+            prompt: The original prompt.
+            cleansed: The result of cleansing the prompt.
+
+        Returns:
+        -------
+            A LocalHydrator object.
+
+        Raises:
+        ------
+            LiminalError: If the cleansed prompt doesn't match the original prompt.
+
+        """
+        return LocalHydrator(prompt, cleansed)
+
+    def pipeline(
+        self,
+        model_instance_id: int,
+        *,
+        config: PromptPipelineConfig | None = None,
+        thread_id: int | None = None,
+    ) -> PromptPipeline:
+        """Create a pipeline that analyzes, cleanses, and submits prompts.
+
+        Args:
+        ----
+            model_instance_id: The ID of the model instance to process prompts with.
+            config: An optional pipeline configuration.
+            thread_id: The ID of the thread to cleanse and submit prompts for. If this
+                is not provided, threads will be created automatically.
+
+        Returns:
+        -------
+            A PromptPipeline object.
+
+        """
+        return PromptPipeline(
+            self, model_instance_id, config=config, thread_id=thread_id
         )
-        return response.data
 
     async def stream(
         self,
@@ -192,6 +515,7 @@ class PromptEndpoint:
         *,
         thread_id: int | None = None,
         findings: AnalysisFindings | None = None,
+        hydrator: LocalHydrator | None = None,
     ) -> AsyncIterator[StreamResponseChunk]:
         """Submit a prompt to a thread and stream a response from the LLM.
 
@@ -203,6 +527,8 @@ class PromptEndpoint:
                 provided, a thread will be created automatically.
             findings: The findings from the analyze endpoint. If this is not provided,
                 the analyze endpoint will be called automatically.
+            hydrator: An optional local hydrator that rehydrates the response as it
+                arrives (holding back only text that may be the start of a token).
 
         Returns:
         -------
@@ -213,12 +539,12 @@ class PromptEndpoint:
             model_instance_id, prompt, thread_id=thread_id, findings=findings
         )
         payload["isStreaming"] = True
-        async for chunk in self._stream("POST", "/api/v1/prompts/submit", json=payload):
-            try:
-                yield json_decode(chunk, StreamResponseChunk)
-            except json.decoder.JSONDecodeError:
-                LOGGER.warning("Stream returned incomplete JSON chunk: %s", chunk)
-                yield StreamResponseChunk(content=chunk, finish_reason=None)
+
+        chunks = self._stream_chunks(encode_json(payload))
+        if hydrator:
+            chunks = hydrator.hydrate_stream(chunks)
+        async for chunk in chunks:
+            yield chunk
 
     async def submit(
         self,
@@ -253,7 +579,7 @@ class PromptEndpoint:
                 "POST",
                 "/api/v1/prompts/submit",
                 SubmitResponse,
-                json=payload,
+                content=encode_json(payload),
             ),
         )
         return response.data
@@ -0,0 +1,24 @@
+"""Define batch helpers for the prompts endpoint."""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Final
+
+from liminal.endpoints.prompt.models import AnalysisFindings
+from liminal.errors import LiminalError
+
+DEFAULT_BATCH_CONCURRENCY: Final[int] = 10
+
+
+@dataclass(frozen=True, kw_only=True)
+class AnalyzeResult:
+    """Define the result of analyzing one prompt of a batch."""
+
+    # The position of the prompt in the batch (and the prompt itself):
+    index: int
+    prompt: str
+
+    # The findings (if the prompt was analyzed) or the error (if it wasn't):
+    findings: AnalysisFindings | None = None
+    error: LiminalError | None = None
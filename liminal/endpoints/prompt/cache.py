@@ -0,0 +1,286 @@
+"""Define the analyze cache."""
+
+from __future__ import annotations
+
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass, replace
+import hashlib
+import hmac
+import secrets
+import time
+from typing import Final
+
+from liminal.endpoints.prompt.models import AnalysisFindings
+from liminal.errors import LiminalError
+from liminal.helpers.singleflight import SingleFlight
+
+DEFAULT_ANALYZE_CACHE_MAX_BYTES: Final[int] = 16 * 1024 * 1024
+DEFAULT_ANALYZE_CACHE_TTL: Final[float] = 3600.0
+
+# The approximate memory overhead (in bytes) of a cache entry and of each finding in it
+# (beyond the finding's strings):
+ENTRY_OVERHEAD: Final[int] = 256
+FINDING_OVERHEAD: Final[int] = 512
+
+
+def _copy(findings: AnalysisFindings) -> AnalysisFindings:
+    """Copy findings (so that a caller that changes them can't change the cache's).
+
+    Each finding is frozen, so only the list of findings is copied.
+
+    Args:
+    ----
+        findings: The findings.
+
+    Returns:
+    -------
+        The copy.
+
+    """
+    return replace(findings, findings=list(findings.findings))
+
+
+@dataclass(frozen=True, kw_only=True)
+class AnalyzeCacheConfig:
+    """Define the configuration of the analyze cache.
+
+    Cached findings are keyed by a keyed hash (HMAC-SHA256) of the model instance ID,
+    the prompt, and the policy version, so prompts are never held as keys.
+    """
+
+    # The maximum (approximate) size of the cached findings, in bytes:
+    max_bytes: int = DEFAULT_ANALYZE_CACHE_MAX_BYTES
+
+    # How long (in seconds) cached findings are used:
+    ttl: float = DEFAULT_ANALYZE_CACHE_TTL
+
+    # The key that prompts are hashed with (by default, a random key that is unique to
+    # the cache):
+    hash_key: bytes | None = None
+
+    # The version of the Liminal policies that findings are cached for (findings cached
+    # for other versions are never used):
+    policy_version: str = ""
+
+    def __post_init__(self) -> None:
+        """Perform some post-init validation.
+
+        Raises
+        ------
+            LiminalError: If the configuration is invalid.
+
+        """
+        if self.max_bytes < 1:
+            msg = f"Invalid maximum cache size: {self.max_bytes}"
+            raise LiminalError(msg)
+        if self.ttl <= 0.0:
+            msg = f"Invalid cache TTL: {self.ttl}"
+            raise LiminalError(msg)
+
+
+@dataclass(frozen=True, kw_only=True)
+class AnalyzeCacheStats:
+    """Define a snapshot of the analyze cache."""
+
+    # The number of lookups that were (and weren't) answered from the cache:
+    hits: int
+    misses: int
+
+    # The number of entries that were dropped to make room (or because they expired):
+    evictions: int
+    expirations: int
+
+    # The number of entries (and their approximate size, in bytes):
+    entries: int
+    size_bytes: int
+
+    # The policy version that findings are cached for:
+    policy_version: str
+
+
+@dataclass(frozen=True, kw_only=True)
+class _Entry:
+    """Define a cache entry."""
+
+    findings: AnalysisFindings
+    expires_at: float
+    size: int
+
+
+class AnalyzeCache:
+    """Define an in-memory LRU (and TTL) cache of analysis findings."""
+
+    def __init__(self, config: AnalyzeCacheConfig | None = None) -> None:
+        """Initialize.
+
+        Args:
+        ----
+            config: An optional cache configuration.
+
+        """
+        self._config = config or AnalyzeCacheConfig()
+        self._entries: OrderedDict[bytes, _Entry] = OrderedDict()
+        self._evictions = 0
+        self._expirations = 0
+        self._generation = 0
+        self._hash_key = self._config.hash_key or secrets.token_bytes(32)
+        self._hits = 0
+        self._misses = 0
+        self._policy_version = self._config.policy_version
+        self._single_flight = SingleFlight()
+        self._size = 0
+
+    def _get_key(self, model_instance_id: int, prompt: str) -> bytes:
+        """Get the cache key of a prompt.
+
+        Args:
+        ----
+            model_instance_id: The ID of the model instance the prompt is analyzed with.
+            prompt: The prompt.
+
+        Returns:
+        -------
+            The cache key.
+
+        """
+        message = f"{self._policy_version}\0{model_instance_id}\0{prompt}"
+        return hmac.digest(self._hash_key, message.encode(), hashlib.sha256)
+
+    def _lookup(self, key: bytes) -> AnalysisFindings | None:
+        """Look up findings in the cache.
+
+        Args:
+        ----
+            key: The cache key.
+
+        Returns:
+        -------
+            The cached findings (or None if there are none).
+
+        """
+        if (entry := self._entries.get(key)) is None:
+            return None
+        if entry.expires_at <= time.monotonic():
+            self._remove(key)
+            self._expirations += 1
+            return None
+
+        self._entries.move_to_end(key)
+        return entry.findings
+
+    def _remove(self, key: bytes) -> None:
+        """Remove an entry from the cache.
+
+        Args:
+        ----
+            key: The cache key.
+
+        """
+        self._size -= self._entries.pop(key).size
+
+    def _store(self, key: bytes, findings: AnalysisFindings) -> None:
+        """Store findings in the cache (evicting the least recently used as needed).
+
+        Args:
+        ----
+            key: The cache key.
+            findings: The findings.
+
+        """
+        size = (
+            ENTRY_OVERHEAD
+            + sum(
+                FINDING_OVERHEAD
+                + len(finding.custom_term or "")
+                + len(finding.policy_action)
+                + len(finding.score_category)
+                + len(finding.text)
+                + len(finding.type)
+                for finding in findings.findings
+            )
+            + len(findings.raw_findings or b"")
+        )
+        if size > self._config.max_bytes:
+            return
+
+        while self._size + size > self._config.max_bytes:
+            self._remove(next(iter(self._entries)))
+            self._evictions += 1
+
+        self._entries[key] = _Entry(
+            findings=findings, expires_at=time.monotonic() + self._config.ttl, size=size
+        )
+        self._size += size
+
+    async def get_or_fetch(
+        self,
+        model_instance_id: int,
+        prompt: str,
+        fetch: Callable[[], Awaitable[AnalysisFindings]],
+    ) -> AnalysisFindings:
+        """Get findings from the cache (fetching and caching them on a miss).
+
+        Identical prompts that miss the cache at the same time share one fetch. Every
+        caller gets its own copy of the findings.
+
+        Args:
+        ----
+            model_instance_id: The ID of the model instance the prompt is analyzed with.
+            prompt: The prompt.
+            fetch: The function that fetches the findings.
+
+        Returns:
+        -------
+            The findings.
+
+        """
+        key = self._get_key(model_instance_id, prompt)
+        if (findings := self._lookup(key)) is not None:
+            self._hits += 1
+            return _copy(findings)
+
+        self._misses += 1
+        generation = self._generation
+
+        async def fetch_and_store() -> AnalysisFindings:
+            findings = await fetch()
+            # Findings that were fetched before an invalidation aren't cached:
+            if generation == self._generation:
+                self._store(key, findings)
+            return findings
+
+        return _copy(await self._single_flight.run(key, fetch_and_store))
+
+    def get_stats(self) -> AnalyzeCacheStats:
+        """Get a snapshot of the cache.
+
+        Returns
+        -------
+            An AnalyzeCacheStats object.
+
+        """
+        return AnalyzeCacheStats(
+            hits=self._hits,
+            misses=self._misses,
+            evictions=self._evictions,
+            expirations=self._expirations,
+            entries=len(self._entries),
+            size_bytes=self._size,
+            policy_version=self._policy_version,
+        )
+
+    def invalidate(self, *, policy_version: str | None = None) -> None:
+        """Invalidate the cache.
+
+        Args:
+        ----
+            policy_version: The new policy version that findings are cached for. If this
+                is not provided, the policy version is unchanged.
+
+        """
+        if policy_version is not None:
+            self._policy_version = policy_version
+        self._entries.clear()
+        self._generation += 1
+        self._size = 0
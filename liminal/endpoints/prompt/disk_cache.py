@@ -0,0 +1,607 @@
+"""Define the encrypted on-disk cache."""
+
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Awaitable, Callable, Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass
+import hashlib
+import hmac
+import json
+import mmap
+import os
+from pathlib import Path
+import shutil
+import struct
+import tempfile
+import threading
+import time
+from typing import Final, TypeVar
+
+from cryptography.fernet import Fernet, InvalidToken
+
+from liminal.const import LOGGER
+from liminal.errors import LiminalError
+from liminal.helpers.decoder import DECODE_ERRORS, get_decoder
+from liminal.helpers.model import BaseModel
+
+DEFAULT_DISK_CACHE_MAX_BYTES: Final[int] = 256 * 1024 * 1024
+DEFAULT_DISK_CACHE_MAX_ENTRIES: Final[int] = 65536
+DEFAULT_DISK_CACHE_TTL: Final[float] = 7 * 24 * 60 * 60.0
+
+# The layout of the index file: a header (magic, slot count, total entry size, entry
+# count) followed by an open-addressing hash table of slots (key, entry size, last use,
+# expiry):
+INDEX_HEADER: Final[struct.Struct] = struct.Struct("<8sIQQ")
+INDEX_MAGIC: Final[bytes] = b"LMNLIDX1"
+INDEX_SLOT: Final[struct.Struct] = struct.Struct("<32sIdd")
+
+# The key of an empty slot:
+EMPTY_KEY: Final[bytes] = bytes(32)
+
+# When the cache is full, entries are evicted until it is this full (so that the index
+# is scanned for the least recently used entries once per batch of evictions):
+EVICTION_TARGET: Final[float] = 0.9
+
+# The exceptions that indicate that an entry could not be read (e.g., because another
+# process evicted it):
+READ_ERRORS: Final[tuple[type[Exception], ...]] = (
+    FileNotFoundError,
+    InvalidToken,
+    *DECODE_ERRORS,
+)
+
+# The exceptions that indicate that the cache could not be used at all (e.g., because
+# its directory was removed, or its permissions changed), which make it a miss:
+CACHE_ERRORS: Final[tuple[type[Exception], ...]] = (OSError, LiminalError)
+
+CachedT = TypeVar("CachedT", bound=BaseModel)
+
+
+@dataclass(frozen=True, kw_only=True)
+class DiskCacheConfig:
+    """Define the configuration of the encrypted on-disk cache."""
+
+    # The directory that the cache is stored in (which may be shared by several
+    # processes):
+    path: Path | str
+
+    # The key that entries are encrypted with (generated by Fernet.generate_key()):
+    encryption_key: bytes
+
+    # The maximum size of the (encrypted) entries, in bytes, and the maximum number of
+    # entries:
+    max_bytes: int = DEFAULT_DISK_CACHE_MAX_BYTES
+    max_entries: int = DEFAULT_DISK_CACHE_MAX_ENTRIES
+
+    # How long (in seconds) entries are used:
+    ttl: float = DEFAULT_DISK_CACHE_TTL
+
+    # The version of the Liminal policies that entries are cached for (entries cached
+    # for other versions are never used):
+    policy_version: str = ""
+
+    def __post_init__(self) -> None:
+        """Perform some post-init validation.
+
+        Raises
+        ------
+            LiminalError: If the configuration is invalid.
+
+        """
+        try:
+            _ = Fernet(self.encryption_key)
+        except ValueError as err:
+            msg = "Invalid encryption key (expected a Fernet key)"
+            raise LiminalError(msg) from err
+        if self.max_bytes < 1:
+            msg = f"Invalid maximum cache size: {self.max_bytes}"
+            raise LiminalError(msg)
+        if self.max_entries < 1:
+            msg = f"Invalid maximum number of cache entries: {self.max_entries}"
+            raise LiminalError(msg)
+        if self.ttl <= 0.0:
+            msg = f"Invalid cache TTL: {self.ttl}"
+            raise LiminalError(msg)
+
+
+@dataclass(frozen=True, kw_only=True)
+class DiskCacheStats:
+    """Define a snapshot of the encrypted on-disk cache."""
+
+    # The number of lookups (by this process) that were (and weren't) answered from the
+    # cache:
+    hits: int
+    misses: int
+
+    # The number of entries that this process dropped to make room:
+    evictions: int
+
+    # The number of entries (and their size, in bytes) across every process:
+    entries: int
+    size_bytes: int
+
+
+class DiskCache:
+    """Define an encrypted, on-disk LRU (and TTL) cache that survives restarts.
+
+    Entries are encrypted (with Fernet) and stored one per file, under names that are
+    keyed hashes (HMAC-SHA256) of what they cache. A memory-mapped index tracks each
+    entry's size, last use, and expiry; every change to it happens under an exclusive
+    file lock, so several processes can share the cache safely.
+
+    Opening the cache (and clearing it or getting its stats) blocks on file I/O, which
+    is meant for synchronous setup; `get_or_fetch` runs its file I/O in a worker thread.
+    """
+
+    def __init__(self, config: DiskCacheConfig) -> None:
+        """Initialize.
+
+        Args:
+        ----
+            config: The cache configuration.
+
+        Raises:
+        ------
+            LiminalError: If file locking is not supported on this platform, or if the
+                cache at the configured path holds another maximum number of entries.
+
+        """
+        try:
+            import fcntl  # noqa: PLC0415
+        except ImportError as err:
+            msg = "The on-disk cache is not supported on this platform"
+            raise LiminalError(msg) from err
+
+        self._config = config
+        self._evictions = 0
+        self._fcntl = fcntl
+        self._fernet = Fernet(config.encryption_key)
+        self._hash_key = hmac.digest(
+            config.encryption_key, b"liminal-disk-cache-keys", hashlib.sha256
+        )
+        self._hits = 0
+        self._misses = 0
+        self._path = Path(config.path)
+        self._slot_count = 2 * config.max_entries
+        self._thread_lock = threading.Lock()
+        self._open()
+
+    def _open(self) -> None:
+        """Open (or reopen, once closed) the index.
+
+        Raises
+        ------
+            LiminalError: If the index is sized for another maximum number of entries.
+
+        """
+        (self._path / "entries").mkdir(mode=0o700, parents=True, exist_ok=True)
+        self._index_file = os.fdopen(
+            os.open(self._path / "index", os.O_RDWR | os.O_CREAT, 0o600), "r+b"
+        )
+        self._fcntl.flock(self._index_file, self._fcntl.LOCK_EX)
+        try:
+            self._index = self._open_index()
+        except LiminalError:
+            self._index_file.close()
+            raise
+        finally:
+            if not self._index_file.closed:
+                self._fcntl.flock(self._index_file, self._fcntl.LOCK_UN)
+        self._closed = False
+
+    def _delete_slot(self, slot: int) -> None:
+        """Empty a slot (shifting back the slots that follow it, as needed).
+
+        Args:
+        ----
+            slot: The slot.
+
+        """
+        empty = slot
+        current = slot
+        while True:
+            current = (current + 1) % self._slot_count
+            key, size, last_used, expires_at = self._read_slot(current)
+            if key == EMPTY_KEY:
+                break
+
+            # A slot can fill the gap unless its home is cyclically within the gap:
+            home = self._get_home(key)
+            if (empty < current and empty < home <= current) or (
+                empty > current and (home > empty or home <= current)
+            ):
+                continue
+
+            self._write_slot(empty, key, size, last_used, expires_at)
+            empty = current
+
+        self._write_slot(empty, EMPTY_KEY, 0, 0.0, 0.0)
+
+    def _evict(self, size: int) -> None:
+        """Evict the least recently used entries to make room for a new one.
+
+        Args:
+        ----
+            size: The size of the new entry.
+
+        """
+        _, _, total_size, entries = INDEX_HEADER.unpack_from(self._index)
+        if (
+            total_size + size <= self._config.max_bytes
+            and entries < self._config.max_entries
+        ):
+            return
+
+        max_bytes = self._config.max_bytes * EVICTION_TARGET
+        max_entries = self._config.max_entries * EVICTION_TARGET
+        occupied = [
+            values
+            for values in INDEX_SLOT.iter_unpack(self._index[INDEX_HEADER.size :])
+            if values[0] != EMPTY_KEY
+        ]
+        victims = []
+        for key, victim_size, _, _ in sorted(occupied, key=lambda values: values[2]):
+            if total_size + size <= max_bytes and entries < max_entries:
+                break
+            victims.append(key)
+            total_size -= victim_size
+            entries -= 1
+
+        # Slots move as others are deleted, so victims are looked up by key:
+        for key in victims:
+            self._remove(key)
+            self._evictions += 1
+
+    def _find(self, key: bytes) -> tuple[int, bool]:
+        """Find the slot of a key.
+
+        Args:
+        ----
+            key: The key.
+
+        Returns:
+        -------
+            The slot that holds the key (or the empty slot where it belongs) and whether
+            the key was found.
+
+        """
+        slot = self._get_home(key)
+        while (slot_key := self._read_slot(slot)[0]) != key:
+            if slot_key == EMPTY_KEY:
+                return slot, False
+            slot = (slot + 1) % self._slot_count
+        return slot, True
+
+    def _get_entry_path(self, key: bytes) -> Path:
+        """Get the path of an entry's file.
+
+        Args:
+        ----
+            key: The entry's key.
+
+        Returns:
+        -------
+            The path of the entry's file.
+
+        """
+        return self._path / "entries" / key.hex()
+
+    def _get_home(self, key: bytes) -> int:
+        """Get the slot that a key is placed in (unless it is taken).
+
+        Args:
+        ----
+            key: The key.
+
+        Returns:
+        -------
+            The slot.
+
+        """
+        return int.from_bytes(key[:8], "little") % self._slot_count
+
+    @contextmanager
+    def _locked_file(self) -> Iterator[None]:
+        """Hold an exclusive lock on the index (across threads and processes).
+
+        A closed cache is reopened first.
+
+        Yields
+        ------
+            Nothing; the index may be used while the lock is held.
+
+        """
+        with self._thread_lock:
+            if self._closed:
+                self._open()
+            self._fcntl.flock(self._index_file, self._fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                self._fcntl.flock(self._index_file, self._fcntl.LOCK_UN)
+
+    def _open_index(self) -> mmap.mmap:
+        """Map the index into memory (resetting the cache if the index is unusable).
+
+        The index is never shrunk in place, since other processes may have it mapped
+        (and would crash on accessing pages past its new end).
+
+        Returns
+        -------
+            The memory-mapped index.
+
+        Raises
+        ------
+            LiminalError: If the index is sized for another maximum number of entries.
+
+        """
+        index_size = INDEX_HEADER.size + self._slot_count * INDEX_SLOT.size
+        self._index_file.seek(0)
+        header = self._index_file.read(INDEX_HEADER.size)
+
+        if len(header) == INDEX_HEADER.size:
+            magic, slot_count, _, _ = INDEX_HEADER.unpack(header)
+            if magic == INDEX_MAGIC and slot_count != self._slot_count:
+                msg = (
+                    f"The on-disk cache at {self._path} holds up to "
+                    f"{slot_count // 2} entries (not {self._config.max_entries}); "
+                    "use another path for another maximum number of entries"
+                )
+                raise LiminalError(msg)
+
+        if (
+            len(header) < INDEX_HEADER.size
+            or header[: len(INDEX_MAGIC)] != INDEX_MAGIC
+            or os.fstat(self._index_file.fileno()).st_size < index_size
+        ):
+            # The index is new or corrupt, so it is rewritten (growing it as needed):
+            shutil.rmtree(self._path / "entries")
+            (self._path / "entries").mkdir(mode=0o700)
+            self._index_file.seek(0)
+            self._index_file.write(
+                INDEX_HEADER.pack(INDEX_MAGIC, self._slot_count, 0, 0)
+            )
+            self._index_file.write(bytes(index_size - INDEX_HEADER.size))
+            self._index_file.flush()
+
+        return mmap.mmap(self._index_file.fileno(), index_size)
+
+    def _read_slot(self, slot: int) -> tuple[bytes, int, float, float]:
+        """Read a slot of the index.
+
+        Args:
+        ----
+            slot: The slot.
+
+        Returns:
+        -------
+            The slot's key, entry size, last use, and expiry.
+
+        """
+        values: tuple[bytes, int, float, float] = INDEX_SLOT.unpack_from(
+            self._index, INDEX_HEADER.size + slot * INDEX_SLOT.size
+        )
+        return values
+
+    def _remove(self, key: bytes) -> None:
+        """Remove an entry (if it exists).
+
+        Args:
+        ----
+            key: The entry's key.
+
+        """
+        slot, found = self._find(key)
+        if not found:
+            return
+
+        size = self._read_slot(slot)[1]
+        self._delete_slot(slot)
+        self._update_totals(-size, -1)
+        self._get_entry_path(key).unlink(missing_ok=True)
+
+    def _update_totals(self, size: int, entries: int) -> None:
+        """Update the index's total entry size and count.
+
+        Args:
+        ----
+            size: The change in total entry size.
+            entries: The change in entry count.
+
+        """
+        _, _, total_size, total_entries = INDEX_HEADER.unpack_from(self._index)
+        INDEX_HEADER.pack_into(
+            self._index,
+            0,
+            INDEX_MAGIC,
+            self._slot_count,
+            total_size + size,
+            total_entries + entries,
+        )
+
+    def _write_slot(
+        self, slot: int, key: bytes, size: int, last_used: float, expires_at: float
+    ) -> None:
+        """Write a slot of the index.
+
+        Args:
+        ----
+            slot: The slot.
+            key: The entry's key.
+            size: The entry's size.
+            last_used: When the entry was last used.
+            expires_at: When the entry expires.
+
+        """
+        INDEX_SLOT.pack_into(
+            self._index,
+            INDEX_HEADER.size + slot * INDEX_SLOT.size,
+            key,
+            size,
+            last_used,
+            expires_at,
+        )
+
+    def clear(self) -> None:
+        """Remove every entry (for every process)."""
+        with self._locked_file():
+            self._index[:] = bytes(len(self._index))
+            INDEX_HEADER.pack_into(self._index, 0, INDEX_MAGIC, self._slot_count, 0, 0)
+            shutil.rmtree(self._path / "entries")
+            (self._path / "entries").mkdir(mode=0o700)
+
+    def close(self) -> None:
+        """Close the cache's index (which is reopened if the cache is used again)."""
+        with self._thread_lock:
+            if not self._closed:
+                self._index.close()
+                self._index_file.close()
+                self._closed = True
+
+    def get(self, key: bytes, data_type: type[CachedT]) -> CachedT | None:
+        """Get an entry.
+
+        Args:
+        ----
+            key: The entry's key.
+            data_type: The type of the cached object.
+
+        Returns:
+        -------
+            The cached object (or None if there is none).
+
+        """
+        now = time.time()
+        with self._locked_file():
+            slot, found = self._find(key)
+            if found:
+                _, size, _, expires_at = self._read_slot(slot)
+                if expires_at <= now:
+                    self._remove(key)
+                    found = False
+                else:
+                    self._write_slot(slot, key, size, now, expires_at)
+
+        if found:
+            try:
+                token = self._get_entry_path(key).read_bytes()
+                data = get_decoder(data_type).decode(self._fernet.decrypt(token))
+            except READ_ERRORS:
+                # The entry was evicted by another process (or is unreadable):
+                with self._locked_file():
+                    self._remove(key)
+            else:
+                self._hits += 1
+                return data
+
+        self._misses += 1
+        return None
+
+    def get_key(self, *parts: object) -> bytes:
+        """Get the key of an entry (a keyed hash of what it caches).
+
+        Args:
+        ----
+            *parts: The parts of what the entry caches.
+
+        Returns:
+        -------
+            The key.
+
+        """
+        message = "\0".join(str(part) for part in (self._config.policy_version, *parts))
+        return hmac.digest(self._hash_key, message.encode(), hashlib.sha256)
+
+    async def get_or_fetch(
+        self,
+        key: bytes,
+        data_type: type[CachedT],
+        fetch: Callable[[], Awaitable[CachedT]],
+    ) -> CachedT:
+        """Get an entry (fetching and caching it on a miss).
+
+        File operations run in a worker thread, so they don't block the event loop. If
+        they fail, the entry is fetched (or left uncached), so that the cache never
+        fails a request.
+
+        Args:
+        ----
+            key: The entry's key.
+            data_type: The type of the cached object.
+            fetch: The function that fetches the object.
+
+        Returns:
+        -------
+            The object.
+
+        """
+        try:
+            data = await asyncio.to_thread(self.get, key, data_type)
+        except CACHE_ERRORS as err:
+            LOGGER.warning("Could not read from the on-disk cache: %s", err)
+            data = None
+        if data is not None:
+            return data
+
+        data = await fetch()
+        try:
+            await asyncio.to_thread(self.put, key, data)
+        except CACHE_ERRORS as err:
+            LOGGER.warning("Could not write to the on-disk cache: %s", err)
+        return data
+
+    def get_stats(self) -> DiskCacheStats:
+        """Get a snapshot of the cache.
+
+        Returns
+        -------
+            A DiskCacheStats object.
+
+        """
+        with self._locked_file():
+            _, _, size_bytes, entries = INDEX_HEADER.unpack_from(self._index)
+        return DiskCacheStats(
+            hits=self._hits,
+            misses=self._misses,
+            evictions=self._evictions,
+            entries=entries,
+            size_bytes=size_bytes,
+        )
+
+    def put(self, key: bytes, data: BaseModel) -> None:
+        """Put an entry (evicting the least recently used entries as needed).
+
+        Args:
+        ----
+            key: The entry's key.
+            data: The object to cache.
+
+        """
+        token = self._fernet.encrypt(json.dumps(data.to_dict(by_alias=True)).encode())
+        if (size := len(token)) > self._config.max_bytes:
+            return
+
+        # Write the entry's file atomically, so other processes never read part of it:
+        temp_file = tempfile.NamedTemporaryFile(  # noqa: SIM115
+            dir=self._path / "entries", delete=False
+        )
+        try:
+            with temp_file:
+                temp_file.write(token)
+            Path(temp_file.name).replace(self._get_entry_path(key))
+        except OSError:
+            Path(temp_file.name).unlink(missing_ok=True)
+            raise
+
+        now = time.time()
+        with self._locked_file():
+            slot, found = self._find(key)
+            if found:
+                self._update_totals(size - self._read_slot(slot)[1], 0)
+            else:
+                self._evict(size)
+                slot, _ = self._find(key)
+                self._update_totals(size, 1)
+            self._write_slot(slot, key, size, now, now + self._config.ttl)
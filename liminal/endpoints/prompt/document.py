@@ -0,0 +1,194 @@
+"""Define the document analyzer."""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Final
+
+from liminal.endpoints.prompt.batch import DEFAULT_BATCH_CONCURRENCY
+from liminal.endpoints.prompt.models import AnalysisFinding
+from liminal.errors import LiminalError
+
+DEFAULT_DOCUMENT_WINDOW_SIZE: Final[int] = 16 * 1024
+DEFAULT_DOCUMENT_WINDOW_OVERLAP: Final[int] = 512
+
+# The boundaries that windows are split on, from the safest to the least safe:
+WINDOW_BOUNDARIES: Final[tuple[str, ...]] = ("\n\n", "\n", ". ", " ")
+
+
+@dataclass(frozen=True, kw_only=True)
+class DocumentAnalysisConfig:
+    """Define the configuration of document analysis.
+
+    Documents that are longer than a window are split into overlapping windows (on
+    paragraph, line, sentence, or word boundaries), which are analyzed concurrently.
+    The overlap should be comfortably longer than any piece of sensitive data, so that
+    each piece is whole in at least one window.
+    """
+
+    # The maximum size of a window (in characters):
+    window_size: int = DEFAULT_DOCUMENT_WINDOW_SIZE
+
+    # The (minimum) number of characters that consecutive windows share:
+    overlap: int = DEFAULT_DOCUMENT_WINDOW_OVERLAP
+
+    # The maximum number of windows to analyze at once:
+    concurrency: int = DEFAULT_BATCH_CONCURRENCY
+
+    def __post_init__(self) -> None:
+        """Perform some post-init validation.
+
+        Raises
+        ------
+            LiminalError: If the configuration is invalid.
+
+        """
+        if self.window_size < 1:
+            msg = f"Invalid window size: {self.window_size}"
+            raise LiminalError(msg)
+        if self.overlap < 0 or self.overlap * 2 >= self.window_size:
+            msg = (
+                f"Invalid window overlap: {self.overlap} (it must be less than half "
+                "the window size)"
+            )
+            raise LiminalError(msg)
+        if self.concurrency < 1:
+            msg = f"Invalid concurrency: {self.concurrency}"
+            raise LiminalError(msg)
+
+
+def _find_boundary(document: str, start: int, end: int) -> int:
+    """Find the safest boundary in part of a document (preferring later ones).
+
+    Args:
+    ----
+        document: The document.
+        start: The start of the part.
+        end: The end of the part.
+
+    Returns:
+    -------
+        The position just after the boundary (or -1 if there is none).
+
+    """
+    for boundary in WINDOW_BOUNDARIES:
+        if (position := document.rfind(boundary, start, end)) >= 0:
+            return position + len(boundary)
+    return -1
+
+
+def split_document(document: str, config: DocumentAnalysisConfig) -> list[slice]:
+    """Split a document into overlapping windows.
+
+    Args:
+    ----
+        document: The document.
+        config: The document analysis configuration.
+
+    Returns:
+    -------
+        The spans of the windows (in order).
+
+    """
+    windows: list[slice] = []
+    start = 0
+
+    while True:
+        end = min(start + config.window_size, len(document))
+        if end < len(document):
+            # End the window on a boundary within its last (overlapping) characters:
+            boundary = _find_boundary(document, end - config.overlap, end)
+            if boundary > start:
+                end = boundary
+        windows.append(slice(start, end))
+        if end == len(document):
+            return windows
+
+        # Start the next window on a boundary, at least as far back as the overlap:
+        next_start = end - config.overlap
+        boundary = _find_boundary(
+            document, max(start + 1, next_start - config.overlap), next_start
+        )
+        start = max(start + 1, boundary if boundary >= 0 else next_start)
+
+
+def move_finding(finding: AnalysisFinding, offset: int) -> AnalysisFinding:
+    """Move a finding (e.g., from its position in a window to its place in a document).
+
+    Args:
+    ----
+        finding: The finding.
+        offset: The number of characters to move the finding by.
+
+    Returns:
+    -------
+        The moved finding.
+
+    """
+    # This is far faster than dataclasses.replace (which matters for documents with
+    # many findings):
+    return AnalysisFinding(
+        custom_term=finding.custom_term,
+        end=finding.end + offset,
+        policy_action=finding.policy_action,
+        score=finding.score,
+        score_category=finding.score_category,
+        start=finding.start + offset,
+        text=finding.text,
+        type=finding.type,
+    )
+
+
+def merge_findings(
+    window_findings: list[tuple[slice, list[AnalysisFinding]]],
+) -> list[AnalysisFinding]:
+    """Merge the findings of a document's windows.
+
+    Findings are moved to their position in the document. Where windows overlap, the
+    same piece of sensitive data may be found more than once (and a piece that a window
+    cuts off is found only partially), so of the findings of the same type from
+    different windows that overlap, only the longest is kept.
+
+    Args:
+    ----
+        window_findings: The span and findings of each window.
+
+    Returns:
+    -------
+        The findings (in the order of their position in the document).
+
+    """
+    candidates = sorted(
+        (
+            (move_finding(finding, window.start), index)
+            for index, (window, findings) in enumerate(window_findings)
+            for finding in findings
+        ),
+        key=lambda candidate: (candidate[0].start, -candidate[0].end),
+    )
+
+    merged: list[tuple[AnalysisFinding, int]] = []
+    # The positions (in the merged findings) of the findings of each type that may
+    # overlap the next finding:
+    active: dict[str, list[int]] = {}
+
+    for finding, index in candidates:
+        positions = active.setdefault(finding.type, [])
+        positions[:] = [
+            position
+            for position in positions
+            if merged[position][0].end > finding.start
+        ]
+        duplicate = next(
+            (position for position in positions if merged[position][1] != index), None
+        )
+        if duplicate is None:
+            positions.append(len(merged))
+            merged.append((finding, index))
+            continue
+
+        kept = merged[duplicate][0]
+        if finding.end - finding.start > kept.end - kept.start:
+            merged[duplicate] = (finding, index)
+
+    return sorted((finding for finding, _ in merged), key=lambda finding: finding.start)
@@ -0,0 +1,298 @@
+"""Define the local hydrator."""
+
+from __future__ import annotations
+
+from collections.abc import AsyncIterable, AsyncIterator, Iterable, Iterator
+from itertools import pairwise
+import re
+
+from liminal.endpoints.prompt.models import (
+    CleanseData,
+    CleansedToken,
+    HydrateData,
+    HydratedToken,
+    StreamResponseChunk,
+)
+from liminal.errors import LiminalError
+
+
+def _find_all(text: str, substring: str, start: int) -> Iterator[int]:
+    """Find every (possibly overlapping) occurrence of a substring.
+
+    Args:
+    ----
+        text: The text to search.
+        substring: The substring to find.
+        start: The position to search from.
+
+    Yields:
+    ------
+        The start of each occurrence.
+
+    """
+    while (start := text.find(substring, start)) != -1:
+        yield start
+        start += 1
+
+
+def _align(prompt: str, literals: list[str]) -> list[tuple[int, int]]:
+    """Align the text around the tokens of a cleansed prompt with the original prompt.
+
+    Every token must have replaced some (non-empty) sensitive data, so the prompt must
+    be the literals with something in between each of them. The number of ways (up to
+    two) that the prompt can be matched up to the end of each occurrence of each literal
+    is counted, and an alignment is only returned if it is the only one.
+
+    Args:
+    ----
+        prompt: The original prompt.
+        literals: The text before, between, and after the tokens.
+
+    Returns:
+    -------
+        The span of the sensitive data that each token replaced.
+
+    Raises:
+    ------
+        LiminalError: If the literals don't match the prompt, or match it in several
+            ways (e.g., because a separator also appears in the sensitive data).
+
+    """
+    if not prompt.startswith(literals[0]) or not prompt.endswith(literals[-1]):
+        msg = "The cleansed prompt does not match the original prompt"
+        raise LiminalError(msg)
+
+    # The number of ways (up to two) of matching the prompt up to each end of each
+    # literal (each literal must start after some end of the previous one):
+    ways: list[dict[int, int]] = [{len(literals[0]): 1}]
+    for index, literal in enumerate(literals[1:], 1):
+        ends = sorted(ways[-1])
+        if index == len(literals) - 1:
+            starts: Iterable[int] = [len(prompt) - len(literal)]
+        else:
+            starts = _find_all(prompt, literal, ends[0] + 1)
+
+        reached: dict[int, int] = {}
+        count = position = 0
+        for start in starts:
+            while position < len(ends) and ends[position] < start:
+                count = min(count + ways[-1][ends[position]], 2)
+                position += 1
+            if count:
+                reached[start + len(literal)] = count
+        if not reached:
+            msg = "The cleansed prompt does not match the original prompt"
+            raise LiminalError(msg)
+        ways.append(reached)
+
+    if ways[-1].get(len(prompt)) != 1:
+        msg = "Cannot tell where the sensitive data of the cleansed prompt ends"
+        raise LiminalError(msg)
+
+    # Each literal was reached in one way, so each one is preceded by one end:
+    spans: list[tuple[int, int]] = []
+    end = len(prompt)
+    for literal, previous_ends in zip(
+        reversed(literals), reversed(ways[:-1]), strict=False
+    ):
+        start = end - len(literal)
+        previous_end = max(position for position in previous_ends if position < start)
+        spans.append((previous_end, start))
+        end = previous_end
+    return spans[::-1]
+
+
+def _map_tokens(
+    prompt: str, text: str, items: Iterable[CleansedToken]
+) -> dict[str, tuple[str, str]]:
+    """Map the tokens of a cleansed prompt to the sensitive data they replaced.
+
+    The text around the tokens is unchanged by cleansing, so each token replaced
+    whatever lies between that text in the original prompt.
+
+    Args:
+    ----
+        prompt: The original prompt.
+        text: The cleansed prompt.
+        items: The tokens in the cleansed prompt.
+
+    Returns:
+    -------
+        A dictionary of each token to its sensitive data and entity type.
+
+    Raises:
+    ------
+        LiminalError: If the cleansed prompt doesn't match the original prompt (or
+            doesn't tell which sensitive data each token replaced).
+
+    """
+    ordered = sorted(items, key=lambda item: item.start)
+    if not ordered:
+        return {}
+
+    literals = [text[: ordered[0].start]]
+    for item, next_item in pairwise(ordered):
+        if item.end == next_item.start:
+            msg = (
+                f"Cannot tell adjacent tokens apart: {text[item.start : next_item.end]}"
+            )
+            raise LiminalError(msg)
+        literals.append(text[item.end : next_item.start])
+    literals.append(text[ordered[-1].end :])
+
+    tokens: dict[str, tuple[str, str]] = {}
+    for item, (start, end) in zip(ordered, _align(prompt, literals), strict=True):
+        tokens.setdefault(
+            text[item.start : item.end], (prompt[start:end], item.entity_type)
+        )
+    return tokens
+
+
+class LocalHydrator:
+    """Define a hydrator that restores sensitive data without calling the API.
+
+    When a prompt is cleansed, the client already holds everything that is needed to
+    rehydrate text: the original prompt and the cleansed (and hashed) tokens that
+    replaced its sensitive data. The hydrator maps both kinds of tokens back to the
+    sensitive data and produces the same HydrateData as the hydrate endpoint.
+    """
+
+    def __init__(self, prompt: str, cleansed: CleanseData) -> None:
+        """Initialize.
+
+        Args:
+        ----
+            prompt: The original prompt.
+            cleansed: The result of cleansing the prompt.
+
+        Raises:
+        ------
+            LiminalError: If the cleansed prompt doesn't match the original prompt.
+
+        """
+        self._tokens = {
+            **_map_tokens(prompt, cleansed.text_hashed, cleansed.items_hashed),
+            **_map_tokens(prompt, cleansed.text, cleansed.items),
+        }
+        # Only known tokens are matched, longer ones first (so, e.g., PERSON_10 isn't
+        # read as PERSON_1 followed by a 0, but PERSON_1 followed by a 2 is PERSON_1
+        # unless PERSON_12 is a token too):
+        tokens = sorted(self._tokens, key=len, reverse=True)
+        self._pattern = re.compile(
+            "|".join(map(re.escape, tokens)) if tokens else "(?!)"
+        )
+
+        # Every proper prefix of every token (including whole tokens that are the start
+        # of longer ones), for streams:
+        self._max_token_length = len(tokens[0]) if tokens else 0
+        self._token_starts = {token[0] for token in tokens}
+        self._token_prefixes = {
+            token[:end] for token in tokens for end in range(1, len(token))
+        }
+
+    def _get_pending_start(self, text: str) -> int:
+        """Get the position from which text may be the start of an incomplete token.
+
+        Args:
+        ----
+            text: The text.
+
+        Returns:
+        -------
+            The position (or the length of the text, if every token is complete).
+
+        """
+        for start in range(max(0, len(text) - self._max_token_length), len(text)):
+            if (
+                text[start] in self._token_starts
+                and text[start:] in self._token_prefixes
+            ):
+                return start
+        return len(text)
+
+    def _hydrate(self, text: str, *, complete: bool) -> tuple[HydrateData, int]:
+        """Rehydrate text with sensitive data.
+
+        Args:
+        ----
+            text: The text to rehydrate.
+            complete: Whether the text is complete (as opposed to the start of a
+                stream, in which case its end may be the start of a token).
+
+        Returns:
+        -------
+            An object that contains a rehydrated version of the text (up to the
+            position where it stops being unambiguous) and that position.
+
+        """
+        items: list[HydratedToken] = []
+        parts: list[str] = []
+        length = position = 0
+        stop = len(text) if complete else self._get_pending_start(text)
+
+        for match in self._pattern.finditer(text):
+            if match.end() > stop:
+                # A token that overlaps the pending text may still turn out differently:
+                stop = min(stop, match.start())
+                break
+
+            value, entity_type = self._tokens[match.group()]
+            parts.append(text[position : match.start()])
+            length += match.start() - position
+            items.append(
+                HydratedToken(
+                    start=length, end=length + len(value), entity_type=entity_type
+                )
+            )
+            parts.append(value)
+            length += len(value)
+            position = match.end()
+
+        parts.append(text[position:stop])
+        return HydrateData(items=items, text="".join(parts)), stop
+
+    def hydrate(self, text: str) -> HydrateData:
+        """Rehydrate text with sensitive data.
+
+        Args:
+        ----
+            text: The text to rehydrate.
+
+        Returns:
+        -------
+            An object that contains a rehydrated version of the text.
+
+        """
+        return self._hydrate(text, complete=True)[0]
+
+    async def hydrate_stream(
+        self, chunks: AsyncIterable[StreamResponseChunk]
+    ) -> AsyncIterator[StreamResponseChunk]:
+        """Rehydrate a streamed response with sensitive data (as it arrives).
+
+        Tokens may be split across chunks, so text that may be the start of a token is
+        held back (and only that text) until the next chunk shows what it is.
+
+        Args:
+        ----
+            chunks: The response chunks.
+
+        Yields:
+        ------
+            The rehydrated response chunks.
+
+        """
+        pending = ""
+        async for chunk in chunks:
+            text = pending + chunk.content
+            data, stop = self._hydrate(text, complete=chunk.finish_reason is not None)
+            pending = text[stop:]
+            if data.text or chunk.finish_reason is not None:
+                yield StreamResponseChunk(
+                    content=data.text, finish_reason=chunk.finish_reason
+                )
+
+        if pending:
+            yield StreamResponseChunk(
+                content=self.hydrate(pending).text, finish_reason=None
+            )
@@ -0,0 +1,248 @@
+"""Define the incremental analyzer."""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Final
+
+from liminal.endpoints.prompt.document import move_finding
+from liminal.endpoints.prompt.models import AnalysisFinding, AnalysisFindings
+from liminal.errors import LiminalError
+
+if TYPE_CHECKING:
+    from liminal.endpoints.prompt import PromptEndpoint
+
+DEFAULT_INCREMENTAL_CONTEXT: Final[int] = 256
+DEFAULT_INCREMENTAL_MAX_CHANGED_RATIO: Final[float] = 0.5
+
+# The size of the blocks that texts are compared in (before the exact position where
+# they differ is searched for):
+COMPARE_BLOCK_SIZE: Final[int] = 4096
+
+WHITESPACE: Final[tuple[str, ...]] = (" ", "\n", "\t")
+
+
+@dataclass(frozen=True, kw_only=True)
+class IncrementalAnalysisConfig:
+    """Define the configuration of incremental analysis."""
+
+    # The (minimum) number of unchanged characters around an edit that are analyzed
+    # with it (so that sensitive data is recognized in its context, and that an edit
+    # next to a piece of sensitive data doesn't cut it short); at least one character
+    # is needed, so that the context starts and ends on whitespace:
+    context: int = DEFAULT_INCREMENTAL_CONTEXT
+
+    # The ratio of the text beyond which an edit is analyzed with the whole text:
+    max_changed_ratio: float = DEFAULT_INCREMENTAL_MAX_CHANGED_RATIO
+
+    def __post_init__(self) -> None:
+        """Perform some post-init validation.
+
+        Raises
+        ------
+            LiminalError: If the configuration is invalid.
+
+        """
+        if self.context < 1:
+            msg = f"Invalid context: {self.context} (it must be at least 1)"
+            raise LiminalError(msg)
+        if not 0.0 <= self.max_changed_ratio <= 1.0:
+            msg = f"Invalid maximum changed ratio: {self.max_changed_ratio}"
+            raise LiminalError(msg)
+
+
+def _get_common_prefix_length(first: str, second: str) -> int:
+    """Get the length of the longest common prefix of two strings.
+
+    Args:
+    ----
+        first: The first string.
+        second: The second string.
+
+    Returns:
+    -------
+        The length of the prefix.
+
+    """
+    length = min(len(first), len(second))
+    start = 0
+    # Compare whole blocks first (in C), then search the block where they differ:
+    while (
+        start < length
+        and first[start : start + COMPARE_BLOCK_SIZE]
+        == second[start : start + COMPARE_BLOCK_SIZE]
+    ):
+        start += COMPARE_BLOCK_SIZE
+    start = min(start, length)
+    end = min(start + COMPARE_BLOCK_SIZE, length)
+
+    while start < end:
+        middle = (start + end + 1) // 2
+        if first[start:middle] == second[start:middle]:
+            start = middle
+        else:
+            end = middle - 1
+    return start
+
+
+def _get_common_suffix_length(first: str, second: str, limit: int) -> int:
+    """Get the length of the longest common suffix of two strings.
+
+    Args:
+    ----
+        first: The first string.
+        second: The second string.
+        limit: The maximum length of the suffix.
+
+    Returns:
+    -------
+        The length of the suffix.
+
+    """
+    return _get_common_prefix_length(
+        first[len(first) - limit :][::-1], second[len(second) - limit :][::-1]
+    )
+
+
+def _add_context(text: str, head: int, tail: int, context: int) -> tuple[int, int]:
+    """Add context around the edited part of a text (starting and ending on whitespace).
+
+    Args:
+    ----
+        text: The text.
+        head: The length of the unchanged start of the text.
+        tail: The length of the unchanged end of the text.
+        context: The (minimum) number of unchanged characters to add on each side.
+
+    Returns:
+    -------
+        The lengths of the start and end of the text that remain outside the context.
+
+    """
+    # The context is widened to the nearest whitespace, so that it never splits a word:
+    head = max(0, head - context)
+    if head:
+        head = max(text.rfind(char, 0, head) for char in WHITESPACE) + 1
+
+    tail = max(0, tail - context)
+    if tail:
+        end = len(text) - tail
+        boundaries = [text.find(char, end) for char in WHITESPACE]
+        boundaries = [boundary for boundary in boundaries if boundary >= 0]
+        tail = len(text) - min(boundaries) if boundaries else 0
+
+    return head, tail
+
+
+class IncrementalAnalyzer:
+    """Define an analyzer that re-analyzes only the edited parts of a text.
+
+    The first text is analyzed whole. After that, each text is compared to the one
+    analyzed before it: only the part that changed (plus some unchanged context around
+    it) is analyzed, and the findings in the unchanged parts are reused (moved, if an
+    edit before them changed the length of the text).
+    """
+
+    def __init__(
+        self,
+        endpoint: PromptEndpoint,
+        model_instance_id: int,
+        *,
+        config: IncrementalAnalysisConfig | None = None,
+    ) -> None:
+        """Initialize.
+
+        Args:
+        ----
+            endpoint: The prompt endpoint.
+            model_instance_id: The ID of the model instance to analyze texts with.
+            config: An optional incremental analysis configuration.
+
+        """
+        self._config = config or IncrementalAnalysisConfig()
+        self._endpoint = endpoint
+        self._findings: list[AnalysisFinding] = []
+        self._model_instance_id = model_instance_id
+        self._text: str | None = None
+
+    def _get_unchanged_lengths(self, previous: str, text: str) -> tuple[int, int]:
+        """Get the lengths of the start and end of a text that don't need re-analysis.
+
+        Args:
+        ----
+            previous: The text that was analyzed before.
+            text: The (edited) text.
+
+        Returns:
+        -------
+            The lengths of the unchanged start and end of the text.
+
+        """
+        head = _get_common_prefix_length(previous, text)
+        tail = _get_common_suffix_length(
+            previous, text, min(len(previous), len(text)) - head
+        )
+        head, tail = _add_context(text, head, tail, self._config.context)
+
+        # Findings that the edit (or its context) touches are analyzed whole:
+        changed = True
+        while changed:
+            changed = False
+            for finding in self._findings:
+                if (finding.start < head < finding.end) or (
+                    finding.start < len(previous) - tail < finding.end
+                ):
+                    head = min(head, finding.start)
+                    tail = min(tail, len(previous) - finding.end)
+                    changed = True
+
+        return head, tail
+
+    async def analyze(self, text: str) -> AnalysisFindings:
+        """Analyze a text for sensitive data (re-analyzing only what has changed).
+
+        Args:
+        ----
+            text: The text to analyze.
+
+        Returns:
+        -------
+            An object that contains identified sensitive data ("findings") in the whole
+            text.
+
+        """
+        previous, self._text = self._text, None
+        if previous == text:
+            self._text = text
+            return AnalysisFindings(findings=list(self._findings))
+
+        head = tail = 0
+        if previous is not None:
+            head, tail = self._get_unchanged_lengths(previous, text)
+        end = len(text) - tail
+
+        if previous is None or end - head > len(text) * self._config.max_changed_ratio:
+            head, end, tail = 0, len(text), 0
+            kept: list[AnalysisFinding] = []
+        else:
+            shift = len(text) - len(previous)
+            kept = [
+                finding if finding.end <= head else move_finding(finding, shift)
+                for finding in self._findings
+                if finding.end <= head or finding.start >= len(previous) - tail
+            ]
+
+        # An empty text leaves nothing to analyze:
+        if end > head:
+            findings = await self._endpoint.analyze(
+                self._model_instance_id, text[head:end]
+            )
+            kept += [move_finding(finding, head) for finding in findings.findings]
+        self._findings = sorted(kept, key=lambda finding: finding.start)
+        self._text = text
+        return AnalysisFindings(findings=list(self._findings))
+
+    def reset(self) -> None:
+        """Forget the last analyzed text (so that the next is analyzed whole)."""
+        self._findings = []
+        self._text = None
@@ -3,13 +3,15 @@
 from __future__ import annotations
 
 from dataclasses import dataclass, field
+from typing import Any
 
 from mashumaro import field_options
 
-from liminal.helpers.model import BaseModel
+from liminal.helpers.encoder import JSON_DUMPER, RawJSON
+from liminal.helpers.model import BaseModel, interned
 
 
-@dataclass(frozen=True, kw_only=True)
+@dataclass(frozen=True, kw_only=True, slots=True)
 class AnalysisFinding(BaseModel):
     """Define a detection analysis finding.
 
@@ -19,22 +21,87 @@ class AnalysisFinding(BaseModel):
 
     custom_term: str = field(metadata=field_options(alias="customTerm"))
     end: int
-    policy_action: str = field(metadata=field_options(alias="policyAction"))
+    policy_action: str = field(metadata=interned("policyAction"))
     score: float
-    score_category: str = field(metadata=field_options(alias="scoreCategory"))
+    score_category: str = field(metadata=interned("scoreCategory"))
     start: int
     text: str
-    type: str
+    type: str = field(metadata=interned())
 
 
-@dataclass(frozen=True, kw_only=True)
+@dataclass(frozen=True, kw_only=True, slots=True)
 class AnalysisFindings(BaseModel):
     """Define consolidated detection analysis findings."""
 
     findings: list[AnalysisFinding]
 
+    # The raw JSON of the findings (only retained when requested, so that the findings
+    # can be sent back to the API without being re-encoded):
+    raw_findings: RawJSON | None = field(
+        default=None,
+        compare=False,
+        repr=False,
+        metadata=field_options(serialize="omit", deserialize=RawJSON),
+    )
+
+    # The findings that the raw JSON was decoded into (so that it is only sent back
+    # while the findings are unchanged):
+    _raw_findings_source: tuple[AnalysisFinding, ...] | None = field(
+        default=None,
+        compare=False,
+        repr=False,
+        metadata=field_options(serialize="omit"),
+    )
+
+    def __post_init__(self) -> None:
+        """Remember the findings that the raw JSON was decoded into."""
+        if self.raw_findings is not None and self._raw_findings_source is None:
+            object.__setattr__(self, "_raw_findings_source", tuple(self.findings))
+
+    def get_raw_findings(self) -> RawJSON | None:
+        """Get the raw JSON of the findings (if it still matches them).
+
+        Findings are frozen, so the raw JSON matches them as long as the list holds the
+        same findings that the raw JSON was decoded into (which it doesn't once, e.g.,
+        a copy is filtered, or the list is changed in place).
+
+        Returns
+        -------
+            The raw JSON (or None if it isn't retained or no longer matches).
+
+        """
+        source = self._raw_findings_source
+        if source is None or len(source) != len(self.findings):
+            return None
+        if any(
+            finding is not original
+            for finding, original in zip(self.findings, source, strict=True)
+        ):
+            return None
+        return self.raw_findings
+
+
+@dataclass(frozen=True, kw_only=True, slots=True)
+class RetainedAnalysisFindings(AnalysisFindings):
+    """Define consolidated detection analysis findings that retain their raw JSON."""
+
+    @classmethod
+    def __pre_deserialize__(cls, d: dict[Any, Any]) -> dict[Any, Any]:
+        """Retain the raw JSON of the findings before they are deserialized.
+
+        Args:
+        ----
+            d: The findings' (loaded) JSON.
+
+        Returns:
+        -------
+            The findings' JSON, with their raw JSON.
+
+        """
+        return {**d, "raw_findings": JSON_DUMPER(d["findings"])}
+
 
-@dataclass(frozen=True, kw_only=True)
+@dataclass(frozen=True, kw_only=True, slots=True)
 class CleanseData(BaseModel):
     """Define the result of a cleanse request."""
 
@@ -49,16 +116,16 @@ class CleanseData(BaseModel):
     text_hashed: str = field(metadata=field_options(alias="textHashed"))
 
 
-@dataclass(frozen=True, kw_only=True)
+@dataclass(frozen=True, kw_only=True, slots=True)
 class CleansedToken(BaseModel):
     """Define a cleansed token."""
 
     start: int
     end: int
-    entity_type: str = field(metadata=field_options(alias="entityType"))
+    entity_type: str = field(metadata=interned("entityType"))
 
 
-@dataclass(frozen=True, kw_only=True)
+@dataclass(frozen=True, kw_only=True, slots=True)
 class HydrateData(BaseModel):
     """Define the result of a hydration request."""
 
@@ -66,25 +133,25 @@ class HydrateData(BaseModel):
     text: str
 
 
-@dataclass(frozen=True, kw_only=True)
+@dataclass(frozen=True, kw_only=True, slots=True)
 class HydratedToken(BaseModel):
     """Define a hydrated token."""
 
     end: int
-    entity_type: str = field(metadata=field_options(alias="entityType"))
+    entity_type: str = field(metadata=interned("entityType"))
     start: int
 
 
-@dataclass(frozen=True, kw_only=True)
+@dataclass(frozen=True, kw_only=True, slots=True)
 class ReidentifiedToken(BaseModel):
     """Define a reidentified token."""
 
     start: int
     end: int
-    entity_type: str = field(metadata=field_options(alias="entityType"))
+    entity_type: str = field(metadata=interned("entityType"))
 
 
-@dataclass(frozen=True, kw_only=True)
+@dataclass(frozen=True, kw_only=True, slots=True)
 class StreamResponseChunk(BaseModel):
     """Define a streaming response chunk."""
 
@@ -92,7 +159,7 @@ class StreamResponseChunk(BaseModel):
     finish_reason: str | None = field(metadata=field_options(alias="finishReason"))
 
 
-@dataclass(frozen=True, kw_only=True)
+@dataclass(frozen=True, kw_only=True, slots=True)
 class SubmitData(BaseModel):
     """Define the result of a submit request."""
 
@@ -0,0 +1,226 @@
+"""Define the prompt pipeline."""
+
+from __future__ import annotations
+
+from collections.abc import AsyncIterable, AsyncIterator, Iterable
+from dataclasses import dataclass, replace
+from typing import TYPE_CHECKING, Final
+
+from liminal.endpoints.prompt.batch import DEFAULT_BATCH_CONCURRENCY
+from liminal.endpoints.prompt.models import AnalysisFindings, CleanseData, SubmitData
+from liminal.errors import LiminalError
+from liminal.helpers.batch import aiter_items
+from liminal.helpers.pipeline import Pipeline, Stage, StageStats
+
+if TYPE_CHECKING:
+    from liminal.endpoints.prompt import PromptEndpoint
+
+DEFAULT_PIPELINE_QUEUE_SIZE: Final[int] = 2 * DEFAULT_BATCH_CONCURRENCY
+
+
+@dataclass(frozen=True, kw_only=True)
+class PromptPipelineConfig:
+    """Define the configuration of a prompt pipeline.
+
+    Every prompt is analyzed first; it is then (optionally) cleansed and (optionally)
+    submitted, both with the findings of the analysis.
+    """
+
+    # Whether prompts are cleansed and submitted:
+    cleanse: bool = True
+    submit: bool = True
+
+    # The maximum number of prompts each stage processes at once:
+    analyze_concurrency: int = DEFAULT_BATCH_CONCURRENCY
+    cleanse_concurrency: int = DEFAULT_BATCH_CONCURRENCY
+    submit_concurrency: int = DEFAULT_BATCH_CONCURRENCY
+
+    # The maximum number of prompts waiting for each stage (beyond which the stages
+    # before it wait):
+    queue_size: int = DEFAULT_PIPELINE_QUEUE_SIZE
+
+
+@dataclass(frozen=True, kw_only=True)
+class PromptPipelineResult:
+    """Define the result of running one prompt through a pipeline."""
+
+    # The position of the prompt in the input (and the prompt itself):
+    index: int
+    prompt: str
+
+    # The output of each stage (if the prompt has gone through it):
+    findings: AnalysisFindings | None = None
+    cleansed: CleanseData | None = None
+    response: SubmitData | None = None
+
+    # The error that stopped the prompt (and the stage it occurred in), if any:
+    error: LiminalError | None = None
+    failed_stage: str | None = None
+
+
+class PromptPipeline:
+    """Define a pipeline that analyzes, cleanses, and submits prompts.
+
+    Each stage runs with its own concurrency, and bounded queues between stages apply
+    backpressure: a slow stage holds back the stages before it rather than letting
+    prompts pile up in memory.
+    """
+
+    def __init__(
+        self,
+        endpoint: PromptEndpoint,
+        model_instance_id: int,
+        *,
+        config: PromptPipelineConfig | None = None,
+        thread_id: int | None = None,
+    ) -> None:
+        """Initialize.
+
+        Args:
+        ----
+            endpoint: The prompt endpoint.
+            model_instance_id: The ID of the model instance to process prompts with.
+            config: An optional pipeline configuration.
+            thread_id: The ID of the thread to cleanse and submit prompts for. If this
+                is not provided, threads will be created automatically.
+
+        """
+        self._endpoint = endpoint
+        self._model_instance_id = model_instance_id
+        self._thread_id = thread_id
+
+        config = config or PromptPipelineConfig()
+        stages = [
+            Stage(
+                name="analyze",
+                func=self._analyze,
+                concurrency=config.analyze_concurrency,
+            )
+        ]
+        if config.cleanse:
+            stages.append(
+                Stage(
+                    name="cleanse",
+                    func=self._cleanse,
+                    concurrency=config.cleanse_concurrency,
+                )
+            )
+        if config.submit:
+            stages.append(
+                Stage(
+                    name="submit",
+                    func=self._submit,
+                    concurrency=config.submit_concurrency,
+                )
+            )
+
+        self._pipeline = Pipeline(
+            stages,
+            queue_size=config.queue_size,
+            skip=lambda result: result.error is not None,
+        )
+
+    async def _analyze(self, result: PromptPipelineResult) -> PromptPipelineResult:
+        """Analyze a prompt.
+
+        Args:
+        ----
+            result: The prompt's result so far.
+
+        Returns:
+        -------
+            The prompt's result, with findings (or an error).
+
+        """
+        try:
+            findings = await self._endpoint.analyze(
+                self._model_instance_id, result.prompt
+            )
+        except LiminalError as err:
+            return replace(result, error=err, failed_stage="analyze")
+        return replace(result, findings=findings)
+
+    async def _cleanse(self, result: PromptPipelineResult) -> PromptPipelineResult:
+        """Cleanse a prompt.
+
+        Args:
+        ----
+            result: The prompt's result so far.
+
+        Returns:
+        -------
+            The prompt's result, with a cleansed prompt (or an error).
+
+        """
+        try:
+            cleansed = await self._endpoint.cleanse(
+                self._model_instance_id,
+                result.prompt,
+                thread_id=self._thread_id,
+                findings=result.findings,
+            )
+        except LiminalError as err:
+            return replace(result, error=err, failed_stage="cleanse")
+        return replace(result, cleansed=cleansed)
+
+    async def _submit(self, result: PromptPipelineResult) -> PromptPipelineResult:
+        """Submit a prompt.
+
+        Args:
+        ----
+            result: The prompt's result so far.
+
+        Returns:
+        -------
+            The prompt's result, with a response from the LLM (or an error).
+
+        """
+        try:
+            response = await self._endpoint.submit(
+                self._model_instance_id,
+                result.prompt,
+                thread_id=self._thread_id,
+                findings=result.findings,
+            )
+        except LiminalError as err:
+            return replace(result, error=err, failed_stage="submit")
+        return replace(result, response=response)
+
+    def get_stats(self) -> list[StageStats]:
+        """Get a snapshot of every stage of the most recent run (in order).
+
+        Returns
+        -------
+            A list of StageStats objects.
+
+        """
+        return self._pipeline.get_stats()
+
+    async def run(
+        self, prompts: Iterable[str] | AsyncIterable[str]
+    ) -> AsyncIterator[PromptPipelineResult]:
+        """Run prompts through the pipeline.
+
+        Prompts are consumed lazily, and results are yielded as soon as each prompt has
+        gone through every stage (so, not necessarily in the order of the prompts). A
+        prompt that fails a stage skips the remaining stages (without aborting the
+        run); its result contains the error instead.
+
+        Args:
+        ----
+            prompts: The prompts.
+
+        Yields:
+        ------
+            A result for each prompt.
+
+        """
+
+        async def results() -> AsyncIterator[PromptPipelineResult]:
+            index = 0
+            async for prompt in aiter_items(prompts):
+                yield PromptPipelineResult(index=index, prompt=prompt)
+                index += 1
+
+        async for result in self._pipeline.run(results()):
+            yield result
@@ -8,6 +8,7 @@ from liminal.endpoints.prompt.models import (
     AnalysisFindings,
     CleanseData,
     HydrateData,
+    RetainedAnalysisFindings,
     SubmitData,
 )
 from liminal.helpers.schema import BaseResponseSchema
@@ -34,6 +35,13 @@ class HydrateResponse(BaseResponseSchema):
     data: HydrateData
 
 
+@dataclass(frozen=True, kw_only=True)
+class RetainedAnalyzeResponse(BaseResponseSchema):
+    """Define the response schema for an analysis request (retaining raw findings)."""
+
+    data: RetainedAnalysisFindings
+
+
 @dataclass(frozen=True, kw_only=True)
 class SubmitResponse(BaseResponseSchema):
     """Define the response schema for a submit request."""
@@ -0,0 +1,338 @@
+"""Define the columnar findings table."""
+
+from __future__ import annotations
+
+from array import array
+from bisect import bisect_left, bisect_right
+from collections.abc import Callable, Collection, Iterable, Iterator, Sequence
+from itertools import accumulate
+from operator import itemgetter
+import sys
+from typing import Any
+
+from liminal.endpoints.prompt.models import AnalysisFinding, AnalysisFindings
+
+
+class FindingsTable:
+    """Define a compact, columnar table of analysis findings.
+
+    Each field of the findings is stored in its own column: positions and scores in
+    arrays, and the (few, often repeated) custom terms, policy actions, score
+    categories, and types as interned strings. Rows are sorted by position, and an
+    interval index (of the furthest end of the rows so far) lets overlap and
+    containment queries bisect to the rows they need, rather than scan every row.
+    """
+
+    def __init__(self, findings: Iterable[AnalysisFinding] = ()) -> None:
+        """Initialize.
+
+        Args:
+        ----
+            findings: The findings to store (in any order).
+
+        """
+        rows = sorted(findings, key=lambda finding: (finding.start, finding.end))
+        intern = sys.intern
+        self._set_columns(
+            starts=array("q", [finding.start for finding in rows]),
+            ends=array("q", [finding.end for finding in rows]),
+            scores=array("d", [finding.score for finding in rows]),
+            custom_terms=[intern(finding.custom_term) for finding in rows],
+            policy_actions=[intern(finding.policy_action) for finding in rows],
+            score_categories=[intern(finding.score_category) for finding in rows],
+            texts=[finding.text for finding in rows],
+            types=[intern(finding.type) for finding in rows],
+        )
+
+    def __getitem__(self, index: int) -> AnalysisFinding:
+        """Get a row of the table as a finding.
+
+        Args:
+        ----
+            index: The index of the row.
+
+        Returns:
+        -------
+            The finding.
+
+        """
+        return AnalysisFinding(
+            custom_term=self._custom_terms[index],
+            end=self._ends[index],
+            policy_action=self._policy_actions[index],
+            score=self._scores[index],
+            score_category=self._score_categories[index],
+            start=self._starts[index],
+            text=self._texts[index],
+            type=self._types[index],
+        )
+
+    def __iter__(self) -> Iterator[AnalysisFinding]:
+        """Iterate over the rows of the table as findings.
+
+        Returns
+        -------
+            An iterator of findings (in the order of their position).
+
+        """
+        return map(self.__getitem__, range(len(self)))
+
+    def __len__(self) -> int:
+        """Get the number of rows in the table.
+
+        Returns
+        -------
+            The number of rows.
+
+        """
+        return len(self._starts)
+
+    def _select(self, indices: Sequence[int]) -> FindingsTable:
+        """Select rows of the table (keeping their order).
+
+        Args:
+        ----
+            indices: The (ascending) indices of the rows.
+
+        Returns:
+        -------
+            A table of the selected rows.
+
+        """
+        # An item getter picks every row from a column at once (but returns a single
+        # row as-is, rather than in a tuple):
+        pick: Callable[[Sequence[Any]], Iterable[Any]] = (
+            itemgetter(*indices)
+            if len(indices) > 1
+            else lambda column: [column[index] for index in indices]
+        )
+        table = FindingsTable.__new__(FindingsTable)
+        table._set_columns(  # noqa: SLF001
+            starts=array("q", pick(self._starts)),
+            ends=array("q", pick(self._ends)),
+            scores=array("d", pick(self._scores)),
+            custom_terms=list(pick(self._custom_terms)),
+            policy_actions=list(pick(self._policy_actions)),
+            score_categories=list(pick(self._score_categories)),
+            texts=list(pick(self._texts)),
+            types=list(pick(self._types)),
+        )
+        return table
+
+    def _set_columns(
+        self,
+        *,
+        starts: array[int],
+        ends: array[int],
+        scores: array[float],
+        custom_terms: list[str],
+        policy_actions: list[str],
+        score_categories: list[str],
+        texts: list[str],
+        types: list[str],
+    ) -> None:
+        """Set the columns of the table (and index them).
+
+        Args:
+        ----
+            starts: The start of each row (in ascending order).
+            ends: The end of each row.
+            scores: The score of each row.
+            custom_terms: The custom term of each row.
+            policy_actions: The policy action of each row.
+            score_categories: The score category of each row.
+            texts: The text of each row.
+            types: The type of each row.
+
+        """
+        self._custom_terms = custom_terms
+        self._ends = ends
+        self._policy_actions = policy_actions
+        self._score_categories = score_categories
+        self._scores = scores
+        self._starts = starts
+        self._texts = texts
+        self._types = types
+
+        # The furthest end of the rows up to each row (which, unlike the ends, never
+        # decreases, so it can be bisected):
+        self._max_ends = array("q", accumulate(ends, max))
+
+    @classmethod
+    def from_findings(cls, findings: AnalysisFindings) -> FindingsTable:
+        """Create a table from analysis findings.
+
+        Args:
+        ----
+            findings: The analysis findings.
+
+        Returns:
+        -------
+            The table.
+
+        """
+        return cls(findings.findings)
+
+    @property
+    def ends(self) -> memoryview:
+        """Get the (read-only) column of ends.
+
+        Returns
+        -------
+            The ends of the rows.
+
+        """
+        return memoryview(self._ends).toreadonly()
+
+    @property
+    def policy_actions(self) -> tuple[str, ...]:
+        """Get the column of policy actions.
+
+        Returns
+        -------
+            The policy actions of the rows.
+
+        """
+        return tuple(self._policy_actions)
+
+    @property
+    def scores(self) -> memoryview:
+        """Get the (read-only) column of scores.
+
+        Returns
+        -------
+            The scores of the rows.
+
+        """
+        return memoryview(self._scores).toreadonly()
+
+    @property
+    def starts(self) -> memoryview:
+        """Get the (read-only) column of starts.
+
+        Returns
+        -------
+            The starts of the rows.
+
+        """
+        return memoryview(self._starts).toreadonly()
+
+    @property
+    def types(self) -> tuple[str, ...]:
+        """Get the column of types.
+
+        Returns
+        -------
+            The types of the rows.
+
+        """
+        return tuple(self._types)
+
+    def containing(self, start: int, end: int) -> FindingsTable:
+        """Get the rows that contain a span of text.
+
+        Args:
+        ----
+            start: The start of the span.
+            end: The end of the span.
+
+        Returns:
+        -------
+            A table of the rows that start at or before the span and end at or after it.
+
+        """
+        first = bisect_left(self._max_ends, end)
+        last = bisect_right(self._starts, start)
+        ends = self._ends
+        return self._select(
+            [index for index in range(first, last) if ends[index] >= end]
+        )
+
+    def filter(
+        self,
+        *,
+        min_score: float | None = None,
+        policy_actions: Collection[str] | None = None,
+        types: Collection[str] | None = None,
+    ) -> FindingsTable:
+        """Get the rows that match all of the given criteria.
+
+        Each criterion only reads its own column, and only for the rows that match the
+        criteria before it (so no row is ever rebuilt just to be filtered out).
+
+        Args:
+        ----
+            min_score: The minimum score of the rows.
+            policy_actions: The policy actions of the rows.
+            types: The types of the rows.
+
+        Returns:
+        -------
+            A table of the matching rows.
+
+        """
+        # Each criterion narrows down the rows that the next is applied to:
+        indices: Sequence[int] = range(len(self))
+        if min_score is not None:
+            indices = [
+                index for index, score in enumerate(self._scores) if score >= min_score
+            ]
+        if policy_actions is not None:
+            actions = frozenset(policy_actions)
+            column = self._policy_actions
+            indices = [index for index in indices if column[index] in actions]
+        if types is not None:
+            kinds = frozenset(types)
+            column = self._types
+            indices = [index for index in indices if column[index] in kinds]
+        return self._select(indices)
+
+    def overlapping(self, start: int, end: int) -> FindingsTable:
+        """Get the rows that overlap a span of text.
+
+        Args:
+        ----
+            start: The start of the span.
+            end: The end of the span.
+
+        Returns:
+        -------
+            A table of the rows that share at least one character with the span.
+
+        """
+        first = bisect_right(self._max_ends, start)
+        last = bisect_left(self._starts, end)
+        ends = self._ends
+        return self._select(
+            [index for index in range(first, last) if ends[index] > start]
+        )
+
+    def to_findings(self) -> AnalysisFindings:
+        """Convert the table to analysis findings.
+
+        Returns
+        -------
+            The analysis findings (in the order of their position).
+
+        """
+        return AnalysisFindings(findings=list(self))
+
+    def within(self, start: int, end: int) -> FindingsTable:
+        """Get the rows that lie within a span of text.
+
+        Args:
+        ----
+            start: The start of the span.
+            end: The end of the span.
+
+        Returns:
+        -------
+            A table of the rows that start at or after the span and end at or before it.
+
+        """
+        first = bisect_left(self._starts, start)
+        last = bisect_right(self._starts, end)
+        ends = self._ends
+        return self._select(
+            [index for index in range(first, last) if ends[index] <= end]
+        )
@@ -2,33 +2,151 @@
 
 from __future__ import annotations
 
-from collections.abc import Awaitable, Callable
-from typing import cast
+import asyncio
+from collections import deque
+from collections.abc import (
+    AsyncGenerator,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Collection,
+    Iterable,
+)
+from typing import Any, Final, cast, overload
 
 from liminal.const import SOURCE
 from liminal.endpoints.thread.models import Thread
+from liminal.endpoints.thread.pagination import ThreadPaginationConfig
 from liminal.endpoints.thread.schemas import (
     CreateThreadResponse,
     GetAvailableThreadsResponse,
     GetThreadByIdResponse,
 )
+from liminal.errors import LiminalError, RequestError
+from liminal.helpers.decoder import DECODE_ERRORS
+from liminal.helpers.identity import IdentityMap
+from liminal.helpers.model import BaseModel, get_projection
+from liminal.helpers.pipeline import get_or_raise
+from liminal.helpers.schema import get_list_schema
+from liminal.helpers.stream import JSONArrayStreamParser
 from liminal.helpers.typing import ValidatedResponseT
 
+# The end of the threads of a page (in its queue):
+_END: Final = object()
+
+
+def _drop_pages(
+    pages: Iterable[tuple[asyncio.Queue[object], set[asyncio.Task[None]]]],
+) -> None:
+    """Drop pages that are no longer needed (even if they failed).
+
+    Args:
+    ----
+        pages: The queues of the pages and the tasks that fill them.
+
+    """
+    for _, tasks in pages:
+        for task in tasks:
+            if not task.cancel() and not task.cancelled():
+                task.exception()
+
 
 class ThreadEndpoint:
     """Define the threads endpoint."""
 
     def __init__(
-        self, request_and_validate: Callable[..., Awaitable[ValidatedResponseT]]
+        self,
+        request_and_validate: Callable[..., Awaitable[ValidatedResponseT]],
+        stream: Callable[..., AsyncIterator[bytes]],
+        identity_map: IdentityMap,
     ) -> None:
         """Initialize.
 
         Args:
         ----
             request_and_validate: The request and validate function.
+            stream: The stream function.
+            identity_map: The identity map that streamed threads are decoded with.
 
         """
+        self._identity_map = identity_map
         self._request_and_validate = request_and_validate
+        self._stream = stream
+
+    async def _fetch_page(
+        self,
+        offset: int,
+        limit: int,
+        model_type: type[BaseModel],
+        id_type: type[BaseModel] | None,
+        queue: asyncio.Queue[object],
+    ) -> None:
+        """Stream a page of threads into a queue (each as soon as it is complete).
+
+        Args:
+        ----
+            offset: The number of threads before the page.
+            limit: The (maximum) number of threads in the page.
+            model_type: The model of each thread (or a projection of it).
+            id_type: A projection to decode the ID of each thread with (or None if
+                the model of each thread holds it).
+            queue: The queue to put the threads, with their IDs (and then their end)
+                into.
+
+        Raises:
+        ------
+            RequestError: If the page could not be validated.
+
+        """
+        with self._identity_map.activate():
+            try:
+                async for item in self._iter_page(offset, limit, model_type, id_type):
+                    await queue.put(item)
+            except DECODE_ERRORS as err:
+                msg = f"Could not validate response: {err}"
+                raise RequestError(msg) from err
+        await queue.put(_END)
+
+    async def _iter_page(
+        self,
+        offset: int,
+        limit: int,
+        model_type: type[BaseModel],
+        id_type: type[BaseModel] | None,
+    ) -> AsyncIterator[tuple[int, BaseModel]]:
+        """Stream a page of threads.
+
+        Args:
+        ----
+            offset: The number of threads before the page.
+            limit: The (maximum) number of threads in the page.
+            model_type: The model of each thread (or a projection of it).
+            id_type: A projection to decode the ID of each thread with (or None if
+                the model of each thread holds it).
+
+        Yields:
+        ------
+            The IDs and threads of the page (each as soon as it is complete).
+
+        """
+
+        def decode(item: dict[str, Any]) -> tuple[int, BaseModel]:
+            thread = model_type.from_dict(item)
+            thread_id: int = cast(
+                Thread, thread if id_type is None else id_type.from_dict(item)
+            ).id
+            return thread_id, thread
+
+        parser = JSONArrayStreamParser("data")
+        async for chunk in self._stream(
+            "GET",
+            "/api/v1/threads",
+            params={"source": SOURCE, "limit": str(limit), "offset": str(offset)},
+        ):
+            for item in parser.feed(chunk):
+                yield decode(item)
+        for item in parser.close():
+            yield decode(item)
 
     async def create(self, model_instance_id: int, name: str) -> Thread:
         """Create a thread.
@@ -58,24 +176,143 @@ class ThreadEndpoint:
         )
         return response.data
 
-    async def get_available(self) -> list[Thread]:
+    @overload
+    async def get_available(self, *, fields: None = None) -> list[Thread]: ...
+
+    @overload
+    async def get_available(self, *, fields: Collection[str]) -> list[Any]: ...
+
+    async def get_available(
+        self, *, fields: Collection[str] | None = None
+    ) -> list[Any]:
         """Get available threads.
 
-        Returns
+        Args:
+        ----
+            fields: The names of the only fields to decode (e.g., `("id", "name")`),
+                which is far faster for long lists than decoding every (nested) field.
+
+        Returns:
         -------
-            A list of Thread objects.
+            A list of Thread objects (or, when fields are given, of projections of
+            them that hold only those fields).
 
         """
-        response = cast(
-            GetAvailableThreadsResponse,
-            await self._request_and_validate(
-                "GET",
-                "/api/v1/threads",
+        if fields is None:
+            response = cast(
                 GetAvailableThreadsResponse,
-                params={"source": SOURCE},
+                await self._request_and_validate(
+                    "GET",
+                    "/api/v1/threads",
+                    GetAvailableThreadsResponse,
+                    params={"source": SOURCE},
+                ),
+            )
+            return response.data
+
+        schema = get_list_schema(get_projection(Thread, fields))
+        projected = cast(
+            Any,
+            await self._request_and_validate(
+                "GET", "/api/v1/threads", schema, params={"source": SOURCE}
             ),
         )
-        return response.data
+        return cast(list[Any], projected.data)
+
+    @overload
+    def iter_available(
+        self, *, config: ThreadPaginationConfig | None = None, fields: None = None
+    ) -> AsyncGenerator[Thread]: ...
+
+    @overload
+    def iter_available(
+        self,
+        *,
+        config: ThreadPaginationConfig | None = None,
+        fields: Collection[str],
+    ) -> AsyncGenerator[Any]: ...
+
+    async def iter_available(
+        self,
+        *,
+        config: ThreadPaginationConfig | None = None,
+        fields: Collection[str] | None = None,
+    ) -> AsyncGenerator[Any]:
+        """Iterate over available threads, page by page.
+
+        Each page is streamed: its threads are decoded (and yielded) as they arrive,
+        rather than once the whole page has been loaded. Meanwhile, the next pages are
+        already requested (and buffered, up to a page each); closing the iterator
+        (e.g., with `contextlib.aclosing`) cancels them.
+
+        Args:
+        ----
+            config: An optional configuration for the pagination.
+            fields: The names of the only fields to decode (as with `get_available`).
+
+        Yields:
+        ------
+            Thread objects (or, when fields are given, projections of them that hold
+            only those fields).
+
+        Raises:
+        ------
+            LiminalError: If the maximum number of pages is reached (and the last one
+                is full).
+
+        """
+        config = config or ThreadPaginationConfig()
+        model_type = Thread if fields is None else get_projection(Thread, fields)
+        # Pages are told apart by the ID of their first thread, which is decoded even
+        # if it isn't one of the fields:
+        id_type = (
+            None if fields is None or "id" in fields else get_projection(Thread, ["id"])
+        )
+        pages: deque[tuple[asyncio.Queue[object], set[asyncio.Task[None]]]] = deque()
+        offset = requested = 0
+
+        def request_page() -> None:
+            nonlocal offset, requested
+            if requested == config.max_pages:
+                return
+            queue: asyncio.Queue[object] = asyncio.Queue(config.page_size)
+            task = asyncio.create_task(
+                self._fetch_page(offset, config.page_size, model_type, id_type, queue)
+            )
+            pages.append((queue, {task}))
+            offset += config.page_size
+            requested += 1
+
+        try:
+            for _ in range(config.prefetch + 1):
+                request_page()
+
+            first_id: int | None = None
+            while pages:
+                queue, tasks = pages[0]
+                count = 0
+                while (item := await get_or_raise(queue, tasks)) is not _END:
+                    thread_id, thread = cast(tuple[int, BaseModel], item)
+                    if not count:
+                        # A server that ignores the offset returns the same page again
+                        # (instead of an empty or short one):
+                        if thread_id == first_id:
+                            return
+                        first_id = thread_id
+                    count += 1
+                    yield thread
+
+                # A short page is the last one (as is a longer one, which means that
+                # the server returned every thread at once):
+                if count != config.page_size:
+                    return
+                pages.popleft()
+                request_page()
+
+            msg = f"Stopped iterating over threads after {config.max_pages} pages"
+            raise LiminalError(msg)
+        finally:
+            _drop_pages(pages)
 
     async def get_by_id(self, thread_id: int) -> Thread:
         """Get a thread by ID.
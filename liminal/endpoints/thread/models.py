@@ -10,10 +10,11 @@ from typing import Literal
 from mashumaro import field_options
 
 from liminal.endpoints.llm.models import ModelInstance
-from liminal.helpers.model import BaseModel
+from liminal.helpers.identity import deserialize_entity
+from liminal.helpers.model import BaseModel, interned
 
 
-@dataclass(frozen=True, kw_only=True)
+@dataclass(frozen=True, kw_only=True, slots=True)
 class DeidentifiedToken(BaseModel):
     """Define the schema for a deidentified token."""
 
@@ -21,7 +22,7 @@ class DeidentifiedToken(BaseModel):
     hash_text: str = field(metadata=field_options(alias="hashText"))
 
 
-@dataclass(frozen=True, kw_only=True)
+@dataclass(frozen=True, kw_only=True, slots=True)
 class Chat(BaseModel):
     """Define the schema for a chat."""
 
@@ -35,7 +36,7 @@ class Chat(BaseModel):
     hydrated_output: str = field(metadata=field_options(alias="hydratedOutput"))
     raw_input: str = field(metadata=field_options(alias="rawInput"))
     raw_output: str = field(metadata=field_options(alias="rawOutput"))
-    status: str
+    status: str = field(metadata=interned())
 
     # Timestamps:
     created_at: datetime = field(metadata=field_options(alias="createdAt"))
@@ -55,7 +56,7 @@ class ThreadType(StrEnum):
     TRAINER = "trainer"
 
 
-@dataclass(frozen=True, kw_only=True)
+@dataclass(frozen=True, kw_only=True, slots=True)
 class Thread(BaseModel):
     """Define the schema for a thread."""
 
@@ -71,7 +72,11 @@ class Thread(BaseModel):
     type: ThreadType
 
     # Relations:
-    model_instance: ModelInstance = field(metadata=field_options(alias="modelInstance"))
+    model_instance: ModelInstance = field(
+        metadata=field_options(
+            alias="modelInstance", deserialize=deserialize_entity(ModelInstance)
+        )
+    )
 
     # Timestamps:
     created_at: datetime = field(metadata=field_options(alias="createdAt"))
@@ -0,0 +1,46 @@
+"""Define thread pagination."""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Final
+
+from liminal.errors import LiminalError
+
+DEFAULT_THREAD_PAGE_SIZE: Final[int] = 100
+DEFAULT_THREAD_MAX_PAGES: Final[int] = 10000
+DEFAULT_THREAD_PREFETCH: Final[int] = 1
+
+
+@dataclass(frozen=True, kw_only=True)
+class ThreadPaginationConfig:
+    """Define the configuration of iterating over threads page by page."""
+
+    # The maximum number of pages requested (so that a server that keeps returning full
+    # pages can't keep the iteration going forever):
+    max_pages: int = DEFAULT_THREAD_MAX_PAGES
+
+    # The number of threads requested per page:
+    page_size: int = DEFAULT_THREAD_PAGE_SIZE
+
+    # The number of pages requested ahead of the one being iterated over (so that the
+    # next page is already on its way when the current one runs out):
+    prefetch: int = DEFAULT_THREAD_PREFETCH
+
+    def __post_init__(self) -> None:
+        """Perform some post-init validation.
+
+        Raises
+        ------
+            LiminalError: If the configuration is invalid.
+
+        """
+        if self.max_pages < 1:
+            msg = f"Invalid maximum number of pages: {self.max_pages}"
+            raise LiminalError(msg)
+        if self.page_size < 1:
+            msg = f"Invalid page size: {self.page_size}"
+            raise LiminalError(msg)
+        if self.prefetch < 0:
+            msg = f"Invalid prefetch: {self.prefetch}"
+            raise LiminalError(msg)
@@ -15,3 +15,7 @@ class AuthError(RequestError):
 
 class ModelInstanceUnknownError(RequestError):
     """Define an exception related to an unknown model instance."""
+
+
+class CircuitOpenError(RequestError):
+    """Define an exception related to an open circuit breaker."""
@@ -0,0 +1,159 @@
+"""Define batch helpers."""
+
+from __future__ import annotations
+
+import asyncio
+from collections.abc import AsyncIterable, AsyncIterator, Awaitable, Callable, Iterable
+from typing import Generic, TypeVar
+
+from liminal.errors import LiminalError
+
+ItemT = TypeVar("ItemT")
+ResultT = TypeVar("ResultT")
+
+
+async def aiter_items(
+    items: Iterable[ItemT] | AsyncIterable[ItemT],
+) -> AsyncIterator[ItemT]:
+    """Iterate over a (synchronous or asynchronous) iterable asynchronously.
+
+    Args:
+    ----
+        items: The iterable.
+
+    Yields:
+    ------
+        The items of the iterable.
+
+    """
+    if isinstance(items, AsyncIterable):
+        async for item in items:
+            yield item
+    else:
+        for item in items:
+            yield item
+
+
+class _ConcurrentMap(Generic[ItemT, ResultT]):
+    """Define the state of a concurrent map."""
+
+    def __init__(
+        self,
+        func: Callable[[ItemT], Awaitable[ResultT]],
+        items: Iterable[ItemT] | AsyncIterable[ItemT],
+        concurrency: int,
+    ) -> None:
+        """Initialize.
+
+        Args:
+        ----
+            func: The function to apply.
+            items: The items to apply the function to.
+            concurrency: The maximum number of calls in flight.
+
+        """
+        self._concurrency = concurrency
+        self._func = func
+        self._iterator = aiter_items(items)
+        self._started = 0
+        self.held_back: dict[int, tuple[int, ItemT, ResultT]] = {}
+        self.in_flight: set[asyncio.Task[tuple[int, ItemT, ResultT]]] = set()
+
+    async def _call(self, index: int, item: ItemT) -> tuple[int, ItemT, ResultT]:
+        """Apply the function to an item.
+
+        Args:
+        ----
+            index: The index of the item.
+            item: The item.
+
+        Returns:
+        -------
+            A tuple of the item's index, the item, and its result.
+
+        """
+        return index, item, await self._func(item)
+
+    async def start_calls(self) -> None:
+        """Start calls for the next items (while the bounds allow)."""
+        while (
+            len(self.in_flight) < self._concurrency
+            and len(self.held_back) < self._concurrency
+        ):
+            try:
+                item = await anext(self._iterator)
+            except StopAsyncIteration:
+                return
+            self.in_flight.add(asyncio.create_task(self._call(self._started, item)))
+            self._started += 1
+
+    async def wait(self) -> set[asyncio.Task[tuple[int, ItemT, ResultT]]]:
+        """Wait for at least one call to complete.
+
+        Returns
+        -------
+            The completed calls.
+
+        """
+        done, self.in_flight = await asyncio.wait(
+            self.in_flight, return_when=asyncio.FIRST_COMPLETED
+        )
+        return done
+
+
+async def map_concurrently(
+    func: Callable[[ItemT], Awaitable[ResultT]],
+    items: Iterable[ItemT] | AsyncIterable[ItemT],
+    *,
+    concurrency: int,
+    ordered: bool = True,
+) -> AsyncIterator[tuple[int, ItemT, ResultT]]:
+    """Apply an async function to items, with a bounded number of calls in flight.
+
+    Items are consumed lazily (so the input may be arbitrarily large), and results are
+    yielded as soon as possible: in input order, or in order of completion. When results
+    are ordered, at most `concurrency` completed results are held back while an earlier
+    call is still in flight.
+
+    Args:
+    ----
+        func: The function to apply.
+        items: The items to apply the function to.
+        concurrency: The maximum number of calls in flight.
+        ordered: Whether results should be yielded in input order.
+
+    Yields:
+    ------
+        Tuples of each item's index, the item, and its result.
+
+    Raises:
+    ------
+        LiminalError: If the concurrency is invalid.
+
+    """
+    if concurrency < 1:
+        msg = f"Invalid concurrency: {concurrency}"
+        raise LiminalError(msg)
+
+    state = _ConcurrentMap(func, items, concurrency)
+    next_index = 0
+
+    try:
+        while True:
+            await state.start_calls()
+            if not state.in_flight:
+                return
+
+            for task in await state.wait():
+                result = task.result()
+                if ordered:
+                    state.held_back[result[0]] = result
+                else:
+                    yield result
+
+            while next_index in state.held_back:
+                yield state.held_back.pop(next_index)
+                next_index += 1
+    finally:
+        for task in state.in_flight:
+            task.cancel()
@@ -0,0 +1,87 @@
+"""Define decoder helpers."""
+
+from __future__ import annotations
+
+from collections.abc import Callable
+import json
+from json.decoder import JSONDecodeError
+from typing import Any, Final, TypeVar
+
+from mashumaro.codecs.json import JSONDecoder
+from mashumaro.exceptions import (
+    MissingField,
+    SuitableVariantNotFoundError,
+    UnserializableDataError,
+)
+
+DecodedT = TypeVar("DecodedT")
+
+JSONLoader = Callable[[bytes | bytearray | str], Any]
+
+# The exceptions that indicate that raw JSON could not be decoded into a type:
+DECODE_ERRORS: Final[tuple[type[Exception], ...]] = (
+    JSONDecodeError,
+    MissingField,
+    SuitableVariantNotFoundError,
+    UnserializableDataError,
+)
+
+
+def get_json_loader() -> JSONLoader:
+    """Get the fastest available function to load raw JSON.
+
+    orjson is used when it is installed (`pip install liminal-sdk-python[orjson]`);
+    otherwise, the standard library's json module is used.
+
+    Returns
+    -------
+        A function that loads raw JSON.
+
+    """
+    try:
+        import orjson  # noqa: PLC0415
+    except ImportError:
+        return json.loads
+    return orjson.loads
+
+
+JSON_LOADER: Final[JSONLoader] = get_json_loader()
+
+# Decoders are expensive to build (mashumaro compiles one per type), so each is built
+# once and reused for every response:
+_DECODERS: dict[Any, JSONDecoder[Any]] = {}
+
+
+def get_decoder(shape_type: type[DecodedT]) -> JSONDecoder[DecodedT]:
+    """Get the (cached) decoder for a type.
+
+    Args:
+    ----
+        shape_type: The type to decode into.
+
+    Returns:
+    -------
+        A JSON decoder.
+
+    """
+    if (decoder := _DECODERS.get(shape_type)) is None:
+        decoder = _DECODERS[shape_type] = JSONDecoder(
+            shape_type, pre_decoder_func=JSON_LOADER
+        )
+    return decoder
+
+
+def decode(content: bytes | bytearray | str, shape_type: type[DecodedT]) -> DecodedT:
+    """Decode raw JSON into a type (using a cached decoder).
+
+    Args:
+    ----
+        content: The raw JSON to decode.
+        shape_type: The type to decode into.
+
+    Returns:
+    -------
+        An instance of the type.
+
+    """
+    return get_decoder(shape_type).decode(content)
@@ -0,0 +1,71 @@
+"""Define encoder helpers."""
+
+from __future__ import annotations
+
+from collections.abc import Callable
+import json
+from typing import Any, Final
+
+JSONDumper = Callable[[Any], bytes]
+
+
+class RawJSON(bytes):
+    """Define a fragment of already-encoded JSON (spliced into bodies as-is)."""
+
+
+def _dump_json(value: object) -> bytes:
+    """Dump a value to compact JSON with the standard library's json module.
+
+    Args:
+    ----
+        value: The value to dump.
+
+    Returns:
+    -------
+        The raw JSON.
+
+    """
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":")).encode()
+
+
+def get_json_dumper() -> JSONDumper:
+    """Get the fastest available function to dump a value to (compact) raw JSON.
+
+    orjson is used when it is installed (`pip install liminal-sdk-python[orjson]`);
+    otherwise, the standard library's json module is used.
+
+    Returns
+    -------
+        A function that dumps raw JSON.
+
+    """
+    try:
+        import orjson  # noqa: PLC0415
+    except ImportError:
+        return _dump_json
+    return orjson.dumps
+
+
+JSON_DUMPER: Final[JSONDumper] = get_json_dumper()
+
+
+def encode_json(payload: dict[str, Any]) -> bytes:
+    """Encode a JSON object (splicing in any raw fragments among its values as-is).
+
+    Args:
+    ----
+        payload: The object to encode.
+
+    Returns:
+    -------
+        The raw JSON.
+
+    """
+    return b"{%b}" % b",".join(
+        b"%b:%b"
+        % (
+            JSON_DUMPER(key),
+            value if isinstance(value, RawJSON) else JSON_DUMPER(value),
+        )
+        for key, value in payload.items()
+    )
@@ -0,0 +1,121 @@
+"""Define identity map helpers."""
+
+from __future__ import annotations
+
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime
+from typing import Any, TypeVar
+
+from mashumaro import DataClassDictMixin
+
+EntityT = TypeVar("EntityT", bound=DataClassDictMixin)
+
+# The identity map that entities are resolved with while a response is decoded:
+_ACTIVE_IDENTITY_MAP: ContextVar[IdentityMap | None] = ContextVar(
+    "active_identity_map", default=None
+)
+
+
+class IdentityMap:
+    """Define a map that resolves identical entities to one shared instance.
+
+    An entity is identified by its type and ID, and a version of it by when it was last
+    updated. While the map is active, each version of an entity is decoded once; every
+    later occurrence of it (e.g., the model instance that many threads embed) is the
+    same (immutable) instance, and isn't decoded at all. When a newer version of an
+    entity arrives, it replaces the older one.
+    """
+
+    def __init__(self) -> None:
+        """Initialize."""
+        # The latest version (the raw timestamp of its last update) and instance of
+        # each entity:
+        self._entities: dict[tuple[type, int], tuple[str, Any]] = {}
+
+    def __len__(self) -> int:
+        """Get the number of entities in the map.
+
+        Returns
+        -------
+            The number of entities.
+
+        """
+        return len(self._entities)
+
+    @contextmanager
+    def activate(self) -> Iterator[None]:
+        """Resolve entities with this map (within the current context).
+
+        Yields
+        ------
+            Nothing.
+
+        """
+        token = _ACTIVE_IDENTITY_MAP.set(self)
+        try:
+            yield
+        finally:
+            _ACTIVE_IDENTITY_MAP.reset(token)
+
+    def clear(self) -> None:
+        """Forget every entity in the map."""
+        self._entities.clear()
+
+    def resolve(self, entity_type: type[EntityT], data: dict[str, Any]) -> EntityT:
+        """Resolve an entity to its shared instance (decoding it if it is new).
+
+        Args:
+        ----
+            entity_type: The type of the entity.
+            data: The entity's (loaded) JSON.
+
+        Returns:
+        -------
+            The shared instance of the entity.
+
+        """
+        entity_id = data.get("id")
+        updated_at = data.get("updatedAt")
+        if not isinstance(entity_id, int) or not isinstance(updated_at, str):
+            # A malformed entity isn't shared (and fails to decode as usual):
+            return entity_type.from_dict(data)
+
+        key = (entity_type, entity_id)
+        if (entry := self._entities.get(key)) is not None and entry[0] == updated_at:
+            shared: EntityT = entry[1]
+            return shared
+
+        entity = entity_type.from_dict(data)
+        # An older version (e.g., from a response that was slower to arrive) doesn't
+        # replace a newer one:
+        if entry is None or (
+            datetime.fromisoformat(updated_at) > datetime.fromisoformat(entry[0])
+        ):
+            self._entities[key] = (updated_at, entity)
+        return entity
+
+
+def deserialize_entity(
+    entity_type: type[EntityT],
+) -> Callable[[dict[str, Any]], EntityT]:
+    """Get a function that deserializes an entity with the active identity map.
+
+    Args:
+    ----
+        entity_type: The type of the entity.
+
+    Returns:
+    -------
+        A function that deserializes the entity's (loaded) JSON (which can be a field's
+        deserialize option).
+
+    """
+
+    def deserialize(data: dict[str, Any]) -> EntityT:
+        if (identity_map := _ACTIVE_IDENTITY_MAP.get()) is None:
+            return entity_type.from_dict(data)
+        return identity_map.resolve(entity_type, data)
+
+    return deserialize
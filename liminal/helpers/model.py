@@ -1,13 +1,107 @@
 """Define model helpers."""
 
-from mashumaro import DataClassDictMixin
+from __future__ import annotations
+
+from collections.abc import Collection
+from dataclasses import field, fields, make_dataclass
+import sys
+from typing import Any, get_type_hints
+
+from mashumaro import DataClassDictMixin, field_options
 from mashumaro.config import BaseConfig
 
+from liminal.errors import LiminalError
+
 
 class BaseModel(DataClassDictMixin):
     """Define a base model."""
 
+    # Models are slotted (so that large lists of them stay compact), which only works if
+    # every base class is too:
+    __slots__ = ()
+
+    # Timestamps are parsed as models are decoded, with datetime.fromisoformat (which is
+    # implemented in C). Parsing them lazily instead would need a Python descriptor on
+    # each timestamp attribute, which costs more on every access than parsing does once.
+
     class Config(BaseConfig):
         """Define the configuration."""
 
         code_generation_options = ["TO_DICT_ADD_BY_ALIAS_FLAG"]  # noqa: RUF012
+
+
+def interned(alias: str | None = None) -> dict[str, Any]:
+    """Get the options of a field whose strings are interned when it is deserialized.
+
+    Strings that repeat across many models (e.g., a model name or an entity type) are
+    then stored once, rather than once per model.
+
+    Args:
+    ----
+        alias: An optional alias of the field.
+
+    Returns:
+    -------
+        The field options.
+
+    """
+    return field_options(alias=alias, deserialize=sys.intern)
+
+
+# Projections are expensive to build (mashumaro compiles each), so each is built once:
+_PROJECTIONS: dict[tuple[type[BaseModel], frozenset[str]], type[BaseModel]] = {}
+
+
+def get_projection(
+    model_type: type[BaseModel], field_names: Collection[str]
+) -> type[BaseModel]:
+    """Get (and cache) a model that holds only some of the fields of another.
+
+    Only the projected fields are decoded (and validated), so a projection of a model
+    with large or nested fields decodes far faster than the model itself.
+
+    Args:
+    ----
+        model_type: The model to project.
+        field_names: The names of the fields to keep.
+
+    Returns:
+    -------
+        The projection (a frozen, slotted model named after the original).
+
+    Raises:
+    ------
+        LiminalError: If a field is unknown.
+
+    """
+    key = (model_type, frozenset(field_names))
+    if (projection := _PROJECTIONS.get(key)) is not None:
+        return projection
+
+    model_fields = fields(model_type)  # type: ignore[arg-type]
+    if unknown := sorted(key[1] - {model_field.name for model_field in model_fields}):
+        msg = f"Unknown fields of {model_type.__name__}: {', '.join(unknown)}"
+        raise LiminalError(msg)
+
+    hints = get_type_hints(model_type)
+    projection = _PROJECTIONS[key] = make_dataclass(
+        f"{model_type.__name__}Projection",
+        [
+            (
+                model_field.name,
+                hints[model_field.name],
+                field(
+                    default=model_field.default,
+                    default_factory=model_field.default_factory,
+                    metadata=model_field.metadata,
+                ),
+            )
+            for model_field in model_fields
+            if model_field.name in key[1]
+        ],
+        bases=(BaseModel,),
+        frozen=True,
+        kw_only=True,
+        slots=True,
+    )
+    return projection
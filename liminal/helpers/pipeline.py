@@ -0,0 +1,290 @@
+"""Define pipeline helpers."""
+
+from __future__ import annotations
+
+import asyncio
+from collections.abc import AsyncIterable, AsyncIterator, Awaitable, Callable, Iterable
+from dataclasses import dataclass
+import time
+from typing import Final, Generic, TypeVar, cast
+
+from liminal.errors import LiminalError
+from liminal.helpers.batch import aiter_items
+
+ItemT = TypeVar("ItemT")
+
+# The marker that follows the last item through the pipeline:
+_END: Final = object()
+
+
+@dataclass(frozen=True, kw_only=True)
+class Stage(Generic[ItemT]):
+    """Define a stage of a pipeline."""
+
+    # The name of the stage (used in its statistics):
+    name: str
+
+    # The function that processes an item (returning the processed item):
+    func: Callable[[ItemT], Awaitable[ItemT]]
+
+    # The maximum number of items the stage processes at once:
+    concurrency: int
+
+
+@dataclass(frozen=True, kw_only=True)
+class StageStats:
+    """Define a snapshot of a pipeline stage."""
+
+    name: str
+
+    # The number of items the stage has processed (and is processing):
+    completed: int
+    in_flight: int
+
+    # The number of items waiting for the stage:
+    queued: int
+
+    # How long (in seconds) the stage took to process an item, on average and at most:
+    average_latency: float
+    max_latency: float
+
+    # The number of items the stage processed per second (from the moment it started
+    # processing its first item until it completed its last one, or until now):
+    throughput: float
+
+
+class _StageRunner(Generic[ItemT]):
+    """Define the state of a running pipeline stage."""
+
+    def __init__(self, stage: Stage[ItemT], queue_size: int) -> None:
+        """Initialize.
+
+        Args:
+        ----
+            stage: The stage.
+            queue_size: The maximum number of items waiting for the stage.
+
+        """
+        self._completed = 0
+        self._finished_at = 0.0
+        self._in_flight = 0
+        self._max_latency = 0.0
+        self._started_at: float | None = None
+        self._total_latency = 0.0
+        self._workers = stage.concurrency
+        self.queue: asyncio.Queue[object] = asyncio.Queue(queue_size)
+        self.stage = stage
+
+    async def _process(self, item: ItemT) -> ItemT:
+        """Process an item (recording the stage's statistics).
+
+        Args:
+        ----
+            item: The item.
+
+        Returns:
+        -------
+            The processed item.
+
+        """
+        start = time.monotonic()
+        if self._started_at is None:
+            self._started_at = start
+        self._in_flight += 1
+
+        try:
+            return await self.stage.func(item)
+        finally:
+            self._in_flight -= 1
+            self._finished_at = time.monotonic()
+            latency = self._finished_at - start
+            self._completed += 1
+            self._max_latency = max(self._max_latency, latency)
+            self._total_latency += latency
+
+    async def work(
+        self, output: asyncio.Queue[object], skip: Callable[[ItemT], bool]
+    ) -> None:
+        """Process items until the last one has gone through the stage.
+
+        Args:
+        ----
+            output: The queue of items waiting for the next stage.
+            skip: The function that determines which items bypass the stage.
+
+        """
+        while (item := await self.queue.get()) is not _END:
+            if not skip(cast(ItemT, item)):
+                item = await self._process(cast(ItemT, item))
+            await output.put(item)
+
+        # Let the stage's other workers see the end (and the next stage, once every
+        # worker has stopped):
+        self._workers -= 1
+        await (self.queue if self._workers else output).put(_END)
+
+    def get_stats(self) -> StageStats:
+        """Get a snapshot of the stage.
+
+        Returns
+        -------
+            A StageStats object.
+
+        """
+        elapsed = 0.0
+        if self._started_at is not None:
+            end = time.monotonic() if self._in_flight else self._finished_at
+            elapsed = end - self._started_at
+
+        return StageStats(
+            name=self.stage.name,
+            completed=self._completed,
+            in_flight=self._in_flight,
+            queued=self.queue.qsize(),
+            average_latency=(
+                self._total_latency / self._completed if self._completed else 0.0
+            ),
+            max_latency=self._max_latency,
+            throughput=self._completed / elapsed if elapsed else 0.0,
+        )
+
+
+class Pipeline(Generic[ItemT]):
+    """Define an asynchronous, streaming pipeline of stages.
+
+    Every stage runs its own workers (as many as its concurrency), which take items
+    from a bounded queue and put the processed items on the next stage's queue. When a
+    stage falls behind, the queues in front of it fill up and the stages before it
+    wait (rather than piling up items in memory).
+    """
+
+    def __init__(
+        self,
+        stages: Iterable[Stage[ItemT]],
+        *,
+        queue_size: int,
+        skip: Callable[[ItemT], bool] | None = None,
+    ) -> None:
+        """Initialize.
+
+        Args:
+        ----
+            stages: The stages (in order).
+            queue_size: The maximum number of items waiting for each stage.
+            skip: An optional function that determines which items bypass the
+                remaining stages (e.g., the items that have failed).
+
+        Raises:
+        ------
+            LiminalError: If the pipeline is invalid.
+
+        """
+        self._queue_size = queue_size
+        self._runners: list[_StageRunner[ItemT]] = []
+        self._skip = skip or (lambda _: False)
+        self._stages = list(stages)
+
+        if not self._stages:
+            msg = "A pipeline needs at least one stage"
+            raise LiminalError(msg)
+        if queue_size < 1:
+            msg = f"Invalid queue size: {queue_size}"
+            raise LiminalError(msg)
+        for stage in self._stages:
+            if stage.concurrency < 1:
+                msg = f"Invalid {stage.name} concurrency: {stage.concurrency}"
+                raise LiminalError(msg)
+
+    async def _feed(self, items: Iterable[ItemT] | AsyncIterable[ItemT]) -> None:
+        """Feed items into the first stage.
+
+        Args:
+        ----
+            items: The items.
+
+        """
+        queue = self._runners[0].queue
+        async for item in aiter_items(items):
+            await queue.put(item)
+        await queue.put(_END)
+
+    async def run(
+        self, items: Iterable[ItemT] | AsyncIterable[ItemT]
+    ) -> AsyncIterator[ItemT]:
+        """Run items through the pipeline.
+
+        Items are consumed lazily and yielded as soon as they have gone through every
+        stage (so, not necessarily in input order). Statistics cover the most recent
+        run.
+
+        Args:
+        ----
+            items: The items.
+
+        Yields:
+        ------
+            The processed items.
+
+        """
+        self._runners = [
+            _StageRunner(stage, self._queue_size) for stage in self._stages
+        ]
+        output: asyncio.Queue[object] = asyncio.Queue(self._queue_size)
+        outputs = [runner.queue for runner in self._runners[1:]] + [output]
+
+        tasks = {asyncio.create_task(self._feed(items))}
+        for runner, runner_output in zip(self._runners, outputs, strict=True):
+            tasks.update(
+                asyncio.create_task(runner.work(runner_output, self._skip))
+                for _ in range(runner.stage.concurrency)
+            )
+
+        try:
+            while (item := await get_or_raise(output, tasks)) is not _END:
+                yield cast(ItemT, item)
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    def get_stats(self) -> list[StageStats]:
+        """Get a snapshot of every stage (in order).
+
+        Returns
+        -------
+            A list of StageStats objects.
+
+        """
+        return [runner.get_stats() for runner in self._runners]
+
+
+async def get_or_raise(
+    queue: asyncio.Queue[object], tasks: set[asyncio.Task[None]]
+) -> object:
+    """Get an item from a queue (unless a task fails while waiting for one).
+
+    Args:
+    ----
+        queue: The queue.
+        tasks: The tasks that fill the queue.
+
+    Returns:
+    -------
+        The item.
+
+    """
+    if not queue.empty():
+        return queue.get_nowait()
+
+    get = asyncio.create_task(queue.get())
+    try:
+        while not get.done():
+            done, _ = await asyncio.wait(
+                {get, *tasks}, return_when=asyncio.FIRST_COMPLETED
+            )
+            for task in done - {get}:
+                tasks.discard(task)
+                # Raise the task's exception (if it failed):
+                task.result()
+    finally:
+        get.cancel()
+    return get.result()
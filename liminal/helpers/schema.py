@@ -1,5 +1,10 @@
 """Define schema helpers."""
 
+from __future__ import annotations
+
+from dataclasses import make_dataclass
+from types import GenericAlias
+
 from mashumaro import DataClassDictMixin
 from mashumaro.config import BaseConfig
 
@@ -11,3 +16,30 @@ class BaseResponseSchema(DataClassDictMixin):
         """Define the configuration."""
 
         code_generation_options = ["TO_DICT_ADD_BY_ALIAS_FLAG"]  # noqa: RUF012
+
+
+# Schemas are expensive to build (mashumaro compiles each), so each is built once:
+_LIST_SCHEMAS: dict[type, type[BaseResponseSchema]] = {}
+
+
+def get_list_schema(item_type: type) -> type[BaseResponseSchema]:
+    """Get (and cache) a response schema whose data is a list of a type.
+
+    Args:
+    ----
+        item_type: The type of the items in the list (e.g., a projection).
+
+    Returns:
+    -------
+        The response schema.
+
+    """
+    if (schema := _LIST_SCHEMAS.get(item_type)) is None:
+        schema = _LIST_SCHEMAS[item_type] = make_dataclass(
+            f"{item_type.__name__}ListResponse",
+            [("data", GenericAlias(list, (item_type,)))],
+            bases=(BaseResponseSchema,),
+            frozen=True,
+            kw_only=True,
+        )
+    return schema
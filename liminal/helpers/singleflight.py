@@ -0,0 +1,64 @@
+"""Define single-flight helpers."""
+
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Awaitable, Callable, Hashable
+from typing import Any, TypeVar
+
+ResultT = TypeVar("ResultT")
+
+
+class SingleFlight:
+    """Define a group of calls in which identical concurrent calls are made once.
+
+    Callers that ask for a call while an identical one (i.e., one with the same key) is
+    in flight share its outcome (the same result object, or the same exception) rather
+    than making their own. Once a call completes, the next identical call is made anew.
+    """
+
+    def __init__(self) -> None:
+        """Initialize."""
+        self._calls: dict[Hashable, asyncio.Task[Any]] = {}
+
+    @property
+    def in_flight(self) -> int:
+        """Return the number of calls in flight.
+
+        Returns
+        -------
+            The number of calls in flight.
+
+        """
+        return len(self._calls)
+
+    async def run(
+        self, key: Hashable, func: Callable[[], Awaitable[ResultT]]
+    ) -> ResultT:
+        """Make a call (or share the outcome of an identical one that is in flight).
+
+        The call itself is never cancelled on behalf of a single caller, since other
+        callers may be sharing it.
+
+        Args:
+        ----
+            key: The key that identifies identical calls.
+            func: The function that makes the call.
+
+        Returns:
+        -------
+            The result of the call.
+
+        """
+        if (task := self._calls.get(key)) is None:
+
+            async def call() -> ResultT:
+                try:
+                    return await func()
+                finally:
+                    del self._calls[key]
+
+            task = self._calls[key] = asyncio.create_task(call())
+
+        result: ResultT = await asyncio.shield(task)
+        return result
@@ -0,0 +1,466 @@
+"""Define stream helpers."""
+
+from __future__ import annotations
+
+import codecs
+from collections.abc import AsyncIterable, AsyncIterator
+import json
+from json.decoder import JSONDecodeError
+import re
+from typing import Any, Final
+
+# Only braces, strings (which are skipped whole, and whose closing quote is captured so
+# that unterminated strings can be detected), and newlines (which may be followed by an
+# SSE "data:" continuation) affect framing:
+_TOKEN_PATTERN: Final[re.Pattern[bytes]] = re.compile(
+    rb'"[^"\\]*(?:\\.[^"\\]*)*("?)|[{}\n]', re.DOTALL
+)
+_NON_WHITESPACE_PATTERN: Final[re.Pattern[bytes]] = re.compile(rb"[^ \t\r\n]")
+
+# Before the array, only strings (for the same reasons as above, and to find the array's
+# key) and brackets matter; within it, items are separated by whitespace and commas:
+_ARRAY_TOKEN_PATTERN: Final[re.Pattern[str]] = re.compile(
+    r'"[^"\\]*(?:\\.[^"\\]*)*("?)|[{}\[\]]', re.DOTALL
+)
+_ITEM_START_PATTERN: Final[re.Pattern[str]] = re.compile(r"[^ \t\r\n,]")
+
+# An item that is only followed by these characters may be a number that continues in
+# the next chunk (e.g., "1." is decoded as 1, with the fraction yet to come):
+_NUMBER_CONTINUATION_PATTERN: Final[re.Pattern[str]] = re.compile(r"[\d.eE+-]*")
+
+# Each item is decoded by the (C) scanner of the standard library, which (unlike orjson)
+# can decode a value that is followed by more data:
+_ITEM_DECODER: Final[json.JSONDecoder] = json.JSONDecoder()
+
+_CLOSE_BRACE: Final[int] = ord("}")
+_NEWLINE: Final[int] = ord("\n")
+_OPEN_BRACE: Final[int] = ord("{")
+_QUOTE: Final[int] = ord('"')
+_SPACE: Final[int] = ord(" ")
+
+# The size of a pending object beyond which it is always scanned incrementally (rather
+# than waiting for it to be matched as a whole line):
+MAX_PENDING_LINE_SIZE: Final[int] = 65536
+
+SSE_DATA_PREFIX: Final[bytes] = b"data:"
+SSE_DONE_SENTINEL: Final[bytes] = b"[DONE]"
+SSE_IGNORED_FIELDS: Final[tuple[bytes, ...]] = (b":", b"event:", b"id:", b"retry:")
+
+
+class JSONStreamParser:
+    """Define an incremental parser for a byte stream of JSON objects.
+
+    The parser accepts newline-delimited JSON, concatenated JSON objects, and
+    Server-Sent Events (where objects are framed by "data:" fields). Objects may be
+    split across any number of chunks; only complete objects are ever returned.
+    """
+
+    def __init__(self) -> None:
+        """Initialize."""
+        self._buffer = bytearray()
+        self._depth = 0
+        # The position in the buffer up to which bytes have been scanned:
+        self._position = 0
+        # The position in the buffer at which the current object starts (if any):
+        self._start = -1
+
+    def _consume_line(self) -> bytes | None:
+        """Consume a non-object line from the buffer.
+
+        Returns
+        -------
+            The line if it is not SSE framing, an empty string if it is, or None if the
+            line is not complete yet.
+
+        """
+        if (newline := self._buffer.find(_NEWLINE, self._position)) < 0:
+            return None
+
+        line = bytes(self._buffer[self._position : newline]).rstrip()
+
+        if line.startswith(SSE_DATA_PREFIX):
+            # Parse the field's value as if it were on a line by itself:
+            self._position += len(SSE_DATA_PREFIX)
+            if self._buffer[self._position] == _SPACE:
+                self._position += 1
+            return b""
+
+        self._position = newline + 1
+        if line == SSE_DONE_SENTINEL or line.startswith(SSE_IGNORED_FIELDS):
+            return b""
+        return line
+
+    def _consume_sse_continuation(self, newline: int) -> bool:
+        """Remove an SSE "data:" prefix that continues an object on a new line.
+
+        Args:
+        ----
+            newline: The position of the newline within the current object.
+
+        Returns:
+        -------
+            False if more data is needed to decide, True otherwise.
+
+        """
+        following = self._buffer[newline + 1 : newline + 1 + len(SSE_DATA_PREFIX)]
+        if len(following) < len(SSE_DATA_PREFIX):
+            return not SSE_DATA_PREFIX.startswith(following)
+
+        if following == SSE_DATA_PREFIX:
+            end = newline + 1 + len(SSE_DATA_PREFIX)
+            if end < len(self._buffer) and self._buffer[end] == _SPACE:
+                end += 1
+            del self._buffer[newline + 1 : end]
+        return True
+
+    def _scan_object(self) -> bytes | None:
+        """Scan the current object.
+
+        Returns
+        -------
+            The object if it is complete, None otherwise.
+
+        """
+        buffer = self._buffer
+
+        while True:
+            if (match := _TOKEN_PATTERN.search(buffer, self._position)) is None:
+                self._position = len(buffer)
+                return None
+
+            index = match.start()
+            char = buffer[index]
+
+            if char == _QUOTE:
+                if not match.group(1):
+                    # Wait for the rest of the string to arrive:
+                    self._position = index
+                    return None
+                self._position = match.end()
+                continue
+
+            if char == _OPEN_BRACE:
+                self._depth += 1
+            elif char == _CLOSE_BRACE:
+                self._depth -= 1
+                if self._depth == 0:
+                    obj = bytes(buffer[self._start : index + 1])
+                    self._position = index + 1
+                    self._start = -1
+                    return obj
+            elif not self._consume_sse_continuation(index):
+                self._position = index
+                return None
+
+            self._position = index + 1
+
+    def close(self) -> list[bytes]:
+        """Signal the end of the stream.
+
+        Returns
+        -------
+            Any objects (or unframed lines) that were waiting on a trailing newline.
+
+        """
+        if self._start < 0:
+            return self.feed(b"\n")
+        return []
+
+    def _frame_lines(self, frames: list[bytes]) -> None:
+        """Frame complete lines that contain flat objects (or SSE framing) in bulk.
+
+        The vast majority of streamed objects are flat and on a line by themselves, so
+        they can be framed without scanning them token by token; framing stops at the
+        first line that needs a closer look.
+
+        Args:
+        ----
+            frames: The list to add framed objects to.
+
+        """
+        buffer = self._buffer
+        if self._start >= 0 or (end := buffer.rfind(_NEWLINE)) < self._position:
+            return
+
+        position = self._position
+        for raw_line in buffer[position:end].split(b"\n"):
+            line = raw_line.strip()
+            if line.startswith(SSE_DATA_PREFIX):
+                line = line[len(SSE_DATA_PREFIX) :].lstrip()
+
+            if (
+                line
+                and line[0] == _OPEN_BRACE
+                and line[-1] == _CLOSE_BRACE
+                and line.count(b"{") == 1
+                and line.count(b"}") == 1
+            ):
+                frames.append(bytes(line))
+            elif (
+                line
+                and line != SSE_DONE_SENTINEL
+                and not line.startswith(SSE_IGNORED_FIELDS)
+            ):
+                break
+
+            position += len(raw_line) + 1
+
+        self._position = position
+
+    def _next_frame(self) -> bytes | None:
+        """Get the next frame from the buffer.
+
+        Returns
+        -------
+            A complete JSON object (or a line that is neither a JSON object nor SSE
+            framing), an empty string if only SSE framing was consumed, or None if more
+            data is needed.
+
+        """
+        buffer = self._buffer
+
+        if self._start < 0:
+            if (
+                match := _NON_WHITESPACE_PATTERN.search(buffer, self._position)
+            ) is None:
+                self._position = len(buffer)
+                return None
+
+            self._position = position = match.start()
+            if buffer[position] != _OPEN_BRACE:
+                return self._consume_line()
+
+            if (
+                len(buffer) - position < MAX_PENDING_LINE_SIZE
+                and buffer.find(_NEWLINE, position) < 0
+                and buffer.find(_CLOSE_BRACE, position) < 0
+            ):
+                # The object cannot be complete yet (and once its line is, it can be
+                # framed as a whole):
+                return None
+
+            self._start = position
+
+        return self._scan_object()
+
+    def feed(self, chunk: bytes) -> list[bytes]:
+        """Feed a chunk of the stream to the parser.
+
+        Args:
+        ----
+            chunk: The chunk to feed.
+
+        Returns:
+        -------
+            A list of complete JSON objects (and any lines that are neither JSON objects
+            nor SSE framing), as raw bytes.
+
+        """
+        self._buffer += chunk
+        frames: list[bytes] = []
+
+        self._frame_lines(frames)
+        while (frame := self._next_frame()) is not None:
+            if frame:
+                frames.append(frame)
+
+        # Drop everything that has been fully consumed:
+        consumed = self._start if self._start >= 0 else self._position
+        if consumed:
+            del self._buffer[:consumed]
+            self._position -= consumed
+            self._start = min(self._start, 0)
+
+        return frames
+
+    async def iter_frames(self, chunks: AsyncIterable[bytes]) -> AsyncIterator[bytes]:
+        """Parse an entire stream.
+
+        Args:
+        ----
+            chunks: The chunks of the stream.
+
+        Yields:
+        ------
+            Complete JSON objects (and any lines that are neither JSON objects nor SSE
+            framing), as raw bytes.
+
+        """
+        async for chunk in chunks:
+            for frame in self.feed(chunk):
+                yield frame
+        for frame in self.close():
+            yield frame
+
+    @property
+    def remainder(self) -> bytes:
+        """Return any data that has not formed a complete object.
+
+        Returns
+        -------
+            The unconsumed data.
+
+        """
+        return bytes(self._buffer).strip()
+
+
+class JSONArrayStreamParser:
+    """Define an incremental decoder of the items of an array in a JSON byte stream.
+
+    The array is the value of a key of the top-level object (e.g., the "data" of a
+    response). Each item is decoded as soon as it is complete, so a long array never
+    has to be buffered (or loaded) whole.
+    """
+
+    def __init__(self, key: str) -> None:
+        """Initialize.
+
+        Args:
+        ----
+            key: The key of the array in the top-level object.
+
+        """
+        self._decoder = codecs.getincrementaldecoder("utf-8")()
+        self._depth = 0
+        self._done = False
+        self._in_array = False
+        # The (encoded) key, and whether the last token was that key:
+        self._key = json.dumps(key)
+        self._key_seen = False
+        # The position in the text up to which it has been consumed:
+        self._position = 0
+        # The length that the text has to reach before the next item is decoded:
+        self._retry_length = 0
+        self._text = ""
+
+    def _decode_items(self, items: list[Any], *, final: bool = False) -> bool:
+        """Decode the complete items of the array.
+
+        Args:
+        ----
+            items: The list to add decoded items to.
+            final: Whether the stream has ended (so that the text is complete).
+
+        Returns:
+        -------
+            Whether the array has ended.
+
+        Raises:
+        ------
+            JSONDecodeError: If the stream has ended with an invalid item.
+
+        """
+        text = self._text
+
+        while final or len(text) >= self._retry_length:
+            if (match := _ITEM_START_PATTERN.search(text, self._position)) is None:
+                self._position = len(text)
+                return False
+            position = self._position = match.start()
+            if text[position] == "]":
+                return True
+
+            try:
+                item, end = _ITEM_DECODER.raw_decode(text, position)
+            except JSONDecodeError:
+                if final:
+                    raise
+                # The item is incomplete; it is retried once as much of it again has
+                # arrived (so that a long item isn't decoded over and over again):
+                self._retry_length = 2 * len(text) - position
+                return False
+            if not final and _NUMBER_CONTINUATION_PATTERN.fullmatch(text, end):
+                # A number may continue in the next chunk:
+                self._retry_length = len(text) + 1
+                return False
+
+            items.append(item)
+            self._position = end
+
+        return False
+
+    def _find_array(self) -> bool:
+        """Find the start of the array.
+
+        Returns
+        -------
+            Whether the array has started.
+
+        """
+        text = self._text
+
+        while (match := _ARRAY_TOKEN_PATTERN.search(text, self._position)) is not None:
+            lexeme = match.group()
+            if lexeme[0] == '"':
+                if not match.group(1):
+                    # Wait for the rest of the string to arrive:
+                    self._position = match.start()
+                    return False
+                self._key_seen = self._depth == 1 and lexeme == self._key
+                self._position = match.end()
+                continue
+
+            self._position = match.end()
+            if self._key_seen and lexeme == "[":
+                return True
+            self._depth += 1 if lexeme in "{[" else -1
+            self._key_seen = False
+
+        self._position = len(text)
+        return False
+
+    def close(self) -> list[Any]:
+        """Signal the end of the stream.
+
+        Returns
+        -------
+            A list of the remaining items of the array.
+
+        Raises
+        ------
+            JSONDecodeError: If the array is missing, invalid, or incomplete.
+
+        """
+        items: list[Any] = []
+        if self._done:
+            return items
+
+        self._text += self._decoder.decode(b"", final=True)
+        if self._in_array:
+            self._done = self._decode_items(items, final=True)
+        if not self._done:
+            msg = f"Expecting the end of the array of {self._key}"
+            raise JSONDecodeError(msg, self._text, len(self._text))
+        return items
+
+    def feed(self, chunk: bytes) -> list[Any]:
+        """Feed a chunk of the stream to the parser.
+
+        Args:
+        ----
+            chunk: The chunk to feed.
+
+        Returns:
+        -------
+            A list of the (decoded) items of the array that the chunk completes.
+
+        """
+        items: list[Any] = []
+        if self._done:
+            return items
+
+        self._text += self._decoder.decode(chunk)
+        if not self._in_array:
+            self._in_array = self._find_array()
+        if self._in_array:
+            self._done = self._decode_items(items)
+
+        # Drop everything that has been consumed:
+        if self._done:
+            self._text = ""
+        elif self._position:
+            self._text = self._text[self._position :]
+            self._retry_length -= self._position
+            self._position = 0
+
+        return items
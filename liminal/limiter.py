@@ -0,0 +1,282 @@
+"""Define concurrency limiter helpers."""
+
+from __future__ import annotations
+
+import asyncio
+from collections import deque
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from http import HTTPStatus
+import time
+from typing import Final
+
+from httpx import TimeoutException
+
+from liminal.circuit_breaker import get_endpoint_key
+from liminal.errors import LiminalError
+from liminal.transport import Call
+
+DEFAULT_BACKOFF_RATIO: Final[float] = 0.9
+DEFAULT_INITIAL_LIMIT: Final[int] = 20
+DEFAULT_LATENCY_TOLERANCE: Final[float] = 2.0
+DEFAULT_MAX_LIMIT: Final[int] = 200
+DEFAULT_MIN_LIMIT: Final[int] = 1
+
+# How quickly the latency baseline of an endpoint follows its recent latencies:
+LATENCY_SMOOTHING: Final[float] = 0.1
+
+# The responses that indicate that the server is overloaded:
+OVERLOAD_STATUSES: Final[frozenset[int]] = frozenset(
+    {HTTPStatus.TOO_MANY_REQUESTS, HTTPStatus.SERVICE_UNAVAILABLE}
+)
+
+
+@dataclass(frozen=True, kw_only=True)
+class ConcurrencyLimitConfig:
+    """Define the configuration of the client's adaptive concurrency limit.
+
+    The limit grows additively (by one for every limit's worth of successful requests)
+    and shrinks multiplicatively whenever the server signals that it is overloaded:
+    a 429 or 503 response, a timeout, or a latency spike (relative to the typical
+    latency of the same endpoint). It shrinks at most once per window, i.e., the
+    requests that were already in flight when it last shrank don't shrink it again.
+    """
+
+    # The limit that is used until the server's capacity has been learned:
+    initial_limit: int = DEFAULT_INITIAL_LIMIT
+
+    # The bounds of the limit:
+    min_limit: int = DEFAULT_MIN_LIMIT
+    max_limit: int = DEFAULT_MAX_LIMIT
+
+    # The factor by which the limit shrinks when the server is overloaded:
+    backoff_ratio: float = DEFAULT_BACKOFF_RATIO
+
+    # Responses that take longer than this multiple of the typical latency are latency
+    # spikes:
+    latency_tolerance: float = DEFAULT_LATENCY_TOLERANCE
+
+    def __post_init__(self) -> None:
+        """Perform some post-init validation.
+
+        Raises
+        ------
+            LiminalError: If the configuration is invalid.
+
+        """
+        if not 1 <= self.min_limit <= self.initial_limit <= self.max_limit:
+            msg = (
+                "Invalid concurrency limits: expected 1 <= min_limit "
+                f"({self.min_limit}) <= initial_limit ({self.initial_limit}) <= "
+                f"max_limit ({self.max_limit})"
+            )
+            raise LiminalError(msg)
+        if not 0.0 < self.backoff_ratio < 1.0:
+            msg = f"Invalid backoff ratio: {self.backoff_ratio}"
+            raise LiminalError(msg)
+
+
+@dataclass(frozen=True, kw_only=True)
+class ConcurrencyStats:
+    """Define a snapshot of the client's adaptive concurrency limit."""
+
+    # The current limit (and the number of requests that count against it):
+    limit: int
+    in_flight_requests: int
+
+    # The number of requests waiting for the limit to allow them:
+    queued_requests: int
+
+    # How long (in seconds) requests have waited, on average and at most:
+    average_queue_wait: float
+    max_queue_wait: float
+
+
+class AdaptiveLimiter:
+    """Define a concurrency limiter that adapts to the server's capacity (AIMD)."""
+
+    def __init__(self, config: ConcurrencyLimitConfig | None = None) -> None:
+        """Initialize.
+
+        Args:
+        ----
+            config: An optional concurrency limit configuration.
+
+        """
+        self._acquisitions = 0
+        self._config = config or ConcurrencyLimitConfig()
+        self._in_flight = 0
+        self._latency_baselines: dict[str, float] = {}
+        self._limit = float(self._config.initial_limit)
+        self._max_queue_wait = 0.0
+        self._total_queue_wait = 0.0
+        self._waiters: deque[asyncio.Future[None]] = deque()
+        # The number of times the limit has shrunk (which numbers the windows that
+        # requests start in):
+        self._window = 0
+
+    @property
+    def limit(self) -> int:
+        """Return the current limit.
+
+        Returns
+        -------
+            The current limit.
+
+        """
+        return int(self._limit)
+
+    def _decrease(self, window: int) -> None:
+        """Shrink the limit (multiplicatively), at most once per window.
+
+        Args:
+        ----
+            window: The window in which the request that signaled overload started.
+
+        """
+        # Requests that started before the limit last shrank were sent under the old
+        # limit, so a burst of them only shrinks it once:
+        if window != self._window:
+            return
+        self._window += 1
+        self._limit = max(
+            float(self._config.min_limit), self._limit * self._config.backoff_ratio
+        )
+
+    def _increase(self) -> None:
+        """Grow the limit (additively) and let waiting requests in."""
+        self._limit = min(float(self._config.max_limit), self._limit + 1 / self._limit)
+        self._wake_waiters()
+
+    def _record_success(
+        self, endpoint: str, latency: float | None, window: int
+    ) -> None:
+        """Adapt the limit to a successful response.
+
+        Args:
+        ----
+            endpoint: The endpoint that was requested.
+            latency: The latency (in seconds) of the response (if it is checked).
+            window: The window in which the request started.
+
+        """
+        if latency is None:
+            self._increase()
+            return
+
+        # Each endpoint has its own baseline (since some are inherently slower than
+        # others), which follows every latency, so that a sustained shift becomes the
+        # new normal rather than shrinking the limit for good:
+        key = get_endpoint_key(endpoint)
+        baseline = self._latency_baselines.get(key)
+        self._latency_baselines[key] = (
+            latency
+            if baseline is None
+            else baseline + LATENCY_SMOOTHING * (latency - baseline)
+        )
+
+        if baseline is not None and latency > baseline * self._config.latency_tolerance:
+            self._decrease(window)
+        else:
+            self._increase()
+
+    def _release(self) -> None:
+        """Release a request's place (and let waiting requests in)."""
+        self._in_flight -= 1
+        self._wake_waiters()
+
+    def _wake_waiters(self) -> None:
+        """Let waiting requests in (in order) while the limit allows."""
+        while self._waiters and self._in_flight < self.limit:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                self._in_flight += 1
+                waiter.set_result(None)
+
+    async def _acquire(self) -> None:
+        """Wait for the limit to allow a request.
+
+        Raises
+        ------
+            CancelledError: If the request is cancelled while waiting.
+
+        """
+        start = time.monotonic()
+
+        if self._waiters or self._in_flight >= self.limit:
+            waiter = asyncio.get_running_loop().create_future()
+            self._waiters.append(waiter)
+            try:
+                await waiter
+            except asyncio.CancelledError:
+                if not waiter.cancelled():
+                    # The request was let in just as it was cancelled:
+                    self._release()
+                elif waiter in self._waiters:
+                    self._waiters.remove(waiter)
+                raise
+        else:
+            self._in_flight += 1
+
+        wait = time.monotonic() - start
+        self._acquisitions += 1
+        self._max_queue_wait = max(self._max_queue_wait, wait)
+        self._total_queue_wait += wait
+
+    @asynccontextmanager
+    async def acquire(
+        self, call: Call, endpoint: str, *, check_latency: bool = True
+    ) -> AsyncIterator[None]:
+        """Hold a place for a request (waiting until the limit allows it).
+
+        Args:
+        ----
+            call: The request, whose outcome adapts the limit.
+            endpoint: The endpoint that is requested.
+            check_latency: Whether the request's latency adapts the limit.
+
+        Yields:
+        ------
+            Nothing; the request may proceed while the context is held.
+
+        """
+        await self._acquire()
+        timed_out = False
+        window = self._window
+
+        try:
+            yield
+        except TimeoutException:
+            timed_out = True
+            raise
+        finally:
+            self._release()
+            if timed_out or call.status_code in OVERLOAD_STATUSES:
+                self._decrease(window)
+            elif call.status_code is not None:
+                self._record_success(
+                    endpoint,
+                    time.monotonic() - call.started_at if check_latency else None,
+                    window,
+                )
+
+    def get_stats(self) -> ConcurrencyStats:
+        """Get a snapshot of the limiter.
+
+        Returns
+        -------
+            A ConcurrencyStats object.
+
+        """
+        return ConcurrencyStats(
+            limit=self.limit,
+            in_flight_requests=self._in_flight,
+            queued_requests=sum(1 for waiter in self._waiters if not waiter.done()),
+            average_queue_wait=(
+                self._total_queue_wait / self._acquisitions
+                if self._acquisitions
+                else 0.0
+            ),
+            max_queue_wait=self._max_queue_wait,
+        )
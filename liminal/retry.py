@@ -0,0 +1,288 @@
+"""Define retry helpers."""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from datetime import UTC, datetime
+from email.utils import parsedate_to_datetime
+import random
+from typing import Final
+
+from httpx import ConnectError, ConnectTimeout, PoolTimeout, Response, TransportError
+
+from liminal.errors import LiminalError
+
+DEFAULT_BACKOFF_BASE: Final[float] = 0.1
+DEFAULT_BACKOFF_MAX: Final[float] = 5.0
+DEFAULT_BUDGET_RATIO: Final[float] = 0.1
+DEFAULT_BUDGET_RESERVE: Final[int] = 10
+DEFAULT_MAX_ATTEMPTS: Final[int] = 3
+DEFAULT_MAX_RETRY_AFTER: Final[float] = 30.0
+
+# The responses that indicate a transient failure:
+DEFAULT_RETRY_STATUSES: Final[frozenset[int]] = frozenset({429, 502, 503, 504})
+
+# Requests with these methods can safely be sent more than once:
+IDEMPOTENT_METHODS: Final[frozenset[str]] = frozenset(
+    {"DELETE", "GET", "HEAD", "OPTIONS", "PUT"}
+)
+
+# These endpoints are POSTed to, but only inspect the request body, so they can safely
+# be sent more than once. (Cleanse and hydrate requests can be too, but only for an
+# existing thread, since each request without one creates a thread, so they declare
+# whether they are idempotent per request.)
+IDEMPOTENT_ENDPOINTS: Final[frozenset[str]] = frozenset({"/api/v1/prompts/analyze"})
+
+# These errors (and statuses) guarantee that the server did not process the request,
+# so any request can be retried after them:
+UNSENT_REQUEST_ERRORS: Final[tuple[type[TransportError], ...]] = (
+    ConnectError,
+    ConnectTimeout,
+    PoolTimeout,
+)
+UNPROCESSED_REQUEST_STATUSES: Final[frozenset[int]] = frozenset({429})
+
+
+@dataclass(frozen=True, kw_only=True)
+class RetryPolicy:
+    """Define when (and how often) failed requests are retried.
+
+    Streamed requests are never retried, as part of the response may already have been
+    consumed.
+    """
+
+    # The maximum number of times a request is sent (1 disables retries):
+    max_attempts: int = DEFAULT_MAX_ATTEMPTS
+
+    # The exponential backoff (in seconds) between attempts; each delay is drawn at
+    # random from zero up to the backoff ("full jitter"):
+    backoff_base: float = DEFAULT_BACKOFF_BASE
+    backoff_max: float = DEFAULT_BACKOFF_MAX
+
+    # The response statuses that are retried:
+    retry_statuses: frozenset[int] = DEFAULT_RETRY_STATUSES
+
+    # The methods (and endpoints) whose requests can safely be sent more than once:
+    idempotent_methods: frozenset[str] = IDEMPOTENT_METHODS
+    idempotent_endpoints: frozenset[str] = IDEMPOTENT_ENDPOINTS
+
+    # The longest Retry-After header (in seconds) that is honored; responses that ask
+    # for a longer wait are not retried:
+    max_retry_after: float = DEFAULT_MAX_RETRY_AFTER
+
+    # The budget that bounds retries across all requests: every request earns a
+    # fraction of a retry (up to a reserve that allows for short bursts), so retries
+    # cannot exceed that fraction of traffic during an outage:
+    budget_ratio: float = DEFAULT_BUDGET_RATIO
+    budget_reserve: int = DEFAULT_BUDGET_RESERVE
+
+    def __post_init__(self) -> None:
+        """Perform some post-init validation.
+
+        Raises
+        ------
+            LiminalError: If the policy is invalid.
+
+        """
+        if self.max_attempts < 1:
+            msg = f"Invalid maximum number of attempts: {self.max_attempts}"
+            raise LiminalError(msg)
+        if not 0.0 <= self.budget_ratio <= 1.0:
+            msg = f"Invalid retry budget ratio: {self.budget_ratio}"
+            raise LiminalError(msg)
+
+    def get_backoff(self, attempt: int) -> float:
+        """Get the (jittered) delay before retrying an attempt.
+
+        Args:
+        ----
+            attempt: The zero-based number of the attempt that failed.
+
+        Returns:
+        -------
+            The delay (in seconds).
+
+        """
+        backoff = min(self.backoff_max, self.backoff_base * 2**attempt)
+        return random.uniform(0.0, backoff)  # noqa: S311
+
+    def is_retryable(
+        self,
+        method: str,
+        endpoint: str,
+        *,
+        response: Response | None = None,
+        error: TransportError | None = None,
+        idempotent: bool | None = None,
+    ) -> bool:
+        """Determine whether a failed request may be retried.
+
+        Args:
+        ----
+            method: The HTTP method of the request.
+            endpoint: The endpoint that was requested.
+            response: The response to the request (if one was received).
+            error: The error that prevented a response (if any).
+            idempotent: Whether the request can safely be sent more than once (if this
+                is not provided, it is determined by the method and endpoint).
+
+        Returns:
+        -------
+            Whether the request may be retried.
+
+        """
+        if response is not None:
+            if response.status_code not in self.retry_statuses:
+                return False
+            if response.status_code in UNPROCESSED_REQUEST_STATUSES:
+                return True
+        elif isinstance(error, UNSENT_REQUEST_ERRORS):
+            return True
+
+        if idempotent is not None:
+            return idempotent
+        return (
+            method in self.idempotent_methods or endpoint in self.idempotent_endpoints
+        )
+
+
+def get_retry_after(response: Response) -> float | None:
+    """Get the delay requested by a response's Retry-After header.
+
+    Args:
+    ----
+        response: The response to inspect.
+
+    Returns:
+    -------
+        The delay (in seconds), or None if the response does not request one.
+
+    """
+    if (value := response.headers.get("Retry-After")) is None:
+        return None
+
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        # Dates in "-0000" (i.e., with no known zone) are parsed as naive, but are UTC:
+        retry_at = retry_at.replace(tzinfo=UTC)
+    return max(0.0, (retry_at - datetime.now(UTC)).total_seconds())
+
+
+class RetryBudget:
+    """Define a budget that bounds retries to a fraction of requests."""
+
+    def __init__(self, ratio: float, reserve: int) -> None:
+        """Initialize.
+
+        Args:
+        ----
+            ratio: The fraction of a retry that each request earns.
+            reserve: The number of retries that can be banked (and that are available
+                from the start).
+
+        """
+        self._balance = float(reserve)
+        self._capacity = float(max(reserve, 1))
+        self._ratio = ratio
+
+    @property
+    def balance(self) -> float:
+        """Return the number of retries that are currently available.
+
+        Returns
+        -------
+            The number of available retries.
+
+        """
+        return self._balance
+
+    def record_request(self) -> None:
+        """Earn part of a retry for a request."""
+        self._balance = min(self._capacity, self._balance + self._ratio)
+
+    def try_withdraw(self) -> bool:
+        """Spend a retry (if one is available).
+
+        Returns
+        -------
+            Whether a retry was available.
+
+        """
+        if self._balance < 1.0:
+            return False
+        self._balance -= 1.0
+        return True
+
+
+class Retrier:
+    """Define an object that decides whether (and when) to retry requests."""
+
+    def __init__(self, policy: RetryPolicy | None = None) -> None:
+        """Initialize.
+
+        Args:
+        ----
+            policy: An optional retry policy.
+
+        """
+        self._policy = policy or RetryPolicy()
+        self._budget = RetryBudget(
+            self._policy.budget_ratio, self._policy.budget_reserve
+        )
+
+    def record_request(self) -> None:
+        """Record that a new request is being made."""
+        self._budget.record_request()
+
+    def get_delay(
+        self,
+        attempt: int,
+        method: str,
+        endpoint: str,
+        *,
+        response: Response | None = None,
+        error: TransportError | None = None,
+        idempotent: bool | None = None,
+    ) -> float | None:
+        """Get the delay before a failed request is retried.
+
+        Args:
+        ----
+            attempt: The zero-based number of the attempt that failed.
+            method: The HTTP method of the request.
+            endpoint: The endpoint that was requested.
+            response: The response to the request (if one was received).
+            error: The error that prevented a response (if any).
+            idempotent: Whether the request can safely be sent more than once (if this
+                is not provided, it is determined by the method and endpoint).
+
+        Returns:
+        -------
+            The delay (in seconds), or None if the request should not be retried.
+
+        """
+        if attempt + 1 >= self._policy.max_attempts or not self._policy.is_retryable(
+            method, endpoint, response=response, error=error, idempotent=idempotent
+        ):
+            return None
+
+        delay = self._policy.get_backoff(attempt)
+        if (
+            response is not None
+            and (retry_after := get_retry_after(response)) is not None
+        ):
+            if retry_after > self._policy.max_retry_after:
+                return None
+            delay = retry_after
+
+        if not self._budget.try_withdraw():
+            return None
+        return delay
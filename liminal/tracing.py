@@ -0,0 +1,186 @@
+"""Define tracing helpers."""
+
+from __future__ import annotations
+
+from collections.abc import AsyncIterable, AsyncIterator, Callable
+from dataclasses import dataclass
+import logging
+import random
+import time
+
+from liminal.const import LOGGER
+from liminal.errors import LiminalError
+
+
+def redact_payload(payload: bytes) -> str:
+    """Redact a payload, so that prompt data never reaches the logs.
+
+    Args:
+    ----
+        payload: The payload to redact.
+
+    Returns:
+    -------
+        A description of the payload.
+
+    """
+    return f"<{len(payload)} bytes>"
+
+
+@dataclass(frozen=True, kw_only=True)
+class StreamSummary:
+    """Define a summary of a traced stream."""
+
+    # The URL that was streamed:
+    url: str
+
+    # The number of chunks (and bytes) that were received:
+    chunks: int
+    size: int
+
+    # How long (in seconds) the stream was open:
+    duration: float
+
+
+@dataclass(frozen=True, kw_only=True)
+class TracingConfig:
+    """Define the configuration of request and stream tracing.
+
+    Tracing is disabled by default: untraced requests and streams do no tracing (or
+    logging) work at all.
+    """
+
+    # The fraction of requests and streams to trace (from 0.0 to 1.0):
+    sample_rate: float = 0.0
+
+    # Whether to log the payloads of traced responses (and each chunk of traced
+    # streams) at the debug level:
+    log_payloads: bool = False
+
+    # The function used to render every payload that is logged (by default, only the
+    # size of a payload is logged):
+    redactor: Callable[[bytes], str] = redact_payload
+
+    # An optional callback that receives a summary of every traced stream:
+    on_stream_summary: Callable[[StreamSummary], None] | None = None
+
+    def __post_init__(self) -> None:
+        """Perform some post-init validation.
+
+        Raises
+        ------
+            LiminalError: If the sample rate is out of range.
+
+        """
+        if not 0.0 <= self.sample_rate <= 1.0:
+            msg = f"Invalid tracing sample rate: {self.sample_rate}"
+            raise LiminalError(msg)
+
+
+class Tracer:
+    """Define an object that traces requests and streams."""
+
+    def __init__(self, config: TracingConfig | None = None) -> None:
+        """Initialize.
+
+        Args:
+        ----
+            config: An optional tracing configuration.
+
+        """
+        self._config = config or TracingConfig()
+
+    def _should_log_payloads(self) -> bool:
+        """Determine whether payloads should be logged.
+
+        Returns
+        -------
+            Whether payloads should be logged.
+
+        """
+        return self._config.log_payloads and LOGGER.isEnabledFor(logging.DEBUG)
+
+    def redact(self, payload: bytes) -> str:
+        """Redact a payload before it is logged.
+
+        Args:
+        ----
+            payload: The payload to redact.
+
+        Returns:
+        -------
+            The redacted payload.
+
+        """
+        return self._config.redactor(payload)
+
+    def sample(self) -> bool:
+        """Decide whether a request (or stream) should be traced.
+
+        Returns
+        -------
+            Whether the request should be traced.
+
+        """
+        sample_rate = self._config.sample_rate
+        return sample_rate > 0.0 and random.random() < sample_rate  # noqa: S311
+
+    def trace_response(self, url: str, content: bytes) -> None:
+        """Trace the response to a (non-streamed) request.
+
+        Args:
+        ----
+            url: The URL that was requested.
+            content: The content of the response.
+
+        """
+        if self._should_log_payloads() and self.sample():
+            LOGGER.debug("Received data from %s: %s", url, self.redact(content))
+
+    async def trace_stream(
+        self, url: str, chunks: AsyncIterable[bytes]
+    ) -> AsyncIterator[bytes]:
+        """Trace a stream (which should already have been sampled).
+
+        Args:
+        ----
+            url: The URL that is streamed.
+            chunks: The chunks of the stream.
+
+        Yields:
+        ------
+            The chunks of the stream (unchanged).
+
+        """
+        log_payloads = self._should_log_payloads()
+        chunk_count = size = 0
+        start = time.monotonic()
+
+        try:
+            async for chunk in chunks:
+                chunk_count += 1
+                size += len(chunk)
+                if log_payloads:
+                    LOGGER.debug(
+                        "Received chunk %s of stream from %s: %s",
+                        chunk_count,
+                        url,
+                        self.redact(chunk),
+                    )
+                yield chunk
+        finally:
+            summary = StreamSummary(
+                url=url,
+                chunks=chunk_count,
+                size=size,
+                duration=time.monotonic() - start,
+            )
+            LOGGER.debug(
+                "Stream from %s finished: %s chunks, %s bytes in %.3f seconds",
+                url,
+                summary.chunks,
+                summary.size,
+                summary.duration,
+            )
+            if self._config.on_stream_summary:
+                self._config.on_stream_summary(summary)
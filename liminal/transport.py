@@ -0,0 +1,224 @@
+"""Define transport helpers."""
+
+from __future__ import annotations
+
+import asyncio
+from collections.abc import AsyncIterator
+from contextlib import AbstractAsyncContextManager, asynccontextmanager, nullcontext
+from dataclasses import dataclass
+from importlib.util import find_spec
+import time
+from typing import Any, Final
+
+from httpx import AsyncClient, AsyncHTTPTransport, Limits
+
+from liminal.errors import LiminalError
+
+DEFAULT_KEEPALIVE_EXPIRY: Final[float] = 5.0
+DEFAULT_MAX_CONNECTIONS: Final[int] = 100
+DEFAULT_MAX_KEEPALIVE_CONNECTIONS: Final[int] = 20
+
+
+@dataclass(frozen=True, kw_only=True)
+class TransportConfig:
+    """Define the configuration of the client's HTTP transport.
+
+    This configuration is only used when the client owns its HTTPX client (i.e., when
+    no HTTPX client is provided); per-host limits are enforced in either case.
+    """
+
+    # The maximum number of concurrent connections (None means unlimited):
+    max_connections: int | None = DEFAULT_MAX_CONNECTIONS
+
+    # The maximum number of idle connections to keep alive (None means unlimited):
+    max_keepalive_connections: int | None = DEFAULT_MAX_KEEPALIVE_CONNECTIONS
+
+    # How long (in seconds) an idle connection is kept alive (None means forever):
+    keepalive_expiry: float | None = DEFAULT_KEEPALIVE_EXPIRY
+
+    # Whether to negotiate HTTP/2 (which multiplexes requests over one connection):
+    http2: bool = False
+
+    # The maximum number of concurrent requests to a single host (None means
+    # unlimited):
+    max_requests_per_host: int | None = None
+
+    def __post_init__(self) -> None:
+        """Perform some post-init validation.
+
+        Raises
+        ------
+            LiminalError: If HTTP/2 is requested but unavailable.
+
+        """
+        if self.http2 and find_spec("h2") is None:
+            msg = (
+                "HTTP/2 support requires the h2 package; install it with "
+                "`pip install liminal-sdk-python[http2]`"
+            )
+            raise LiminalError(msg)
+
+    def create_httpx_client(self, *, timeout: float) -> AsyncClient:
+        """Create an HTTPX client that uses this configuration.
+
+        Args:
+        ----
+            timeout: The default request timeout (in seconds).
+
+        Returns:
+        -------
+            An HTTPX client.
+
+        """
+        return AsyncClient(
+            http2=self.http2,
+            limits=Limits(
+                max_connections=self.max_connections,
+                max_keepalive_connections=self.max_keepalive_connections,
+                keepalive_expiry=self.keepalive_expiry,
+            ),
+            timeout=timeout,
+        )
+
+
+@dataclass(frozen=True, kw_only=True)
+class PoolStats:
+    """Define a snapshot of the client's connection pool occupancy."""
+
+    # The number of open connections (and how they are being used):
+    connections: int
+    active_connections: int
+    idle_connections: int
+    http2_connections: int
+
+    # The number of requests waiting for a connection to become available:
+    queued_requests: int
+
+    # The number of requests (and streams) currently being handled by the client:
+    in_flight_requests: int
+
+
+class Call:
+    """Define a request whose outcome is tracked (e.g., by a circuit breaker)."""
+
+    __slots__ = ("started_at", "status_code")
+
+    def __init__(self) -> None:
+        """Initialize."""
+        # When the request was sent (so that its latency excludes any time spent
+        # waiting for a place to send it in):
+        self.started_at = time.monotonic()
+        # The status of the response (if one is received):
+        self.status_code: int | None = None
+
+    def start(self) -> None:
+        """Mark the request as sent (once it has been let through)."""
+        self.started_at = time.monotonic()
+
+
+class RequestGate:
+    """Define a gate that tracks (and optionally bounds) in-flight requests."""
+
+    def __init__(self, max_requests_per_host: int | None = None) -> None:
+        """Initialize.
+
+        Args:
+        ----
+            max_requests_per_host: The maximum number of concurrent requests to a
+                single host (None means unlimited).
+
+        """
+        self._host_semaphores: dict[str, asyncio.Semaphore] = {}
+        self._in_flight = 0
+        self._max_requests_per_host = max_requests_per_host
+
+    @property
+    def in_flight(self) -> int:
+        """Return the number of in-flight requests.
+
+        Returns
+        -------
+            The number of in-flight requests.
+
+        """
+        return self._in_flight
+
+    def _get_host_limit(self, host: str) -> AbstractAsyncContextManager[Any]:
+        """Get the context manager that bounds concurrent requests to a host.
+
+        Args:
+        ----
+            host: The host the request is sent to.
+
+        Returns:
+        -------
+            An async context manager.
+
+        """
+        if self._max_requests_per_host is None:
+            return nullcontext()
+        if (semaphore := self._host_semaphores.get(host)) is None:
+            semaphore = self._host_semaphores[host] = asyncio.Semaphore(
+                self._max_requests_per_host
+            )
+        return semaphore
+
+    @asynccontextmanager
+    async def enter(self, host: str) -> AsyncIterator[None]:
+        """Enter the gate for a request to a host.
+
+        Args:
+        ----
+            host: The host the request is sent to.
+
+        Yields:
+        ------
+            Nothing; the request may proceed while the context is held.
+
+        """
+        async with self._get_host_limit(host):
+            self._in_flight += 1
+            try:
+                yield
+            finally:
+                self._in_flight -= 1
+
+
+def get_pool_stats(httpx_client: AsyncClient | None, in_flight: int) -> PoolStats:
+    """Get a snapshot of an HTTPX client's connection pool occupancy.
+
+    Only HTTPX's default transport exposes a connection pool; for any other transport
+    (or when there is no HTTPX client yet), the pool is reported as empty.
+
+    Args:
+    ----
+        httpx_client: The HTTPX client to inspect.
+        in_flight: The number of requests the Liminal client has in flight.
+
+    Returns:
+    -------
+        A PoolStats object.
+
+    """
+    connections = []
+    queued_requests = 0
+
+    transport = httpx_client._transport if httpx_client else None  # noqa: SLF001
+    if isinstance(transport, AsyncHTTPTransport):
+        pool = transport._pool  # noqa: SLF001
+        connections = [conn for conn in pool.connections if not conn.is_closed()]
+        queued_requests = sum(
+            1
+            for request in pool._requests  # noqa: SLF001
+            if request.is_queued()
+        )
+
+    idle_connections = sum(1 for conn in connections if conn.is_idle())
+    return PoolStats(
+        connections=len(connections),
+        active_connections=len(connections) - idle_connections,
+        idle_connections=idle_connections,
+        http2_connections=sum(1 for conn in connections if "HTTP/2" in conn.info()),
+        queued_requests=queued_requests,
+        in_flight_requests=in_flight,
+    )
@@ -0,0 +1 @@
+"""Define helper tests."""
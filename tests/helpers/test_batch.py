@@ -0,0 +1,118 @@
+"""Define batch helper tests."""
+
+from __future__ import annotations
+
+import asyncio
+from collections.abc import AsyncIterator
+
+import pytest
+
+from liminal.errors import LiminalError
+from liminal.helpers.batch import map_concurrently
+
+
+async def double(item: int) -> int:
+    """Double an item (taking longer for smaller items).
+
+    Args:
+    ----
+        item: The item.
+
+    Returns:
+    -------
+        The doubled item.
+
+    """
+    await asyncio.sleep(0.01 * (5 - item))
+    return item * 2
+
+
+async def numbers(count: int) -> AsyncIterator[int]:
+    """Yield numbers asynchronously.
+
+    Args:
+    ----
+        count: How many numbers to yield.
+
+    Yields:
+    ------
+        The numbers.
+
+    """
+    for number in range(count):
+        await asyncio.sleep(0)
+        yield number
+
+
+@pytest.mark.asyncio
+async def test_invalid_concurrency() -> None:
+    """Test that an invalid concurrency is rejected."""
+    with pytest.raises(LiminalError, match="Invalid concurrency: 0"):
+        _ = await anext(map_concurrently(double, [1], concurrency=0))
+
+
+@pytest.mark.asyncio
+async def test_ordered() -> None:
+    """Test that results are yielded in input order by default."""
+    results = [
+        result async for result in map_concurrently(double, range(5), concurrency=5)
+    ]
+    assert results == [(index, index, index * 2) for index in range(5)]
+
+
+@pytest.mark.asyncio
+async def test_as_completed() -> None:
+    """Test that results can be yielded in order of completion."""
+    results = [
+        result
+        async for result in map_concurrently(
+            double, numbers(5), concurrency=5, ordered=False
+        )
+    ]
+    assert results == [(index, index, index * 2) for index in reversed(range(5))]
+
+
+@pytest.mark.asyncio
+async def test_bounded_concurrency() -> None:
+    """Test that the number of calls in flight is bounded."""
+    in_flight = 0
+    max_in_flight = 0
+
+    async def track(item: int) -> int:
+        nonlocal in_flight, max_in_flight
+        in_flight += 1
+        max_in_flight = max(max_in_flight, in_flight)
+        await asyncio.sleep(0.001 * (item % 3))
+        in_flight -= 1
+        return item
+
+    results = [
+        item async for _, _, item in map_concurrently(track, range(50), concurrency=4)
+    ]
+    assert results == list(range(50))
+    assert max_in_flight == 4
+
+
+@pytest.mark.asyncio
+async def test_errors_propagate() -> None:
+    """Test that an error aborts the map (and cancels the calls in flight)."""
+    cancelled: list[int] = []
+
+    async def fail_on_zero(item: int) -> int:
+        if not item:
+            msg = "Zero"
+            raise ValueError(msg)
+        try:
+            await asyncio.sleep(1)
+        except asyncio.CancelledError:
+            cancelled.append(item)
+            raise
+        return item
+
+    with pytest.raises(ValueError, match="Zero"):
+        _ = [
+            result
+            async for result in map_concurrently(fail_on_zero, range(3), concurrency=3)
+        ]
+    await asyncio.sleep(0)
+    assert sorted(cancelled) == [1, 2]
@@ -0,0 +1,43 @@
+"""Define decoder helper tests."""
+
+from __future__ import annotations
+
+import json
+import sys
+from typing import Any
+from unittest.mock import Mock, patch
+
+from liminal.endpoints.prompt.models import StreamResponseChunk
+from liminal.endpoints.prompt.schemas import AnalyzeResponse
+from liminal.helpers.decoder import decode, get_decoder, get_json_loader
+
+
+def test_decoders_are_cached(prompt_analyze_response: dict[str, Any]) -> None:
+    """Test that a decoder is built once per type.
+
+    Args:
+    ----
+        prompt_analyze_response: An analyze response.
+
+    """
+    decoder = get_decoder(AnalyzeResponse)
+    assert get_decoder(AnalyzeResponse) is decoder
+    assert (
+        get_decoder(StreamResponseChunk)
+        .decode(b'{"content": "Hi", "finishReason": null}')
+        .content
+        == "Hi"
+    )
+
+    response = decode(json.dumps(prompt_analyze_response).encode(), AnalyzeResponse)
+    assert len(response.data.findings) == 5
+
+
+def test_json_loader() -> None:
+    """Test that orjson is used (when available) to load raw JSON."""
+    orjson = Mock()
+    with patch.dict(sys.modules, {"orjson": orjson}):
+        assert get_json_loader() is orjson.loads
+
+    with patch.dict(sys.modules, {"orjson": None}):
+        assert get_json_loader() is json.loads
@@ -0,0 +1,38 @@
+"""Define encoder helper tests."""
+
+from __future__ import annotations
+
+import json
+import sys
+from unittest.mock import Mock, patch
+
+from liminal.helpers.encoder import RawJSON, encode_json, get_json_dumper
+
+
+def test_encode_json() -> None:
+    """Test that raw fragments are spliced into encoded JSON as-is."""
+    payload = {
+        "findings": RawJSON(b'[{"text": "Jane"}]'),
+        "text": "Grüße",
+        "threadId": None,
+    }
+    encoded = encode_json(payload)
+    assert b'"findings":[{"text": "Jane"}]' in encoded
+    assert json.loads(encoded) == {
+        "findings": [{"text": "Jane"}],
+        "text": "Grüße",
+        "threadId": None,
+    }
+
+
+def test_json_dumper() -> None:
+    """Test that orjson is used (when available) to dump raw JSON."""
+    orjson = Mock()
+    with patch.dict(sys.modules, {"orjson": orjson}):
+        assert get_json_dumper() is orjson.dumps
+
+    with patch.dict(sys.modules, {"orjson": None}):
+        dumper = get_json_dumper()
+        assert dumper({"text": "Grüße", "end": 1}) == (
+            '{"text":"Grüße","end":1}'.encode()
+        )
@@ -0,0 +1,83 @@
+"""Define identity map helper tests."""
+
+from __future__ import annotations
+
+import json
+from pathlib import Path
+from typing import Any
+
+from mashumaro.exceptions import MissingField
+import pytest
+
+from liminal.endpoints.llm.models import ModelInstance
+from liminal.helpers.identity import IdentityMap, deserialize_entity
+
+FIXTURE_PATH = Path(__file__).parent.parent / "fixtures/model-instances-response.json"
+
+
+def _load_model_instance(**overrides: object) -> dict[str, Any]:
+    """Load the (raw) JSON of a model instance.
+
+    Args:
+    ----
+        overrides: Fields to override.
+
+    Returns:
+    -------
+        The model instance's JSON.
+
+    """
+    data: dict[str, Any] = json.loads(FIXTURE_PATH.read_text())["data"][0]
+    return {**data, **overrides}
+
+
+def test_identity_map() -> None:
+    """Test that identical entities are resolved to one shared instance."""
+    identity_map = IdentityMap()
+    deserialize = deserialize_entity(ModelInstance)
+
+    # Without an active map, every entity is decoded anew:
+    assert deserialize(_load_model_instance()) is not deserialize(
+        _load_model_instance()
+    )
+
+    with identity_map.activate():
+        original = deserialize(_load_model_instance())
+        assert deserialize(_load_model_instance()) is original
+        assert deserialize(_load_model_instance(id=999)) is not original
+        assert len(identity_map) == 2
+
+        # A newer version replaces the older one:
+        newer = deserialize(_load_model_instance(updatedAt="2099-01-01T00:00:00.000Z"))
+        assert newer is not original
+        assert deserialize(_load_model_instance()) is not original
+        assert (
+            deserialize(_load_model_instance(updatedAt="2099-01-01T00:00:00.000Z"))
+            is newer
+        )
+
+        # An older version doesn't:
+        older = deserialize(_load_model_instance(updatedAt="2000-01-01T00:00:00.000Z"))
+        assert older == ModelInstance.from_dict(
+            _load_model_instance(updatedAt="2000-01-01T00:00:00.000Z")
+        )
+        assert (
+            deserialize(_load_model_instance(updatedAt="2099-01-01T00:00:00.000Z"))
+            is newer
+        )
+
+        # Malformed entities fail to decode as usual (rather than with a KeyError):
+        for field_name in ("id", "updatedAt"):
+            data = _load_model_instance()
+            del data[field_name]
+            with pytest.raises(MissingField):
+                deserialize(data)
+        assert len(identity_map) == 2
+
+    # The map is only active within its context:
+    assert deserialize(_load_model_instance(id=999)) is not deserialize(
+        _load_model_instance(id=999)
+    )
+
+    identity_map.clear()
+    assert len(identity_map) == 0
@@ -0,0 +1,165 @@
+"""Define pipeline helper tests."""
+
+from __future__ import annotations
+
+import asyncio
+from collections.abc import AsyncIterator
+
+import pytest
+
+from liminal.errors import LiminalError
+from liminal.helpers.pipeline import Pipeline, Stage
+
+
+async def increment(item: int) -> int:
+    """Increment an item.
+
+    Args:
+    ----
+        item: The item.
+
+    Returns:
+    -------
+        The incremented item.
+
+    """
+    await asyncio.sleep(0.001)
+    return item + 1
+
+
+async def double(item: int) -> int:
+    """Double an item.
+
+    Args:
+    ----
+        item: The item.
+
+    Returns:
+    -------
+        The doubled item.
+
+    """
+    await asyncio.sleep(0.001)
+    return item * 2
+
+
+def test_invalid_pipeline() -> None:
+    """Test that invalid pipelines are rejected."""
+    with pytest.raises(LiminalError, match="at least one stage"):
+        _ = Pipeline([], queue_size=1)
+    with pytest.raises(LiminalError, match="Invalid queue size: 0"):
+        _ = Pipeline(
+            [Stage(name="increment", func=increment, concurrency=1)], queue_size=0
+        )
+    with pytest.raises(LiminalError, match="Invalid increment concurrency: 0"):
+        _ = Pipeline(
+            [Stage(name="increment", func=increment, concurrency=0)], queue_size=1
+        )
+
+
+@pytest.mark.asyncio
+async def test_run() -> None:
+    """Test that items go through every stage (in order)."""
+    pipeline = Pipeline(
+        [
+            Stage(name="increment", func=increment, concurrency=3),
+            Stage(name="double", func=double, concurrency=2),
+        ],
+        queue_size=2,
+    )
+    assert pipeline.get_stats() == []
+
+    results = [item async for item in pipeline.run(range(20))]
+    assert sorted(results) == [(item + 1) * 2 for item in range(20)]
+
+    increment_stats, double_stats = pipeline.get_stats()
+    assert increment_stats.name == "increment"
+    assert increment_stats.completed == 20
+    assert increment_stats.in_flight == 0
+    assert increment_stats.queued == 0
+    assert 0.0 < increment_stats.average_latency <= increment_stats.max_latency
+    assert increment_stats.throughput > 0.0
+    assert double_stats.name == "double"
+    assert double_stats.completed == 20
+
+
+@pytest.mark.asyncio
+async def test_backpressure() -> None:
+    """Test that a slow stage holds back the stages before it."""
+    consumed = 0
+    release = asyncio.Event()
+
+    async def items() -> AsyncIterator[int]:
+        nonlocal consumed
+        for item in range(100):
+            consumed += 1
+            yield item
+
+    async def block(item: int) -> int:
+        await release.wait()
+        return item
+
+    pipeline = Pipeline(
+        [
+            Stage(name="increment", func=increment, concurrency=2),
+            Stage(name="block", func=block, concurrency=1),
+        ],
+        queue_size=3,
+    )
+    results = pipeline.run(items())
+    first = asyncio.ensure_future(anext(results))
+    await asyncio.sleep(0.05)
+
+    # The blocked stage holds an item and its queue is full, so the first stage's
+    # workers each wait to hand over an item; the first queue is full, too (and one
+    # more item waits to be put on it):
+    assert consumed == 10
+    increment_stats, block_stats = pipeline.get_stats()
+    assert increment_stats.completed == 6
+    assert increment_stats.queued == 3
+    assert block_stats.in_flight == 1
+    assert block_stats.queued == 3
+    assert block_stats.throughput == 0.0
+
+    release.set()
+    assert await first == 1
+    assert len([item async for item in results]) == 99
+    assert consumed == 100
+
+
+@pytest.mark.asyncio
+async def test_skip() -> None:
+    """Test that skipped items bypass the remaining stages."""
+    pipeline = Pipeline(
+        [
+            Stage(name="increment", func=increment, concurrency=1),
+            Stage(name="double", func=double, concurrency=1),
+        ],
+        queue_size=1,
+        skip=lambda item: item < 0,
+    )
+
+    results = [item async for item in pipeline.run([0, -1, 2])]
+    assert results == [2, -1, 6]
+    assert [stats.completed for stats in pipeline.get_stats()] == [2, 2]
+
+
+@pytest.mark.asyncio
+async def test_errors_propagate() -> None:
+    """Test that an error aborts the run."""
+
+    async def fail(item: int) -> int:
+        if item == 3:
+            msg = "Three"
+            raise ValueError(msg)
+        return item
+
+    pipeline = Pipeline(
+        [
+            Stage(name="increment", func=increment, concurrency=1),
+            Stage(name="fail", func=fail, concurrency=1),
+        ],
+        queue_size=1,
+    )
+    with pytest.raises(ValueError, match="Three"):
+        _ = [item async for item in pipeline.run(range(10))]
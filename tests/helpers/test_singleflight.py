@@ -0,0 +1,83 @@
+"""Define single-flight helper tests."""
+
+from __future__ import annotations
+
+import asyncio
+from functools import partial
+
+import pytest
+
+from liminal.helpers.singleflight import SingleFlight
+
+
+@pytest.mark.asyncio
+async def test_identical_calls_are_shared() -> None:
+    """Test that identical concurrent calls are made once (and share a result)."""
+    single_flight = SingleFlight()
+    calls: list[str] = []
+    release = asyncio.Event()
+
+    async def fetch(key: str) -> list[str]:
+        calls.append(key)
+        await release.wait()
+        return [key]
+
+    tasks = [
+        asyncio.create_task(single_flight.run(key, partial(fetch, key)))
+        for key in ("a", "a", "b")
+    ]
+    await asyncio.sleep(0)
+    assert single_flight.in_flight == 2
+
+    release.set()
+    first, second, third = await asyncio.gather(*tasks)
+    assert calls == ["a", "b"]
+    assert first is second
+    assert third == ["b"]
+    assert single_flight.in_flight == 0
+
+    # Once a call completes, the next identical call is made anew:
+    assert await single_flight.run("a", lambda: fetch("a")) == ["a"]
+    assert calls == ["a", "b", "a"]
+
+
+@pytest.mark.asyncio
+async def test_errors_are_shared() -> None:
+    """Test that every caller of a failed call gets its exception."""
+    single_flight = SingleFlight()
+    release = asyncio.Event()
+
+    async def fail() -> None:
+        await release.wait()
+        msg = "Service Unavailable"
+        raise ValueError(msg)
+
+    tasks = [asyncio.create_task(single_flight.run("key", fail)) for _ in range(2)]
+    await asyncio.sleep(0)
+    release.set()
+
+    for result in await asyncio.gather(*tasks, return_exceptions=True):
+        assert isinstance(result, ValueError)
+    assert single_flight.in_flight == 0
+
+
+@pytest.mark.asyncio
+async def test_cancelled_caller() -> None:
+    """Test that a cancelled caller does not cancel a shared call."""
+    single_flight = SingleFlight()
+    release = asyncio.Event()
+
+    async def fetch() -> str:
+        await release.wait()
+        return "result"
+
+    first = asyncio.create_task(single_flight.run("key", fetch))
+    second = asyncio.create_task(single_flight.run("key", fetch))
+    await asyncio.sleep(0)
+
+    first.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await first
+
+    release.set()
+    assert await second == "result"
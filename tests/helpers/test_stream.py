@@ -0,0 +1,280 @@
+"""Define stream helper tests."""
+
+from __future__ import annotations
+
+from collections.abc import AsyncIterator
+import json
+from typing import Any, NamedTuple
+
+import pytest
+
+from liminal.helpers.stream import JSONArrayStreamParser, JSONStreamParser
+
+
+class ArrayStreamParserTest(NamedTuple):
+    """Define an array stream parser test."""
+
+    chunks: list[bytes]
+    expected_items: list[Any]
+
+
+class StreamParserTest(NamedTuple):
+    """Define a stream parser test."""
+
+    chunks: list[bytes]
+    expected_frames: list[bytes]
+    expected_remainder: bytes
+
+
+@pytest.mark.parametrize(
+    ArrayStreamParserTest._fields,
+    [
+        # A response's data, split across chunks at arbitrary points:
+        ArrayStreamParserTest(
+            chunks=[b'{"data": [{"id": 1}, {"i', b'd": 2}', b"]}"],
+            expected_items=[{"id": 1}, {"id": 2}],
+        ),
+        # The key elsewhere (in a nested object, or as a value) is ignored, as is
+        # everything after the array:
+        ArrayStreamParserTest(
+            chunks=[
+                b'{"meta": {"data": [{"id": 0}]}, "key": "data", "other": [{}], ',
+                b'"data": [{"id": 1}], "more": [{"id": 2}]}',
+            ],
+            expected_items=[{"id": 1}],
+        ),
+        # Nested objects and arrays, brackets and quotes inside of strings (split
+        # mid-escape), and multi-byte characters (split mid-character):
+        ArrayStreamParserTest(
+            chunks=[
+                b'{"da',
+                b'ta": [{"a": [1, {"b": "]}\\',
+                b'"[{\xc3',
+                b'\xa9"}]}, [1, 2]]}',
+            ],
+            expected_items=[{"a": [1, {"b": ']}"[{\u00e9'}]}, [1, 2]],
+        ),
+        # Numbers (which may continue in the next chunk):
+        ArrayStreamParserTest(
+            chunks=[b'{"data": [12', b"34,\n5", b"]}"],
+            expected_items=[1234, 5],
+        ),
+        # An empty array, followed by data that is never parsed:
+        ArrayStreamParserTest(
+            chunks=[b'{"data": []}', b'{"data": [{"id": 1}]}'],
+            expected_items=[],
+        ),
+    ],
+)
+def test_array_stream_parser(chunks: list[bytes], expected_items: list[Any]) -> None:
+    """Test decoding the items of an array in a stream.
+
+    Args:
+    ----
+        chunks: The chunks of the stream.
+        expected_items: The items that should be decoded.
+
+    """
+    parser = JSONArrayStreamParser("data")
+    items = [item for chunk in chunks for item in parser.feed(chunk)]
+    items.extend(parser.close())
+    assert items == expected_items
+
+
+def test_array_stream_parser_byte_by_byte() -> None:
+    """Test that items are decoded when a stream arrives one byte at a time."""
+    items = [
+        {"id": index, "name": f'Thread [{{{index}}}] \\ "', "score": index / 3}
+        for index in range(50)
+    ]
+    raw = json.dumps({"data": items, "total": len(items)}).encode()
+
+    parser = JSONArrayStreamParser("data")
+    decoded = [
+        item
+        for index in range(len(raw))
+        for item in parser.feed(raw[index : index + 1])
+    ]
+    decoded.extend(parser.close())
+    assert decoded == items
+
+
+def test_array_stream_parser_long_item() -> None:
+    """Test that the last item is decoded when the stream ends."""
+    parser = JSONArrayStreamParser("data")
+    # Once an item fails to decode, it is only retried once as much again of it has
+    # arrived (which the end of this one never does):
+    assert parser.feed(b'{"data": [{"text": "' + b"x" * 100) == []
+    assert parser.feed(b'"}]}') == []
+    assert parser.close() == [{"text": "x" * 100}]
+
+
+@pytest.mark.parametrize(
+    ("chunks", "expected"),
+    [
+        ([b'{"data": [1.', b"5, 2]}"], [1.5, 2]),
+        ([b'{"data": [1.5e', b"3, 2]}"], [1500.0, 2]),
+        ([b'{"data": [-1', b"2.5E-1 , 2]}"], [-1.25, 2]),
+        ([b'{"data": [1', b"0]}"], [10]),
+    ],
+)
+def test_array_stream_parser_split_number(
+    chunks: list[bytes], expected: list[Any]
+) -> None:
+    """Test that a number split across chunks is only decoded once it is complete.
+
+    Args:
+    ----
+        chunks: The chunks of the stream.
+        expected: The expected items.
+
+    """
+    parser = JSONArrayStreamParser("data")
+    items = parser.feed(chunks[0])
+    assert items == []
+    items.extend(parser.feed(chunks[1]))
+    assert [*items, *parser.close()] == expected
+
+
+@pytest.mark.parametrize(
+    ("chunks", "error"),
+    [
+        (
+            [b'{"data": {"id": 1}, "other": [{"id": 2}]}'],
+            'Expecting the end of the array of "data"',
+        ),
+        ([b'{"data": [{"id": 1}, {"id": '], "Expecting value"),
+        ([b'{"data": [{"id": 1}'], 'Expecting the end of the array of "data"'),
+        ([b'{"data": [{"id": 1}, {"id" 2}]}'], "Expecting ':' delimiter"),
+    ],
+)
+def test_array_stream_parser_invalid(chunks: list[bytes], error: str) -> None:
+    """Test that a missing, invalid, or incomplete array is an error.
+
+    Args:
+    ----
+        chunks: The chunks of the stream.
+        error: The expected error message.
+
+    """
+    parser = JSONArrayStreamParser("data")
+    for chunk in chunks:
+        parser.feed(chunk)
+    with pytest.raises(json.JSONDecodeError, match=error):
+        parser.close()
+
+
+@pytest.mark.parametrize(
+    StreamParserTest._fields,
+    [
+        # Newline-delimited JSON:
+        StreamParserTest(
+            chunks=[b'{"content": "Hello "}\n{"content": "world"}\n'],
+            expected_frames=[b'{"content": "Hello "}', b'{"content": "world"}'],
+            expected_remainder=b"",
+        ),
+        # Concatenated objects split across chunks at arbitrary points:
+        StreamParserTest(
+            chunks=[b'{"cont', b'ent": "Hel', b'lo "}{"content"', b': "world"}'],
+            expected_frames=[b'{"content": "Hello "}', b'{"content": "world"}'],
+            expected_remainder=b"",
+        ),
+        # Braces, quotes, and escapes inside of strings (split mid-escape):
+        StreamParserTest(
+            chunks=[b'{"content": "{not \\', b'"an} object\\\\"}\r\n'],
+            expected_frames=[b'{"content": "{not \\"an} object\\\\"}'],
+            expected_remainder=b"",
+        ),
+        # Nested objects:
+        StreamParserTest(
+            chunks=[b'{"a": {"b": {"c": 1}}, ', b'"d": 2}'],
+            expected_frames=[b'{"a": {"b": {"c": 1}}, "d": 2}'],
+            expected_remainder=b"",
+        ),
+        # Server-Sent Events (including comments, other fields, and a sentinel):
+        StreamParserTest(
+            chunks=[
+                b": keep-alive\n\nevent: message\nid: 1\ndata: ",
+                b'{"content": "Hello "}\n\ndata:{"content": "world"}\n\n',
+                b"retry: 1000\ndata: [DONE]\n\n",
+            ],
+            expected_frames=[b'{"content": "Hello "}', b'{"content": "world"}'],
+            expected_remainder=b"",
+        ),
+        # An SSE object that continues over multiple "data:" fields:
+        StreamParserTest(
+            chunks=[b'data: {"content":\n', b"da", b'ta: "Hello "}\n\n'],
+            expected_frames=[b'{"content":\n"Hello "}'],
+            expected_remainder=b"",
+        ),
+        # A final SSE event without a trailing newline:
+        StreamParserTest(
+            chunks=[b'data: {"content": "Hello "}'],
+            expected_frames=[b'{"content": "Hello "}'],
+            expected_remainder=b"",
+        ),
+        # Lines that are neither JSON objects nor SSE framing are returned as-is:
+        StreamParserTest(
+            chunks=[b"This is unexpected\nevent: message\n", b"[1, 2]"],
+            expected_frames=[b"This is unexpected", b"[1, 2]"],
+            expected_remainder=b"",
+        ),
+        # An incomplete object is never returned:
+        StreamParserTest(
+            chunks=[b'{"content": "Hello "}\n{"content": "wor'],
+            expected_frames=[b'{"content": "Hello "}'],
+            expected_remainder=b'{"content": "wor',
+        ),
+    ],
+)
+def test_stream_parser(
+    chunks: list[bytes], expected_frames: list[bytes], expected_remainder: bytes
+) -> None:
+    """Test parsing a stream of JSON objects.
+
+    Args:
+    ----
+        chunks: The chunks of the stream.
+        expected_frames: The frames that should be parsed.
+        expected_remainder: The data that should be left over.
+
+    """
+    parser = JSONStreamParser()
+    frames = [frame for chunk in chunks for frame in parser.feed(chunk)]
+    frames.extend(parser.close())
+    assert frames == expected_frames
+    assert parser.remainder == expected_remainder
+
+
+def test_stream_parser_byte_by_byte() -> None:
+    """Test that objects are reassembled when a stream arrives one byte at a time."""
+    objects = [
+        {"content": f'Chunk {{{index}}} \\ "', "finishReason": None}
+        for index in range(50)
+    ]
+    raw = "".join(f"data: {json.dumps(obj)}\n\n" for obj in objects).encode()
+
+    parser = JSONStreamParser()
+    frames = [
+        frame
+        for index in range(len(raw))
+        for frame in parser.feed(raw[index : index + 1])
+    ]
+    frames.extend(parser.close())
+    assert [json.loads(frame) for frame in frames] == objects
+    assert parser.remainder == b""
+
+
+@pytest.mark.asyncio
+async def test_stream_parser_iter_frames() -> None:
+    """Test parsing an entire asynchronous stream."""
+
+    async def chunks() -> AsyncIterator[bytes]:
+        yield b'{"content": "Hel'
+        yield b'lo "}\ndata: {"content": "world"}'
+
+    parser = JSONStreamParser()
+    assert [frame async for frame in parser.iter_frames(chunks())] == [
+        b'{"content": "Hello "}',
+        b'{"content": "world"}',
+    ]
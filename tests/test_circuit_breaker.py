@@ -0,0 +1,283 @@
+"""Define circuit breaker tests."""
+
+from __future__ import annotations
+
+from unittest.mock import Mock, patch
+
+import httpx
+import pytest
+
+from liminal import Client
+from liminal.circuit_breaker import (
+    CircuitBreaker,
+    CircuitBreakerConfig,
+    CircuitState,
+    get_endpoint_key,
+)
+from liminal.errors import CircuitOpenError, LiminalError
+from liminal.retry import RetryPolicy
+from tests.common import TEST_API_SERVER_URL
+
+TEST_CONFIG = CircuitBreakerConfig(
+    failure_rate_threshold=0.5,
+    slow_call_duration=10.0,
+    window_size=4,
+    minimum_calls=2,
+    open_duration=30.0,
+)
+
+
+def call(breaker: CircuitBreaker, status_code: int | None = 200) -> None:
+    """Make a call through a circuit breaker.
+
+    Args:
+    ----
+        breaker: The circuit breaker.
+        status_code: The status the call responds with (or None for a transport
+            error).
+
+    """
+    with breaker.guard() as guarded_call:
+        if status_code is None:
+            msg = "Connection reset by peer"
+            raise httpx.ReadError(msg)
+        guarded_call.status_code = status_code
+
+
+def open_circuit(breaker: CircuitBreaker, clock: Mock) -> None:
+    """Open a circuit (and wait until it is half-open).
+
+    Args:
+    ----
+        breaker: The circuit breaker.
+        clock: The mocked clock.
+
+    """
+    call(breaker, 503)
+    with pytest.raises(httpx.ReadError):
+        call(breaker, None)
+    assert breaker.get_stats().state is CircuitState.OPEN
+
+    clock.return_value += TEST_CONFIG.open_duration
+    assert breaker.get_stats().state is CircuitState.HALF_OPEN
+
+
+@pytest.mark.parametrize(
+    ("endpoint", "expected_key"),
+    [
+        ("/api/v1/threads", "/api/v1/threads"),
+        ("/api/v1/threads/123", "/api/v1/threads/{id}"),
+        ("/api/v1/threads/123/messages?limit=10", "/api/v1/threads/{id}/messages"),
+        ("/api/v1/model-instances/v2", "/api/v1/model-instances/v2"),
+    ],
+)
+def test_endpoint_key(endpoint: str, expected_key: str) -> None:
+    """Test that endpoints are grouped by their path (without resource IDs).
+
+    Args:
+    ----
+        endpoint: The endpoint.
+        expected_key: The expected circuit key.
+
+    """
+    assert get_endpoint_key(endpoint) == expected_key
+
+
+def test_invalid_config() -> None:
+    """Test that invalid configurations are rejected."""
+    with pytest.raises(LiminalError, match="Invalid failure rate threshold"):
+        _ = CircuitBreakerConfig(failure_rate_threshold=0.0)
+    with pytest.raises(LiminalError, match="Invalid minimum number of calls"):
+        _ = CircuitBreakerConfig(minimum_calls=30, window_size=20)
+    with pytest.raises(LiminalError, match="Invalid number of half-open calls"):
+        _ = CircuitBreakerConfig(half_open_max_calls=0)
+
+
+@patch("liminal.circuit_breaker.time.monotonic", return_value=0.0)
+def test_circuit_opens_and_recovers(clock: Mock) -> None:
+    """Test that a circuit opens on failures and closes once a probe succeeds.
+
+    Args:
+    ----
+        clock: The mocked clock.
+
+    """
+    breaker = CircuitBreaker("/api/v1/threads", TEST_CONFIG)
+
+    # Client errors (and successes) are not failures:
+    for status_code in (404, 200, 200, 503):
+        call(breaker, status_code)
+    assert breaker.get_stats().state is CircuitState.CLOSED
+    assert breaker.get_stats().failure_rate == 0.25
+
+    # Old outcomes fall out of the window:
+    call(breaker, 429)
+    stats = breaker.get_stats()
+    assert stats.state is CircuitState.OPEN
+    assert stats.calls == 4
+    assert stats.failures == 2
+
+    with pytest.raises(CircuitOpenError, match="The circuit for /api/v1/threads is"):
+        call(breaker)
+    assert breaker.get_stats().rejected_calls == 1
+
+    # Once the circuit is half-open, only one probe is allowed at a time:
+    clock.return_value = TEST_CONFIG.open_duration
+    with breaker.guard() as probe:
+        with pytest.raises(CircuitOpenError):
+            call(breaker)
+        probe.status_code = 200
+
+    stats = breaker.get_stats()
+    assert stats.state is CircuitState.CLOSED
+    assert stats.calls == 0
+    assert stats.failure_rate == 0.0
+
+
+@patch("liminal.circuit_breaker.time.monotonic", return_value=0.0)
+def test_failed_probe(clock: Mock) -> None:
+    """Test that a circuit reopens when a probe fails.
+
+    Args:
+    ----
+        clock: The mocked clock.
+
+    """
+    breaker = CircuitBreaker("/api/v1/threads", TEST_CONFIG)
+    open_circuit(breaker, clock)
+
+    call(breaker, 500)
+    assert breaker.get_stats().state is CircuitState.OPEN
+
+
+@patch("liminal.circuit_breaker.time.monotonic", return_value=0.0)
+def test_abandoned_calls(clock: Mock) -> None:
+    """Test that abandoned calls are not counted as successes or failures.
+
+    Args:
+    ----
+        clock: The mocked clock.
+
+    """
+    breaker = CircuitBreaker("/api/v1/threads", TEST_CONFIG)
+
+    with pytest.raises(KeyboardInterrupt), breaker.guard():
+        raise KeyboardInterrupt
+    assert breaker.get_stats().calls == 0
+
+    # An abandoned probe frees its slot:
+    open_circuit(breaker, clock)
+    with pytest.raises(KeyboardInterrupt), breaker.guard():
+        raise KeyboardInterrupt
+    assert breaker.get_stats().state is CircuitState.HALF_OPEN
+
+
+@patch("liminal.circuit_breaker.time.monotonic", return_value=0.0)
+def test_concurrent_probes(clock: Mock) -> None:
+    """Test that a successful probe does not close a circuit that another reopened.
+
+    Args:
+    ----
+        clock: The mocked clock.
+
+    """
+    breaker = CircuitBreaker(
+        "/api/v1/threads",
+        CircuitBreakerConfig(
+            window_size=TEST_CONFIG.window_size,
+            minimum_calls=TEST_CONFIG.minimum_calls,
+            open_duration=TEST_CONFIG.open_duration,
+            half_open_max_calls=2,
+        ),
+    )
+    open_circuit(breaker, clock)
+
+    with breaker.guard() as probe:
+        call(breaker, 503)
+        assert breaker.get_stats().state is CircuitState.OPEN
+        probe.status_code = 200
+    assert breaker.get_stats().state is CircuitState.OPEN
+
+
+@patch("liminal.circuit_breaker.time.monotonic", return_value=0.0)
+def test_calls_sent_before_opening(clock: Mock) -> None:
+    """Test that calls that were sent before a circuit opened are ignored.
+
+    Args:
+    ----
+        clock: The mocked clock.
+
+    """
+    breaker = CircuitBreaker("/api/v1/threads", TEST_CONFIG)
+
+    with breaker.guard() as slow_call:
+        call(breaker, 503)
+        call(breaker, 503)
+        assert breaker.get_stats().state is CircuitState.OPEN
+        slow_call.status_code = 200
+    assert breaker.get_stats().state is CircuitState.OPEN
+
+    clock.return_value = TEST_CONFIG.open_duration
+    call(breaker, 200)
+    assert breaker.get_stats().state is CircuitState.CLOSED
+
+
+@patch("liminal.circuit_breaker.time.monotonic", return_value=0.0)
+def test_slow_calls(clock: Mock) -> None:
+    """Test that slow calls count as failures (unless latency is not checked).
+
+    Args:
+    ----
+        clock: The mocked clock.
+
+    """
+    breaker = CircuitBreaker("/api/v1/threads", TEST_CONFIG)
+
+    for check_latency in (False, True):
+        with breaker.guard(check_latency=check_latency) as slow_call:
+            clock.return_value += TEST_CONFIG.slow_call_duration
+            slow_call.status_code = 200
+
+    stats = breaker.get_stats()
+    assert stats.calls == 2
+    assert stats.failures == 1
+
+
+@pytest.mark.asyncio
+async def test_client_fails_fast() -> None:
+    """Test that the client fails fast once an endpoint's circuit opens."""
+    requests: list[httpx.Request] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        return httpx.Response(503, content=b"Service Unavailable")
+
+    async with httpx.AsyncClient(
+        transport=httpx.MockTransport(handler)
+    ) as httpx_client:
+        client = Client(
+            TEST_API_SERVER_URL,
+            httpx_client=httpx_client,
+            circuit_breaker_config=TEST_CONFIG,
+            retry_policy=RetryPolicy(max_attempts=1),
+        )
+
+        for thread_id in (1, 2):
+            with pytest.raises(LiminalError, match="Service Unavailable"):
+                await client._request("GET", f"/api/v1/threads/{thread_id}")
+        with pytest.raises(CircuitOpenError):
+            await client._request("GET", "/api/v1/threads/3")
+
+        with pytest.raises(LiminalError, match="Service Unavailable"):
+            _ = [
+                chunk
+                async for chunk in client._stream("POST", "/api/v1/prompts/submit")
+            ]
+
+    assert len(requests) == 3
+
+    stats = client.get_circuit_breaker_stats()
+    assert stats["/api/v1/threads/{id}"].state is CircuitState.OPEN
+    assert stats["/api/v1/threads/{id}"].rejected_calls == 1
+    assert stats["/api/v1/prompts/submit"].state is CircuitState.CLOSED
+    assert stats["/api/v1/prompts/submit"].failures == 1
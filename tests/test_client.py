@@ -2,16 +2,23 @@
 
 from __future__ import annotations
 
+import asyncio
 import json
-from typing import NamedTuple
+from typing import Any, NamedTuple
 
+import httpx
 import pytest
 from pytest_httpx import HTTPXMock
 
 from liminal import Client
 from liminal.auth.microsoft.device_code_flow import DeviceCodeFlowProvider
 from liminal.errors import RequestError
-from tests.common import TEST_API_SERVER_URL, TEST_CLIENT_ID, TEST_TENANT_ID
+from tests.common import (
+    TEST_API_SERVER_URL,
+    TEST_CLIENT_ID,
+    TEST_HTTPX_DEFAULT_TIMEOUT,
+    TEST_TENANT_ID,
+)
 
 
 @pytest.mark.asyncio
@@ -49,9 +56,142 @@ async def test_bad_endpoint_generated_client(
 
     """
     microsoft_auth_provider = DeviceCodeFlowProvider(TEST_TENANT_ID, TEST_CLIENT_ID)
-    _ = await Client.authenticate_from_auth_provider(
+    client = await Client.authenticate_from_auth_provider(
         TEST_API_SERVER_URL, microsoft_auth_provider
     )
+    await client.aclose()
+
+
+@pytest.mark.asyncio
+async def test_owned_connection_pool(
+    httpx_mock: HTTPXMock, model_instances_response: dict[str, Any]
+) -> None:
+    """Test that an internally generated HTTPX AsyncClient is reused and closed.
+
+    Args:
+    ----
+        httpx_mock: The HTTPX mock fixture.
+        model_instances_response: A model instances response.
+
+    """
+    httpx_mock.add_response(
+        method="GET",
+        url=f"{TEST_API_SERVER_URL}/api/v1/model-instances",
+        json=model_instances_response,
+        is_reusable=True,
+    )
+
+    async with Client(TEST_API_SERVER_URL) as client:
+        _ = await client.llm.get_available_model_instances()
+        httpx_client = client._owned_httpx_client
+        assert httpx_client is not None
+
+        _ = await client.llm.get_available_model_instances()
+        assert client._owned_httpx_client is httpx_client
+
+    assert httpx_client.is_closed
+
+    # The client can still be used after being closed (with a new pool):
+    _ = await client.llm.get_available_model_instances()
+    assert client._owned_httpx_client is not None
+    assert client._owned_httpx_client is not httpx_client
+    await client.aclose()
+
+
+@pytest.mark.asyncio
+async def test_provided_connection_pool(
+    httpx_mock: HTTPXMock, model_instances_response: dict[str, Any]
+) -> None:
+    """Test that a provided HTTPX AsyncClient is used but never closed.
+
+    Args:
+    ----
+        httpx_mock: The HTTPX mock fixture.
+        model_instances_response: A model instances response.
+
+    """
+    httpx_mock.add_response(
+        method="GET",
+        url=f"{TEST_API_SERVER_URL}/api/v1/model-instances",
+        json=model_instances_response,
+        is_reusable=True,
+    )
+
+    async with httpx.AsyncClient(timeout=TEST_HTTPX_DEFAULT_TIMEOUT) as httpx_client:
+        async with Client(TEST_API_SERVER_URL, httpx_client=httpx_client) as client:
+            _ = await client.llm.get_available_model_instances()
+            assert client._get_httpx_client() is httpx_client
+        assert not httpx_client.is_closed
+
+    # If the provided client is closed, the client falls back to its own pool:
+    _ = await client.llm.get_available_model_instances()
+    assert client._owned_httpx_client is not None
+    await client.aclose()
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    ("coalesce_requests", "expected_requests"), [(True, 1), (False, 3)]
+)
+async def test_request_coalescing(
+    coalesce_requests: bool,
+    expected_requests: int,
+    httpx_mock: HTTPXMock,
+    model_instances_response: dict[str, Any],
+) -> None:
+    """Test that identical concurrent GET requests share one network call.
+
+    Args:
+    ----
+        coalesce_requests: Whether requests should be coalesced.
+        expected_requests: The number of requests that should be sent.
+        httpx_mock: The HTTPX mock fixture.
+        model_instances_response: A model instances response.
+
+    """
+    httpx_mock.add_response(
+        method="GET",
+        url=f"{TEST_API_SERVER_URL}/api/v1/model-instances",
+        json=model_instances_response,
+        is_reusable=True,
+    )
+
+    async with Client(
+        TEST_API_SERVER_URL, coalesce_requests=coalesce_requests
+    ) as client:
+        results = await asyncio.gather(
+            *(client.llm.get_available_model_instances() for _ in range(3))
+        )
+
+    assert len(httpx_mock.get_requests()) == expected_requests
+    assert (results[0] is results[1]) is coalesce_requests
+
+
+@pytest.mark.asyncio
+async def test_request_coalescing_keys(httpx_mock: HTTPXMock) -> None:
+    """Test that only identical GET requests are coalesced.
+
+    Args:
+    ----
+        httpx_mock: The HTTPX mock fixture.
+
+    """
+    httpx_mock.add_response(json={}, is_reusable=True)
+
+    async with Client(TEST_API_SERVER_URL) as client:
+        _ = await asyncio.gather(
+            client._request_and_validate("GET", "/api/v1/threads", dict),
+            client._request_and_validate(
+                "GET", "/api/v1/threads", dict, params={"limit": "10"}
+            ),
+            client._request_and_validate(
+                "GET", "/api/v1/threads", dict, headers={"x-header": "value"}
+            ),
+            client._request_and_validate("POST", "/api/v1/threads", dict),
+            client._request_and_validate("POST", "/api/v1/threads", dict),
+        )
+
+    assert len(httpx_mock.get_requests()) == 5
 
 
 class UnexpectedResponseTest(NamedTuple):
@@ -0,0 +1,285 @@
+"""Define concurrency limiter tests."""
+
+from __future__ import annotations
+
+import asyncio
+
+import httpx
+import pytest
+
+from liminal import Client
+from liminal.circuit_breaker import CircuitBreakerConfig, CircuitState
+from liminal.errors import LiminalError, RequestError
+from liminal.limiter import AdaptiveLimiter, ConcurrencyLimitConfig
+from liminal.retry import RetryPolicy
+from liminal.transport import Call
+from tests.common import TEST_API_SERVER_URL
+
+
+async def complete(
+    limiter: AdaptiveLimiter, status_code: int | None, *, check_latency: bool = True
+) -> None:
+    """Complete a request through a limiter.
+
+    Args:
+    ----
+        limiter: The limiter.
+        status_code: The status the request responds with (or None if it is
+            abandoned).
+        check_latency: Whether the request's latency adapts the limit.
+
+    """
+    call = Call()
+    async with limiter.acquire(call, "/api/v1/threads", check_latency=check_latency):
+        call.status_code = status_code
+
+
+def test_invalid_config() -> None:
+    """Test that invalid configurations are rejected."""
+    with pytest.raises(LiminalError, match="Invalid concurrency limits"):
+        _ = ConcurrencyLimitConfig(min_limit=10, initial_limit=5)
+    with pytest.raises(LiminalError, match="Invalid backoff ratio"):
+        _ = ConcurrencyLimitConfig(backoff_ratio=1.0)
+
+
+@pytest.mark.asyncio
+async def test_additive_increase() -> None:
+    """Test that the limit grows by one for every limit's worth of successes."""
+    limiter = AdaptiveLimiter(ConcurrencyLimitConfig(initial_limit=2, max_limit=3))
+
+    await complete(limiter, 200)
+    await complete(limiter, 404, check_latency=False)
+    assert limiter.limit == 2
+    await complete(limiter, 200)
+    assert limiter.limit == 3
+
+    # Abandoned requests do not change the limit (which is bounded):
+    await complete(limiter, None)
+    for _ in range(10):
+        await complete(limiter, 200, check_latency=False)
+    assert limiter.limit == 3
+
+
+@pytest.mark.asyncio
+async def test_multiplicative_decrease() -> None:
+    """Test that the limit shrinks when the server is overloaded."""
+    limiter = AdaptiveLimiter(
+        ConcurrencyLimitConfig(initial_limit=10, min_limit=5, backoff_ratio=0.5)
+    )
+
+    await complete(limiter, 429)
+    assert limiter.limit == 5
+
+    # The limit is bounded:
+    await complete(limiter, 503)
+    assert limiter.limit == 5
+
+    limiter = AdaptiveLimiter(
+        ConcurrencyLimitConfig(initial_limit=10, backoff_ratio=0.5)
+    )
+    with pytest.raises(httpx.ReadTimeout):
+        async with limiter.acquire(Call(), "/api/v1/threads"):
+            msg = "Timed out"
+            raise httpx.ReadTimeout(msg)
+    assert limiter.limit == 5
+
+
+def test_latency_spikes() -> None:
+    """Test that the limit shrinks on latency spikes (relative to the baseline)."""
+    limiter = AdaptiveLimiter(
+        ConcurrencyLimitConfig(
+            initial_limit=10, backoff_ratio=0.5, latency_tolerance=2.0
+        )
+    )
+
+    limiter._record_success("/api/v1/threads", 0.1, 0)
+    limiter._record_success("/api/v1/threads", 0.15, 0)
+    assert limiter.limit == 10
+
+    limiter._record_success("/api/v1/threads", 0.5, 0)
+    assert limiter.limit == 5
+
+    # Each endpoint has its own baseline:
+    limiter._record_success("/api/v1/prompts/submit", 2.0, 1)
+    limiter._record_success("/api/v1/prompts/submit", 2.5, 1)
+    assert limiter.limit == 5
+
+
+def test_sustained_latency_shift() -> None:
+    """Test that a sustained latency shift becomes the new baseline."""
+    limiter = AdaptiveLimiter()
+    window = 0
+
+    for _ in range(50):
+        limiter._record_success("/api/v1/threads", 0.02, window)
+    limit = limiter.limit
+
+    # The limit shrinks (once per window) only while the baseline catches up:
+    for _ in range(10):
+        limiter._record_success("/api/v1/threads", 1.5, window)
+        window = limiter._window
+    shrunk = limiter.limit
+    assert 1 < shrunk < limit
+
+    # Then it recovers:
+    for _ in range(200):
+        limiter._record_success("/api/v1/threads", 1.5, window)
+    assert limiter._latency_baselines["/api/v1/threads"] == pytest.approx(1.5)
+    assert limiter.limit > shrunk
+
+
+@pytest.mark.asyncio
+async def test_decrease_once_per_window() -> None:
+    """Test that a burst of overload signals only shrinks the limit once."""
+    limiter = AdaptiveLimiter(
+        ConcurrencyLimitConfig(initial_limit=10, backoff_ratio=0.5)
+    )
+    release = asyncio.Event()
+
+    async def request() -> None:
+        call = Call()
+        async with limiter.acquire(call, "/api/v1/threads"):
+            await release.wait()
+            call.status_code = 429
+
+    tasks = [asyncio.create_task(request()) for _ in range(5)]
+    await asyncio.sleep(0)
+    release.set()
+    await asyncio.gather(*tasks)
+    assert limiter.limit == 5
+
+    # Requests that start after the limit shrank can shrink it again:
+    await complete(limiter, 503)
+    assert limiter.limit == 2
+
+
+@pytest.mark.asyncio
+async def test_queueing() -> None:
+    """Test that requests beyond the limit wait (in order) for a place."""
+    limiter = AdaptiveLimiter(ConcurrencyLimitConfig(initial_limit=1))
+    order: list[int] = []
+    release = asyncio.Event()
+
+    async def request(index: int) -> None:
+        call = Call()
+        async with limiter.acquire(call, "/api/v1/threads", check_latency=False):
+            order.append(index)
+            await release.wait()
+
+    tasks = [asyncio.create_task(request(index)) for index in range(3)]
+    await asyncio.sleep(0.01)
+
+    stats = limiter.get_stats()
+    assert stats.limit == 1
+    assert stats.in_flight_requests == 1
+    assert stats.queued_requests == 2
+    assert order == [0]
+
+    release.set()
+    await asyncio.gather(*tasks)
+    assert order == [0, 1, 2]
+
+    stats = limiter.get_stats()
+    assert stats.in_flight_requests == 0
+    assert stats.queued_requests == 0
+    assert stats.max_queue_wait >= 0.01
+    assert 0.0 < stats.average_queue_wait < stats.max_queue_wait
+
+
+@pytest.mark.asyncio
+async def test_cancelled_while_queued() -> None:
+    """Test that requests that are cancelled while waiting give up their place."""
+    limiter = AdaptiveLimiter(ConcurrencyLimitConfig(initial_limit=1))
+    assert limiter.get_stats().average_queue_wait == 0.0
+
+    await limiter._acquire()
+
+    # A request that is cancelled while it waits leaves the queue:
+    waiting = asyncio.create_task(limiter._acquire())
+    await asyncio.sleep(0)
+    waiting.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await waiting
+    assert limiter.get_stats().queued_requests == 0
+
+    # A request that is cancelled just as it is let in gives its place back:
+    let_in = asyncio.create_task(limiter._acquire())
+    await asyncio.sleep(0)
+    limiter._release()
+    let_in.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await let_in
+    assert limiter.get_stats().in_flight_requests == 0
+
+    # A request that is cancelled after it is skipped is not let in again:
+    await limiter._acquire()
+    skipped = asyncio.create_task(limiter._acquire())
+    await asyncio.sleep(0)
+    skipped.cancel()
+    limiter._wake_waiters()
+    with pytest.raises(asyncio.CancelledError):
+        await skipped
+    assert limiter.get_stats().in_flight_requests == 1
+
+
+@pytest.mark.asyncio
+async def test_client_adapts_to_overload() -> None:
+    """Test that the client's limit shrinks when the server is overloaded."""
+    async with httpx.AsyncClient(
+        transport=httpx.MockTransport(
+            lambda _: httpx.Response(429, content=b"Slow Down")
+        )
+    ) as httpx_client:
+        client = Client(
+            TEST_API_SERVER_URL,
+            httpx_client=httpx_client,
+            concurrency_limit_config=ConcurrencyLimitConfig(
+                initial_limit=10, backoff_ratio=0.5
+            ),
+            retry_policy=RetryPolicy(max_attempts=1),
+        )
+
+        with pytest.raises(RequestError, match="Slow Down"):
+            await client._request("GET", "/api/v1/threads")
+        with pytest.raises(RequestError, match="Slow Down"):
+            _ = [
+                chunk
+                async for chunk in client._stream("POST", "/api/v1/prompts/submit")
+            ]
+
+    stats = client.get_concurrency_stats()
+    assert stats.limit == 2
+    assert stats.in_flight_requests == 0
+
+
+@pytest.mark.asyncio
+async def test_queue_wait_is_not_latency() -> None:
+    """Test that time spent waiting for the limit doesn't make requests slow."""
+
+    async def handler(_: httpx.Request) -> httpx.Response:
+        await asyncio.sleep(0.03)
+        return httpx.Response(200, json={"data": []})
+
+    async with httpx.AsyncClient(
+        transport=httpx.MockTransport(handler)
+    ) as httpx_client:
+        client = Client(
+            TEST_API_SERVER_URL,
+            httpx_client=httpx_client,
+            circuit_breaker_config=CircuitBreakerConfig(
+                slow_call_duration=0.1, minimum_calls=5
+            ),
+            concurrency_limit_config=ConcurrencyLimitConfig(
+                initial_limit=1, max_limit=1
+            ),
+        )
+
+        # Each request waits for the ones before it (for up to 0.12 seconds):
+        _ = await asyncio.gather(
+            *(client._request("GET", "/api/v1/threads") for _ in range(5))
+        )
+
+    stats = client.get_circuit_breaker_stats()["/api/v1/threads"]
+    assert stats.state is CircuitState.CLOSED
+    assert stats.calls == 5
+    assert stats.failures == 0
@@ -2,6 +2,8 @@
 
 from __future__ import annotations
 
+import asyncio
+from copy import deepcopy
 from datetime import UTC, datetime
 from typing import Any, NamedTuple
 
@@ -9,9 +11,13 @@ import pytest
 from pytest_httpx import HTTPXMock
 
 from liminal import Client
+from liminal.endpoints.llm.catalog import ModelInstanceCatalogConfig
 from liminal.errors import ModelInstanceUnknownError
+from liminal.retry import RetryPolicy
 from tests.common import TEST_API_SERVER_URL
 
+MODEL_INSTANCES_URL = f"{TEST_API_SERVER_URL}/api/v1/model-instances"
+
 
 @pytest.mark.asyncio
 async def test_get_available_model_instances(
@@ -105,3 +111,148 @@ async def test_get_model_instance_by_name(
             ModelInstanceUnknownError, match="Unknown model instance name"
         ):
             await mock_client.llm.get_model_instance(model_instance_name)
+
+
+@pytest.mark.asyncio
+async def test_get_model_instance_by_id(
+    httpx_mock: HTTPXMock, mock_client: Client, model_instances_response: dict[str, Any]
+) -> None:
+    """Test getting model instances by ID (from a single catalog fetch).
+
+    Args:
+    ----
+        httpx_mock: The HTTPX mock fixture.
+        mock_client: A mock Liminal client.
+        model_instances_response: A model instances response.
+
+    """
+    httpx_mock.add_response(
+        method="GET",
+        url=f"{TEST_API_SERVER_URL}/api/v1/model-instances",
+        json=model_instances_response,
+    )
+
+    instance = await mock_client.llm.get_model_instance_by_id(1)
+    assert instance.name == "GPT3.5"
+    assert await mock_client.llm.get_model_instance("GPT3.5") is instance
+
+    # Model instances without connections (or that don't exist) are unknown:
+    for model_instance_id in (2, 3):
+        with pytest.raises(
+            ModelInstanceUnknownError, match="Unknown model instance ID"
+        ):
+            await mock_client.llm.get_model_instance_by_id(model_instance_id)
+
+
+@pytest.mark.asyncio
+async def test_model_instance_catalog_invalidation(
+    httpx_mock: HTTPXMock, mock_client: Client, model_instances_response: dict[str, Any]
+) -> None:
+    """Test that the catalog is refreshed after being invalidated.
+
+    Args:
+    ----
+        httpx_mock: The HTTPX mock fixture.
+        mock_client: A mock Liminal client.
+        model_instances_response: A model instances response.
+
+    """
+    httpx_mock.add_response(
+        method="GET",
+        url=f"{TEST_API_SERVER_URL}/api/v1/model-instances",
+        json=model_instances_response,
+        is_reusable=True,
+    )
+
+    # Fetching every model instance fills the catalog:
+    _ = await mock_client.llm.get_available_model_instances()
+    _ = await mock_client.llm.get_model_instance("GPT3.5")
+    assert len(httpx_mock.get_requests(url=MODEL_INSTANCES_URL)) == 1
+
+    mock_client.llm.invalidate_model_instances()
+    _ = await mock_client.llm.get_model_instance("GPT3.5")
+    assert len(httpx_mock.get_requests(url=MODEL_INSTANCES_URL)) == 2
+
+
+@pytest.mark.asyncio
+async def test_model_instance_catalog_expiry(
+    httpx_mock: HTTPXMock, model_instances_response: dict[str, Any]
+) -> None:
+    """Test that an expired catalog is refreshed before it is used.
+
+    Args:
+    ----
+        httpx_mock: The HTTPX mock fixture.
+        model_instances_response: A model instances response.
+
+    """
+    httpx_mock.add_response(
+        method="GET",
+        url=f"{TEST_API_SERVER_URL}/api/v1/model-instances",
+        json=model_instances_response,
+        is_reusable=True,
+    )
+
+    async with Client(
+        TEST_API_SERVER_URL,
+        model_instance_catalog_config=ModelInstanceCatalogConfig(ttl=0, max_stale=0),
+    ) as client:
+        for _ in range(2):
+            _ = await client.llm.get_model_instance("GPT3.5")
+
+    assert len(httpx_mock.get_requests()) == 2
+
+
+@pytest.mark.asyncio
+async def test_model_instance_catalog_stale_while_revalidate(
+    caplog: pytest.LogCaptureFixture,
+    httpx_mock: HTTPXMock,
+    model_instances_response: dict[str, Any],
+) -> None:
+    """Test that a stale catalog is used while it is refreshed in the background.
+
+    Args:
+    ----
+        caplog: The caplog fixture.
+        httpx_mock: The HTTPX mock fixture.
+        model_instances_response: A model instances response.
+
+    """
+    renamed_response = deepcopy(model_instances_response)
+    renamed_response["data"][0]["name"] = "GPT3.5-renamed"
+
+    httpx_mock.add_response(
+        method="GET",
+        url=f"{TEST_API_SERVER_URL}/api/v1/model-instances",
+        json=model_instances_response,
+    )
+    httpx_mock.add_response(
+        method="GET",
+        url=f"{TEST_API_SERVER_URL}/api/v1/model-instances",
+        json=renamed_response,
+    )
+    httpx_mock.add_response(
+        method="GET",
+        url=f"{TEST_API_SERVER_URL}/api/v1/model-instances",
+        status_code=503,
+        is_reusable=True,
+    )
+
+    async with Client(
+        TEST_API_SERVER_URL,
+        model_instance_catalog_config=ModelInstanceCatalogConfig(ttl=0),
+        retry_policy=RetryPolicy(max_attempts=1),
+    ) as client:
+        _ = await client.llm.get_model_instance("GPT3.5")
+
+        # The stale catalog is used (while it is refreshed in the background):
+        _ = await client.llm.get_model_instance("GPT3.5")
+        await asyncio.sleep(0.01)
+        assert len(httpx_mock.get_requests()) == 2
+
+        # If a background refresh fails, the stale catalog is still used:
+        instance = await client.llm.get_model_instance("GPT3.5-renamed")
+        await asyncio.sleep(0.01)
+        assert await client.llm.get_model_instance_by_id(1) is instance
+
+    assert "Could not refresh the model instance catalog" in caplog.text
@@ -2,58 +2,1452 @@
 
 from __future__ import annotations
 
+import asyncio
+from collections.abc import AsyncIterator
+from dataclasses import replace
+from functools import partial
+import json
+import multiprocessing
+from pathlib import Path
+import random
+import re
+import sys
 from typing import Any, NamedTuple
-from unittest.mock import Mock
+from unittest.mock import AsyncMock, Mock, patch
 
 from _pytest.mark.structures import ParameterSet
+from cryptography.fernet import Fernet
+import httpx
 import pytest
 from pytest_httpx import HTTPXMock, IteratorStream
 
 from liminal import Client
-from liminal.endpoints.prompt.models import StreamResponseChunk
+from liminal.const import SOURCE
+from liminal.endpoints.prompt.cache import AnalyzeCache, AnalyzeCacheConfig
+from liminal.endpoints.prompt.disk_cache import DiskCache, DiskCacheConfig
+from liminal.endpoints.prompt.document import (
+    DocumentAnalysisConfig,
+    merge_findings,
+    split_document,
+)
+from liminal.endpoints.prompt.hydrator import LocalHydrator
+from liminal.endpoints.prompt.incremental import IncrementalAnalysisConfig
+from liminal.endpoints.prompt.models import (
+    AnalysisFinding,
+    AnalysisFindings,
+    CleanseData,
+    CleansedToken,
+    StreamResponseChunk,
+)
+from liminal.endpoints.prompt.pipeline import PromptPipelineConfig
+from liminal.endpoints.prompt.schemas import AnalyzeResponse, CleanseResponse
+from liminal.endpoints.prompt.table import FindingsTable
+from liminal.errors import LiminalError, RequestError
 from tests.common import TEST_API_SERVER_URL
 
+ANALYZE_URL = f"{TEST_API_SERVER_URL}/api/v1/prompts/analyze"
+CLEANSE_URL = f"{TEST_API_SERVER_URL}/api/v1/prompts/cleanse"
+HYDRATE_URL = f"{TEST_API_SERVER_URL}/api/v1/prompts/hydrate"
+SUBMIT_URL = f"{TEST_API_SERVER_URL}/api/v1/prompts/submit"
+
+PROMPT = (
+    "Write a short marketing email for a banking customer Jane Gansbuhler, whose email "
+    "address is egansbuhler0@pinterest.com and who lives at 14309 Lindbergh Circle "
+    "Alexander City Alabama. Jane was born on 6/5/1961 and identifies as Female"
+)
+
+
+def analyze_locally(text: str) -> list[dict[str, Any]]:
+    """Find names and addresses in text (as the analyze endpoint would).
+
+    Args:
+    ----
+        text: The text to analyze.
+
+    Returns:
+    -------
+        The findings (as the analyze endpoint returns them).
+
+    """
+    return [
+        {
+            "customTerm": None,
+            "end": match.end(),
+            "policyAction": "redact",
+            "score": 1,
+            "scoreCategory": "VERY LIKELY",
+            "start": match.start(),
+            "text": match.group(),
+            "type": "PERSON" if match.group().startswith("Jane") else "LOCATION",
+        }
+        for match in re.finditer(r"Jane(?: Gansbuhler)?|\d+ Lindbergh Circle", text)
+    ]
+
+
+async def fetch(findings: AnalysisFindings) -> AnalysisFindings:
+    """Fetch findings (for the analyze cache).
+
+    Args:
+    ----
+        findings: The findings to return.
+
+    Returns:
+    -------
+        The findings.
+
+    """
+    return findings
+
+
+@pytest.mark.asyncio
+async def test_analyze(
+    httpx_mock: HTTPXMock, mock_client: Client, prompt_analyze_response: dict[str, Any]
+) -> None:
+    """Test the analyze endpoint.
+
+    Args:
+    ----
+        httpx_mock: The HTTPX mock fixture.
+        mock_client: A mock Liminal client.
+        prompt_analyze_response: An analyze response.
+
+    """
+    httpx_mock.add_response(
+        method="POST",
+        url=f"{TEST_API_SERVER_URL}/api/v1/prompts/analyze",
+        json=prompt_analyze_response,
+    )
+
+    findings = await mock_client.prompt.analyze(
+        123,
+        (
+            "Write a short marketing email for a banking customer Jane Gansbuhler, "
+            "whose email address is egansbuhler0@pinterest.com and who lives at 14309 "
+            "Lindbergh Circle Alexander City Alabama. Jane was born on 6/5/1961 and "
+            "identifies as Female"
+        ),
+    )
+    assert len(findings.findings) == 5
+
+
+@pytest.mark.asyncio
+async def test_analyze_many(
+    httpx_mock: HTTPXMock, mock_client: Client, prompt_analyze_response: dict[str, Any]
+) -> None:
+    """Test analyzing many prompts (capturing per-prompt errors).
+
+    Args:
+    ----
+        httpx_mock: The HTTPX mock fixture.
+        mock_client: A mock Liminal client.
+        prompt_analyze_response: An analyze response.
+
+    """
+    for prompt in ("Hello", "World"):
+        httpx_mock.add_response(
+            method="POST",
+            url=f"{TEST_API_SERVER_URL}/api/v1/prompts/analyze",
+            match_json={"modelInstanceId": 123, "source": SOURCE, "text": prompt},
+            json=prompt_analyze_response,
+        )
+    httpx_mock.add_response(
+        method="POST",
+        url=f"{TEST_API_SERVER_URL}/api/v1/prompts/analyze",
+        match_json={"modelInstanceId": 123, "source": SOURCE, "text": "Oops"},
+        content=b"Bad Request",
+        status_code=400,
+    )
+
+    results = [
+        result
+        async for result in mock_client.prompt.analyze_many(
+            123, ["Hello", "Oops", "World"], concurrency=2
+        )
+    ]
+    assert [result.index for result in results] == [0, 1, 2]
+    assert [result.prompt for result in results] == ["Hello", "Oops", "World"]
+
+    assert results[0].findings
+    assert len(results[0].findings.findings) == 5
+    assert results[0].error is None
+
+    assert results[1].findings is None
+    assert isinstance(results[1].error, RequestError)
+    assert "Bad Request" in str(results[1].error)
+
+
+@pytest.mark.asyncio
+async def test_analyze_document(httpx_mock: HTTPXMock) -> None:
+    """Test that a document is analyzed in windows (just as it is analyzed whole).
+
+    Args:
+    ----
+        httpx_mock: The HTTPX mock fixture.
+
+    """
+    httpx_mock.add_callback(
+        lambda request: httpx.Response(
+            200,
+            json={
+                "data": {
+                    "findings": analyze_locally(json.loads(request.content)["text"])
+                }
+            },
+        ),
+        method="POST",
+        url=ANALYZE_URL,
+        is_reusable=True,
+    )
+    document = "".join(
+        f"Customer {index} is Jane Gansbuhler, of {index} Lindbergh Circle. "
+        + ("\n\n" if index % 7 == 0 else "")
+        for index in range(200)
+    )
+    config = DocumentAnalysisConfig(window_size=500, overlap=120, concurrency=4)
+
+    async with Client(TEST_API_SERVER_URL) as client:
+        findings = await client.prompt.analyze_document(123, document, config=config)
+        assert len(httpx_mock.get_requests(url=ANALYZE_URL)) == len(
+            split_document(document, config)
+        )
+        assert [finding.to_dict() for finding in findings.findings] == [
+            AnalysisFinding.from_dict(finding).to_dict()
+            for finding in analyze_locally(document)
+        ]
+        for finding in findings.findings:
+            assert document[finding.start : finding.end] == finding.text
+
+        # Documents that fit in a window are analyzed whole:
+        findings = await client.prompt.analyze_document(123, "Hi, Jane")
+        assert [finding.text for finding in findings.findings] == ["Jane"]
+        assert httpx_mock.get_requests(url=ANALYZE_URL)[-1].content.endswith(
+            b'"Hi, Jane"}'
+        )
+
+
+@pytest.mark.parametrize(
+    ("kwargs", "error"),
+    [
+        ({"window_size": 0}, "Invalid window size: 0"),
+        ({"window_size": 100, "overlap": 50}, "Invalid window overlap: 50"),
+        ({"overlap": -1}, "Invalid window overlap: -1"),
+        ({"concurrency": 0}, "Invalid concurrency: 0"),
+    ],
+)
+def test_analyze_document_invalid_config(kwargs: dict[str, int], error: str) -> None:
+    """Test that invalid document analysis configurations are rejected.
+
+    Args:
+    ----
+        kwargs: The configuration.
+        error: The expected error.
+
+    """
+    with pytest.raises(LiminalError, match=error):
+        _ = DocumentAnalysisConfig(**kwargs)
+
+
+def test_split_document() -> None:
+    """Test that documents are split on the safest boundaries available."""
+    config = DocumentAnalysisConfig(window_size=20, overlap=5)
+
+    # Without boundaries, windows are split anywhere (overlapping by the overlap):
+    document = "x" * 50
+    windows = split_document(document, config)
+    assert windows == [slice(0, 20), slice(15, 35), slice(30, 50)]
+
+    # Paragraphs are preferred to words (and windows only start on a boundary if
+    # there is one within the overlap):
+    document = "abcdefghijklmn\n\nopq rstuvwxyz" * 2
+    windows = split_document(document, config)
+    assert windows == [slice(0, 16), slice(11, 31), slice(26, 45), slice(40, 58)]
+    assert document[windows[2]].endswith("\n\n")
+
+
+def test_merge_findings() -> None:
+    """Test that findings in overlapping windows are deduplicated."""
+
+    def finding(start: int, end: int, finding_type: str = "PERSON") -> AnalysisFinding:
+        return AnalysisFinding(
+            custom_term="",
+            end=end,
+            policy_action="redact",
+            score=1.0,
+            score_category="VERY LIKELY",
+            start=start,
+            text="",
+            type=finding_type,
+        )
+
+    merged = merge_findings(
+        [
+            # The first window cuts off a name (at 15) that the second finds whole:
+            (
+                slice(0, 15),
+                [
+                    finding(0, 4),
+                    finding(11, 15),
+                    finding(12, 14, "DATE"),
+                    finding(13, 15, "LOCATION"),
+                ],
+            ),
+            (
+                slice(10, 30),
+                [
+                    finding(1, 9),
+                    finding(2, 4, "DATE"),
+                    finding(4, 10, "LOCATION"),
+                    finding(15, 19),
+                ],
+            ),
+            # Overlapping findings from the same window are kept:
+            (slice(20, 50), [finding(5, 9), finding(20, 24), finding(22, 26)]),
+        ]
+    )
+    assert [(item.start, item.end, item.type) for item in merged] == [
+        (0, 4, "PERSON"),
+        (11, 19, "PERSON"),
+        (12, 14, "DATE"),
+        (14, 20, "LOCATION"),
+        (25, 29, "PERSON"),
+        (40, 44, "PERSON"),
+        (42, 46, "PERSON"),
+    ]
+
+
+def test_findings_table() -> None:
+    """Test the columnar findings table and its queries."""
+    rng = random.Random(0)  # noqa: S311
+    findings = []
+    for _ in range(500):
+        start = rng.randrange(1000)
+        findings.append(
+            AnalysisFinding(
+                custom_term="None",
+                end=start + rng.randrange(1, 40),
+                policy_action=rng.choice(["redact", "allow"]),
+                score=rng.random(),
+                score_category="VERY LIKELY",
+                start=start,
+                text=f"text {start}",
+                type=rng.choice(["PERSON", "LOCATION", "DATE"]),
+            )
+        )
+    table = FindingsTable.from_findings(AnalysisFindings(findings=findings))
+    ordered = sorted(findings, key=lambda finding: (finding.start, finding.end))
+
+    assert len(table) == len(findings)
+    assert table.to_findings() == AnalysisFindings(findings=ordered)
+    assert table[3] == ordered[3]
+    assert list(table.starts) == [finding.start for finding in ordered]
+    assert list(table.ends) == [finding.end for finding in ordered]
+    assert list(table.scores) == [finding.score for finding in ordered]
+    assert table.types == tuple(finding.type for finding in ordered)
+    assert table.policy_actions == tuple(finding.policy_action for finding in ordered)
+    # Repeated strings are stored once:
+    assert len({id(finding_type) for finding_type in table.types}) == 3
+    with pytest.raises(TypeError):
+        table.starts[0] = 0
+
+    for start, end in [(0, 0), (100, 100), (100, 140), (500, 510), (990, 1100)]:
+        assert list(table.overlapping(start, end)) == [
+            finding
+            for finding in ordered
+            if finding.start < end and finding.end > start
+        ]
+        assert list(table.containing(start, end)) == [
+            finding
+            for finding in ordered
+            if finding.start <= start and finding.end >= end
+        ]
+        assert list(table.within(start, end)) == [
+            finding
+            for finding in ordered
+            if finding.start >= start and finding.end <= end
+        ]
+
+    assert list(
+        table.filter(min_score=0.5, policy_actions={"redact"}, types=["PERSON"])
+    ) == [
+        finding
+        for finding in ordered
+        if finding.score >= 0.5
+        and finding.policy_action == "redact"
+        and finding.type == "PERSON"
+    ]
+    assert list(table.filter()) == ordered
+    # Queries can be chained:
+    assert list(table.filter(types=["DATE"]).overlapping(100, 200)) == [
+        finding
+        for finding in ordered
+        if finding.type == "DATE" and finding.start < 200 and finding.end > 100
+    ]
+    assert len(FindingsTable()) == 0
+    assert len(FindingsTable().overlapping(0, 10)) == 0
+
+
+@pytest.mark.asyncio
+async def test_incremental_analyzer(httpx_mock: HTTPXMock) -> None:
+    """Test that edited text is re-analyzed incrementally (matching a full analysis).
+
+    Args:
+    ----
+        httpx_mock: The HTTPX mock fixture.
+
+    """
+    httpx_mock.add_callback(
+        lambda request: httpx.Response(
+            200,
+            json={
+                "data": {
+                    "findings": analyze_locally(json.loads(request.content)["text"])
+                }
+            },
+        ),
+        method="POST",
+        url=ANALYZE_URL,
+        is_reusable=True,
+    )
+    snippets = ["Jane", " Gansbuhler", " 12", "3 Lindbergh Circle", "\n", " and ", "x"]
+    text = "".join(
+        f"Customer {index} is Jane Gansbuhler, of {index} Lindbergh Circle.\n"
+        for index in range(100)
+    )
+    rng = random.Random(0)  # noqa: S311
+
+    async with Client(TEST_API_SERVER_URL) as client:
+        analyzer = client.prompt.incremental_analyzer(
+            123, config=IncrementalAnalysisConfig(context=20)
+        )
+        for _ in range(200):
+            start = rng.randint(0, len(text))
+            end = min(len(text), start + rng.choice([0, 0, 1, 5, 30]))
+            text = text[:start] + rng.choice([*snippets, ""]) + text[end:]
+
+            findings = await analyzer.analyze(text)
+            assert [finding.to_dict() for finding in findings.findings] == [
+                AnalysisFinding.from_dict(finding).to_dict()
+                for finding in analyze_locally(text)
+            ]
+
+        # Only the first text was analyzed whole:
+        sizes = [
+            len(json.loads(request.content)["text"])
+            for request in httpx_mock.get_requests(url=ANALYZE_URL)
+        ]
+        assert sizes[0] > 5000
+        assert max(sizes[1:]) < 1000
+
+        # Unchanged text isn't re-analyzed:
+        _ = await analyzer.analyze(text)
+        assert len(httpx_mock.get_requests(url=ANALYZE_URL)) == len(sizes)
+
+        # Large edits (and edits after a reset) are analyzed with the whole text:
+        text += text
+        _ = await analyzer.analyze(text)
+        analyzer.reset()
+        findings = await analyzer.analyze(text + "!")
+        assert len(findings.findings) == len(analyze_locally(text))
+        requests = httpx_mock.get_requests(url=ANALYZE_URL)
+        assert [
+            len(json.loads(request.content)["text"]) for request in requests[-2:]
+        ] == [
+            len(text),
+            len(text) + 1,
+        ]
+
+        # Edits next to sensitive data analyze it whole (even with minimal context):
+        analyzer = client.prompt.incremental_analyzer(
+            123, config=IncrementalAnalysisConfig(context=1)
+        )
+        greeting = " Hello there." * 10
+        for previous, text, analyzed in (
+            (f"{greeting} Hi, Jane!", f"{greeting} Hi, Jane Doe!", "Jane Doe!"),
+            (f"Jane{greeting}", f"Jane Doe{greeting}", "Jane Doe Hello"),
+        ):
+            _ = await analyzer.analyze(previous)
+            findings = await analyzer.analyze(text)
+            assert [finding.text for finding in findings.findings] == ["Jane"]
+            requests = httpx_mock.get_requests(url=ANALYZE_URL)
+            assert json.loads(requests[-1].content)["text"] == analyzed
+
+        # An empty text leaves nothing to analyze:
+        findings = await analyzer.analyze("")
+        assert findings.findings == []
+        assert len(httpx_mock.get_requests(url=ANALYZE_URL)) == len(requests)
+
+
+@pytest.mark.parametrize(
+    ("kwargs", "error"),
+    [
+        ({"context": -1}, "Invalid context: -1"),
+        ({"context": 0}, "Invalid context: 0"),
+        ({"max_changed_ratio": 1.5}, "Invalid maximum changed ratio: 1.5"),
+    ],
+)
+def test_incremental_analyzer_invalid_config(
+    kwargs: dict[str, float], error: str
+) -> None:
+    """Test that invalid incremental analysis configurations are rejected.
+
+    Args:
+    ----
+        kwargs: The configuration.
+        error: The expected error.
+
+    """
+    with pytest.raises(LiminalError, match=error):
+        _ = IncrementalAnalysisConfig(**kwargs)  # type: ignore[arg-type]
+
+
+@pytest.mark.asyncio
+async def test_analyze_cache(
+    httpx_mock: HTTPXMock, prompt_analyze_response: dict[str, Any]
+) -> None:
+    """Test that repeated prompts are analyzed from the cache.
+
+    Args:
+    ----
+        httpx_mock: The HTTPX mock fixture.
+        prompt_analyze_response: An analyze response.
+
+    """
+    httpx_mock.add_response(
+        method="POST",
+        url=ANALYZE_URL,
+        json=prompt_analyze_response,
+        is_reusable=True,
+    )
+
+    async with Client(
+        TEST_API_SERVER_URL,
+        analyze_cache_config=AnalyzeCacheConfig(policy_version="1"),
+    ) as client:
+        first = await client.prompt.analyze(123, "Hello")
+        # Every caller gets its own copy (so changing one doesn't change the cache):
+        first.findings.pop()
+        second = await client.prompt.analyze(123, "Hello")
+        assert second is not first
+        assert len(second.findings) == len(first.findings) + 1
+        _ = await client.prompt.analyze(456, "Hello")
+        assert len(httpx_mock.get_requests(url=ANALYZE_URL)) == 2
+
+        # Identical prompts that miss the cache at the same time share one request:
+        _ = await asyncio.gather(
+            *(client.prompt.analyze(123, "World") for _ in range(3))
+        )
+        assert len(httpx_mock.get_requests(url=ANALYZE_URL)) == 3
+
+        stats = client.prompt.get_analyze_cache_stats()
+        assert stats
+        assert stats.hits == 1
+        assert stats.misses == 5
+        assert stats.entries == 3
+        assert stats.size_bytes > 0
+        assert stats.policy_version == "1"
+
+        # A new policy version invalidates every cached finding:
+        client.prompt.invalidate_analyze_cache(policy_version="2")
+        _ = await client.prompt.analyze(123, "Hello")
+        assert len(httpx_mock.get_requests(url=ANALYZE_URL)) == 4
+
+        stats = client.prompt.get_analyze_cache_stats()
+        assert stats
+        assert stats.entries == 1
+        assert stats.policy_version == "2"
+
+
+@pytest.mark.asyncio
+async def test_analyze_cache_disabled(
+    httpx_mock: HTTPXMock, mock_client: Client, prompt_analyze_response: dict[str, Any]
+) -> None:
+    """Test that findings are not cached by default.
+
+    Args:
+    ----
+        httpx_mock: The HTTPX mock fixture.
+        mock_client: A mock Liminal client.
+        prompt_analyze_response: An analyze response.
+
+    """
+    httpx_mock.add_response(
+        method="POST",
+        url=ANALYZE_URL,
+        json=prompt_analyze_response,
+        is_reusable=True,
+    )
+
+    for _ in range(2):
+        _ = await mock_client.prompt.analyze(123, "Hello")
+    assert len(httpx_mock.get_requests(url=ANALYZE_URL)) == 2
+
+    assert mock_client.prompt.get_analyze_cache_stats() is None
+    mock_client.prompt.invalidate_analyze_cache()
+
+
+def test_analyze_cache_invalid_config() -> None:
+    """Test that invalid analyze cache configurations are rejected."""
+    with pytest.raises(LiminalError, match="Invalid maximum cache size: 0"):
+        _ = AnalyzeCacheConfig(max_bytes=0)
+    with pytest.raises(LiminalError, match="Invalid cache TTL: 0"):
+        _ = AnalyzeCacheConfig(ttl=0)
+
+
+@pytest.mark.asyncio
+async def test_analyze_cache_keys(prompt_analyze_response: dict[str, Any]) -> None:
+    """Test that prompts are cached under keyed hashes (rather than in plaintext).
+
+    Args:
+    ----
+        prompt_analyze_response: An analyze response.
+
+    """
+    findings = AnalyzeResponse.from_dict(prompt_analyze_response).data
+    first = AnalyzeCache(AnalyzeCacheConfig(hash_key=b"secret"))
+    second = AnalyzeCache(AnalyzeCacheConfig(hash_key=b"secret"))
+    other = AnalyzeCache()
+
+    for cache in (first, second, other):
+        _ = await cache.get_or_fetch(123, "Hello", partial(fetch, findings))
+    assert list(first._entries) == list(second._entries)
+    assert list(first._entries) != list(other._entries)
+    assert all(b"Hello" not in key for key in first._entries)
+
+
+@pytest.mark.asyncio
+async def test_analyze_cache_eviction(prompt_analyze_response: dict[str, Any]) -> None:
+    """Test that the least recently used findings are evicted to bound the cache.
+
+    Args:
+    ----
+        prompt_analyze_response: An analyze response.
+
+    """
+    findings = AnalyzeResponse.from_dict(prompt_analyze_response).data
+    cache = AnalyzeCache()
+    _ = await cache.get_or_fetch(123, "Hello", partial(fetch, findings))
+    size = cache.get_stats().size_bytes
+
+    cache = AnalyzeCache(AnalyzeCacheConfig(max_bytes=2 * size))
+    for prompt in ("a", "b", "a", "c"):
+        _ = await cache.get_or_fetch(123, prompt, partial(fetch, findings))
+
+    stats = cache.get_stats()
+    assert stats.entries == 2
+    assert stats.size_bytes == 2 * size
+    assert stats.evictions == 1
+
+    # "b" was the least recently used (so it was evicted):
+    _ = await cache.get_or_fetch(123, "a", partial(fetch, findings))
+    _ = await cache.get_or_fetch(123, "b", partial(fetch, findings))
+    assert cache.get_stats().hits == 2
+
+    # Findings that are larger than the cache are never cached:
+    cache = AnalyzeCache(AnalyzeCacheConfig(max_bytes=size - 1))
+    _ = await cache.get_or_fetch(123, "a", partial(fetch, findings))
+    assert cache.get_stats().entries == 0
+
+
+@pytest.mark.asyncio
+async def test_analyze_cache_expiry(prompt_analyze_response: dict[str, Any]) -> None:
+    """Test that findings expire after the TTL.
+
+    Args:
+    ----
+        prompt_analyze_response: An analyze response.
+
+    """
+    findings = AnalyzeResponse.from_dict(prompt_analyze_response).data
+    cache = AnalyzeCache(AnalyzeCacheConfig(ttl=10.0))
+
+    with patch("liminal.endpoints.prompt.cache.time.monotonic", return_value=100.0):
+        _ = await cache.get_or_fetch(123, "Hello", partial(fetch, findings))
+    with patch("liminal.endpoints.prompt.cache.time.monotonic", return_value=110.0):
+        _ = await cache.get_or_fetch(123, "Hello", partial(fetch, findings))
+
+    stats = cache.get_stats()
+    assert stats.hits == 0
+    assert stats.misses == 2
+    assert stats.expirations == 1
+    assert stats.entries == 1
+
+
+@pytest.mark.asyncio
+async def test_analyze_cache_invalidated_while_fetching(
+    prompt_analyze_response: dict[str, Any],
+) -> None:
+    """Test that findings fetched before an invalidation are not cached.
+
+    Args:
+    ----
+        prompt_analyze_response: An analyze response.
+
+    """
+    findings = AnalyzeResponse.from_dict(prompt_analyze_response).data
+    cache = AnalyzeCache()
+    release = asyncio.Event()
+
+    async def slow_fetch() -> AnalysisFindings:
+        await release.wait()
+        return findings
+
+    task = asyncio.create_task(cache.get_or_fetch(123, "Hello", slow_fetch))
+    await asyncio.sleep(0)
+    cache.invalidate()
+    release.set()
+    assert await task == findings
+    assert cache.get_stats().entries == 0
+
+
+@pytest.mark.asyncio
+async def test_cleanse_and_hydrate(
+    httpx_mock: HTTPXMock,
+    mock_client: Client,
+    prompt_analyze_response: dict[str, Any],
+    prompt_cleanse_response: dict[str, Any],
+    prompt_hydrate_response: dict[str, Any],
+) -> None:
+    """Test the cleanse endpoint.
+
+    Args:
+    ----
+        httpx_mock: The HTTPX mock fixture.
+        mock_client: A mock Liminal client.
+        prompt_analyze_response: An analyze response.
+        prompt_cleanse_response: A cleanse response.
+        prompt_hydrate_response: A hydrate response.
+
+    """
+    httpx_mock.add_response(
+        method="POST",
+        url=f"{TEST_API_SERVER_URL}/api/v1/prompts/analyze",
+        json=prompt_analyze_response,
+    )
+    httpx_mock.add_response(
+        method="POST",
+        url=f"{TEST_API_SERVER_URL}/api/v1/prompts/cleanse",
+        json=prompt_cleanse_response,
+    )
+    httpx_mock.add_response(
+        method="POST",
+        url=f"{TEST_API_SERVER_URL}/api/v1/prompts/hydrate",
+        json=prompt_hydrate_response,
+    )
+
+    findings = await mock_client.prompt.analyze(
+        123,
+        (
+            "Write a short marketing email for a banking customer Jane Gansbuhler, "
+            "whose email address is egansbuhler0@pinterest.com and who lives at 14309 "
+            "Lindbergh Circle Alexander City Alabama. Jane was born on 6/5/1961 and "
+            "identifies as Female"
+        ),
+    )
+    assert len(findings.findings) == 5
+
+    cleansed = await mock_client.prompt.cleanse(
+        123,
+        (
+            "Write a short marketing email for a banking customer Jane Gansbuhler, "
+            "whose email address is egansbuhler0@pinterest.com and who lives at 14309 "
+            "Lindbergh Circle Alexander City Alabama. Jane was born on 6/5/1961 and "
+            "identifies as Female"
+        ),
+        findings=findings,
+        thread_id=123,
+    )
+    assert len(cleansed.items) == 5
+    assert len(cleansed.items_hashed) == 5
+    assert cleansed.text == (
+        "Write a short marketing email for a banking customer PERSON_0, whose email "
+        "address is EMAIL_ADDRESS_0 and who lives at LOCATION_0. PERSON_1 was born on "
+        "DATE_0 and identifies as Female"
+    )
+
+    hydrated = await mock_client.prompt.hydrate(
+        123, "Tell PERSON_0 that we are grateful for their business.", thread_id=123
+    )
+    assert len(hydrated.items) == 1
+    assert hydrated.text == (
+        "Tell Jane Gansbuhler that we are grateful for their business."
+    )
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    ("thread_id", "expected_requests"),
+    [
+        # Retrying a request for an existing thread is safe:
+        (123, 2),
+        # Retrying a request that creates a thread could create another:
+        (None, 1),
+    ],
+)
+async def test_hydrate_retry(
+    httpx_mock: HTTPXMock,
+    mock_client: Client,
+    prompt_hydrate_response: dict[str, Any],
+    thread_id: int | None,
+    expected_requests: int,
+) -> None:
+    """Test that hydrate requests are only retried when they can't create a thread.
+
+    Args:
+    ----
+        httpx_mock: The HTTPX mock fixture.
+        mock_client: A mock Liminal client.
+        prompt_hydrate_response: A hydrate response.
+        thread_id: The ID of the thread to hydrate the prompt for.
+        expected_requests: The number of requests that should be sent.
+
+    """
+    httpx_mock.add_exception(httpx.ReadTimeout("Timed out"))
+    httpx_mock.add_response(
+        method="POST",
+        url=f"{TEST_API_SERVER_URL}/api/v1/prompts/hydrate",
+        json=prompt_hydrate_response,
+        is_optional=True,
+    )
+
+    with patch("liminal.client.asyncio.sleep", AsyncMock()):
+        if thread_id is None:
+            with pytest.raises(RequestError, match="Timed out"):
+                await mock_client.prompt.hydrate(123, "Hello", thread_id=thread_id)
+        else:
+            await mock_client.prompt.hydrate(123, "Hello", thread_id=thread_id)
+
+    requests = httpx_mock.get_requests(
+        url=f"{TEST_API_SERVER_URL}/api/v1/prompts/hydrate"
+    )
+    assert len(requests) == expected_requests
+
+
+@pytest.mark.asyncio
+async def test_local_hydrator(
+    httpx_mock: HTTPXMock,
+    mock_client: Client,
+    prompt_cleanse_response: dict[str, Any],
+    prompt_hydrate_response: dict[str, Any],
+) -> None:
+    """Test that text is rehydrated locally (just as the API rehydrates it).
+
+    Args:
+    ----
+        httpx_mock: The HTTPX mock fixture.
+        mock_client: A mock Liminal client.
+        prompt_cleanse_response: A cleanse response.
+        prompt_hydrate_response: A hydrate response.
+
+    """
+    httpx_mock.add_response(
+        method="POST", url=HYDRATE_URL, json=prompt_hydrate_response
+    )
+    prompt = (
+        "Write a short marketing email for a banking customer Jane Gansbuhler, whose "
+        "email address is egansbuhler0@pinterest.com and who lives at 14309 Lindbergh "
+        "Circle Alexander City Alabama. Jane was born on 6/5/1961 and identifies as "
+        "Female"
+    )
+    cleansed = CleanseData.from_dict(prompt_cleanse_response["data"])
+    hydrator = mock_client.prompt.local_hydrator(prompt, cleansed)
+
+    response = "Tell PERSON_0 that we are grateful for their business."
+    assert hydrator.hydrate(response) == await mock_client.prompt.hydrate(
+        123, response, thread_id=123
+    )
+
+    # Both cleansed and hashed tokens are rehydrated:
+    assert hydrator.hydrate(cleansed.text).text == prompt
+    assert hydrator.hydrate(cleansed.text_hashed).text == prompt
+    # Known tokens are rehydrated even when a digit follows them:
+    hydrated = hydrator.hydrate("PERSON_1 (born DATE_0), PERSON_12")
+    assert hydrated.text == "Jane (born 6/5/1961), Jane2"
+    assert [(item.start, item.end, item.entity_type) for item in hydrated.items] == [
+        (0, 4, "PERSON_1"),
+        (11, 19, "DATE_TIME_0"),
+        (22, 26, "PERSON_1"),
+    ]
+
+
+def test_local_hydrator_separators(mock_client: Client) -> None:
+    """Test that tokens are mapped when their separators appear in sensitive data.
+
+    Args:
+    ----
+        mock_client: A mock Liminal client.
+
+    """
+    prompt = "Ship 1 Main St, Springfield, to Jane, today, and 2 Oak Ave, Shelbyville."
+    text = "Ship LOCATION_0, to PERSON_0, today, and LOCATION_1."
+    items = [
+        CleansedToken(start=start, end=end, entity_type=entity_type)
+        for start, end, entity_type in [
+            (5, 15, "LOCATION"),
+            (20, 28, "PERSON"),
+            (41, 51, "LOCATION"),
+        ]
+    ]
+    cleansed = CleanseData(items=items, text=text, items_hashed=[], text_hashed="")
+    hydrator = mock_client.prompt.local_hydrator(prompt, cleansed)
+    assert hydrator.hydrate(text).text == prompt
+    assert hydrator.hydrate("LOCATION_1").text == "2 Oak Ave, Shelbyville"
+
+
+@pytest.mark.asyncio
+async def test_local_hydrator_prefix_tokens(mock_client: Client) -> None:
+    """Test that the longest known token is rehydrated when tokens share a prefix.
+
+    Args:
+    ----
+        mock_client: A mock Liminal client.
+
+    """
+    names = [
+        "Ann",
+        "Bob",
+        "Cal",
+        "Dan",
+        "Eve",
+        "Fay",
+        "Gus",
+        "Hal",
+        "Ivy",
+        "Jon",
+        "Kim",
+    ]
+    tokens = [f"PERSON_{index}" for index in range(len(names))]
+    text = ", ".join(tokens)
+    items = []
+    position = 0
+    for token in tokens:
+        items.append(
+            CleansedToken(
+                start=position, end=position + len(token), entity_type="PERSON"
+            )
+        )
+        position += len(token) + 2
+    cleansed = CleanseData(items=items, text=text, items_hashed=[], text_hashed="")
+    hydrator = mock_client.prompt.local_hydrator(", ".join(names), cleansed)
+    assert hydrator.hydrate("PERSON_10 PERSON_1 PERSON_12").text == "Kim Bob Bob2"
+
+    async def chunks() -> AsyncIterator[StreamResponseChunk]:
+        for content in ("Hi PERSON_1", "0 and PERSON_1", " and PERSON_1"):
+            yield StreamResponseChunk(content=content, finish_reason=None)
+
+    # A token that may be the start of a longer one is held back until it's complete
+    # (or the stream ends):
+    assert [chunk.content async for chunk in hydrator.hydrate_stream(chunks())] == [
+        "Hi ",
+        "Kim and ",
+        "Bob and ",
+        "Bob",
+    ]
+
+
+@pytest.mark.parametrize(
+    ("prompt", "text", "items", "error"),
+    [
+        ("Hi Jane", "Hello PERSON_0", [(6, 14)], "does not match"),
+        ("Hi Jane!", "Hi PERSON_0?", [(3, 11)], "does not match"),
+        ("Hi Jane, bye", "Hi PERSON_0; bye", [(3, 11)], "does not match"),
+        ("Hi Jane Doe", "Hi PERSON_0PERSON_1", [(3, 11), (11, 19)], "adjacent"),
+        ("Hi Jane and Bob", "Hi PERSON_0 or PERSON_1", [(3, 11), (15, 23)], "match"),
+        ("Hi Jane", "Hi PERSON_0Jane", [(3, 11)], "does not match"),
+        # The separator also appears in the sensitive data, so either address may
+        # contain the city:
+        (
+            "Ship to 1 Main St, Springfield, 2 Oak Ave, Shelbyville.",
+            "Ship to PERSON_0, PERSON_1.",
+            [(8, 16), (18, 26)],
+            "Cannot tell where",
+        ),
+    ],
+)
+def test_local_hydrator_errors(
+    mock_client: Client,
+    prompt: str,
+    text: str,
+    items: list[tuple[int, int]],
+    error: str,
+) -> None:
+    """Test that cleansed prompts that don't match the original prompt are rejected.
+
+    Args:
+    ----
+        mock_client: A mock Liminal client.
+        prompt: The original prompt.
+        text: The cleansed prompt.
+        items: The spans of the tokens in the cleansed prompt.
+        error: The expected error.
+
+    """
+    tokens = [
+        CleansedToken(start=start, end=end, entity_type="PERSON")
+        for start, end in items
+    ]
+    cleansed = CleanseData(items=tokens, text=text, items_hashed=[], text_hashed="")
+    with pytest.raises(LiminalError, match=error):
+        _ = mock_client.prompt.local_hydrator(prompt, cleansed)
+
+    # Without tokens, nothing is rehydrated:
+    empty = CleanseData(items=[], text=prompt, items_hashed=[], text_hashed="")
+    hydrator = mock_client.prompt.local_hydrator(prompt, empty)
+    assert hydrator.hydrate(text).text == text
+
+
+@pytest.mark.asyncio
+async def test_raw_findings(
+    httpx_mock: HTTPXMock,
+    prompt_analyze_response: dict[str, Any],
+    prompt_cleanse_response: dict[str, Any],
+    prompt_submit_response: dict[str, Any],
+) -> None:
+    """Test that retained raw findings are spliced into request bodies.
+
+    Args:
+    ----
+        httpx_mock: The HTTPX mock fixture.
+        prompt_analyze_response: An analyze response.
+        prompt_cleanse_response: A cleanse response.
+        prompt_submit_response: A submit response.
+
+    """
+    expected_payload = {
+        "modelInstanceId": 123,
+        "source": SOURCE,
+        "text": "Hello",
+        "threadId": 456,
+        "findings": prompt_analyze_response["data"]["findings"],
+    }
+    httpx_mock.add_response(
+        method="POST", url=ANALYZE_URL, json=prompt_analyze_response, is_reusable=True
+    )
+    httpx_mock.add_response(
+        method="POST",
+        url=CLEANSE_URL,
+        json=prompt_cleanse_response,
+        match_json=expected_payload,
+    )
+    httpx_mock.add_response(
+        method="POST",
+        url=SUBMIT_URL,
+        json=prompt_submit_response,
+        match_json=expected_payload,
+    )
+
+    async with Client(TEST_API_SERVER_URL) as client:
+        findings = await client.prompt.analyze(123, "Hello")
+        assert findings.raw_findings is None
+
+    async with Client(TEST_API_SERVER_URL, retain_raw_findings=True) as client:
+        retained = await client.prompt.analyze(123, "Hello")
+        assert retained.raw_findings
+        assert retained.findings == findings.findings
+        assert "raw_findings" not in retained.to_dict()
+
+        _ = await client.prompt.cleanse(123, "Hello", thread_id=456, findings=retained)
+        _ = await client.prompt.submit(123, "Hello", thread_id=456, findings=retained)
+        for request in httpx_mock.get_requests(url=CLEANSE_URL) + (
+            httpx_mock.get_requests(url=SUBMIT_URL)
+        ):
+            assert request.headers["Content-Type"] == "application/json"
+
+        # Copies with the same findings keep the raw JSON, but copies with other
+        # findings (or findings that change in place) don't send it:
+        copied = replace(retained, findings=list(retained.findings))
+        assert copied.get_raw_findings() == retained.raw_findings
+        assert (
+            replace(copied, findings=copied.findings[::-1]).get_raw_findings() is None
+        )
+        filtered = replace(retained, findings=retained.findings[:1])
+        assert filtered.get_raw_findings() is None
+        retained.findings.pop()
+        assert retained.get_raw_findings() is None
+        for changed in (filtered, retained):
+            httpx_mock.add_response(
+                method="POST",
+                url=CLEANSE_URL,
+                json=prompt_cleanse_response,
+                match_json={
+                    **expected_payload,
+                    "findings": [
+                        finding.to_dict(by_alias=True) for finding in changed.findings
+                    ],
+                },
+            )
+            _ = await client.prompt.cleanse(
+                123, "Hello", thread_id=456, findings=changed
+            )
+
+
+@pytest.mark.asyncio
+async def test_disk_cache(
+    httpx_mock: HTTPXMock,
+    prompt_cleanse_response: dict[str, Any],
+    prompt_hydrate_response: dict[str, Any],
+    tmp_path: Path,
+) -> None:
+    """Test that cleanse and hydrate results are cached on disk (across clients).
+
+    Args:
+    ----
+        httpx_mock: The HTTPX mock fixture.
+        prompt_cleanse_response: A cleanse response.
+        prompt_hydrate_response: A hydrate response.
+        tmp_path: A temporary directory.
+
+    """
+    httpx_mock.add_response(
+        method="POST",
+        url=CLEANSE_URL,
+        json=prompt_cleanse_response,
+        is_reusable=True,
+    )
+    httpx_mock.add_response(
+        method="POST",
+        url=HYDRATE_URL,
+        json=prompt_hydrate_response,
+        is_reusable=True,
+    )
+    config = DiskCacheConfig(path=tmp_path, encryption_key=Fernet.generate_key())
+
+    async with Client(TEST_API_SERVER_URL, disk_cache_config=config) as client:
+        cleansed = await client.prompt.cleanse(123, "Hello", thread_id=456)
+        hydrated = await client.prompt.hydrate(123, "PERSON_0", thread_id=456)
+
+        # Results for new threads are never cached:
+        _ = await client.prompt.cleanse(123, "Hello")
+        _ = await client.prompt.cleanse(123, "Hello")
+
+    # A new client (e.g., after a restart) uses the cached results:
+    async with Client(TEST_API_SERVER_URL, disk_cache_config=config) as client:
+        assert await client.prompt.cleanse(123, "Hello", thread_id=456) == cleansed
+        assert await client.prompt.hydrate(123, "PERSON_0", thread_id=456) == hydrated
+        assert len(httpx_mock.get_requests(url=CLEANSE_URL)) == 3
+        assert len(httpx_mock.get_requests(url=HYDRATE_URL)) == 1
+
+        stats = client.prompt.get_disk_cache_stats()
+        assert stats
+        assert stats.hits == 2
+        assert stats.misses == 0
+        assert stats.entries == 2
+        assert stats.size_bytes > 0
+
+        # Entries are encrypted at rest:
+        for path in (tmp_path / "entries").iterdir():
+            assert b"PERSON_0" not in path.read_bytes()
+
+        client.prompt.invalidate_disk_cache()
+        _ = await client.prompt.cleanse(123, "Hello", thread_id=456)
+        assert len(httpx_mock.get_requests(url=CLEANSE_URL)) == 4
+
+    # Closing the client closes the cache's index, which is reopened on the next use:
+    assert await client.prompt.cleanse(123, "Hello", thread_id=456) == cleansed
+    assert len(httpx_mock.get_requests(url=CLEANSE_URL)) == 4
+    await client.aclose()
+    stats = client.prompt.get_disk_cache_stats()
+    assert stats
+    assert stats.entries == 1
+    await client.aclose()
+
 
 @pytest.mark.asyncio
-async def test_analyze(
-    httpx_mock: HTTPXMock, mock_client: Client, prompt_analyze_response: dict[str, Any]
+async def test_disk_cache_errors(
+    httpx_mock: HTTPXMock,
+    prompt_cleanse_response: dict[str, Any],
+    tmp_path: Path,
+    caplog: pytest.LogCaptureFixture,
 ) -> None:
-    """Test the analyze endpoint.
+    """Test that on-disk cache failures make misses (instead of failing requests).
 
     Args:
     ----
         httpx_mock: The HTTPX mock fixture.
-        mock_client: A mock Liminal client.
-        prompt_analyze_response: An analyze response.
+        prompt_cleanse_response: A cleanse response.
+        tmp_path: A temporary directory.
+        caplog: The log capture fixture.
 
     """
     httpx_mock.add_response(
         method="POST",
-        url=f"{TEST_API_SERVER_URL}/api/v1/prompts/analyze",
-        json=prompt_analyze_response,
+        url=CLEANSE_URL,
+        json=prompt_cleanse_response,
+        is_reusable=True,
     )
+    config = DiskCacheConfig(path=tmp_path, encryption_key=Fernet.generate_key())
 
-    findings = await mock_client.prompt.analyze(
-        123,
-        (
-            "Write a short marketing email for a banking customer Jane Gansbuhler, "
-            "whose email address is egansbuhler0@pinterest.com and who lives at 14309 "
-            "Lindbergh Circle Alexander City Alabama. Jane was born on 6/5/1961 and "
-            "identifies as Female"
-        ),
+    async with Client(TEST_API_SERVER_URL, disk_cache_config=config) as client:
+        # Another process clears the cache while an entry is written:
+        with patch.object(Path, "replace", side_effect=FileNotFoundError("gone")):
+            _ = await client.prompt.cleanse(123, "Hello", thread_id=456)
+        assert "Could not write to the on-disk cache: gone" in caplog.text
+        assert not list((tmp_path / "entries").iterdir())
+
+        with patch.object(
+            DiskCache, "get", side_effect=PermissionError("Permission denied")
+        ):
+            _ = await client.prompt.cleanse(123, "Hello", thread_id=456)
+        assert "Could not read from the on-disk cache: Permission denied" in (
+            caplog.text
+        )
+        assert len(httpx_mock.get_requests(url=CLEANSE_URL)) == 2
+
+
+@pytest.mark.asyncio
+async def test_disk_cache_disabled(mock_client: Client) -> None:
+    """Test that cleanse and hydrate results are not cached by default.
+
+    Args:
+    ----
+        mock_client: A mock Liminal client.
+
+    """
+    assert mock_client.prompt.get_disk_cache_stats() is None
+    mock_client.prompt.invalidate_disk_cache()
+
+
+def test_disk_cache_invalid_config(tmp_path: Path) -> None:
+    """Test that invalid on-disk cache configurations are rejected.
+
+    Args:
+    ----
+        tmp_path: A temporary directory.
+
+    """
+    key = Fernet.generate_key()
+    with pytest.raises(LiminalError, match="Invalid encryption key"):
+        _ = DiskCacheConfig(path=tmp_path, encryption_key=b"secret")
+    with pytest.raises(LiminalError, match="Invalid maximum cache size: 0"):
+        _ = DiskCacheConfig(path=tmp_path, encryption_key=key, max_bytes=0)
+    with pytest.raises(LiminalError, match="Invalid maximum number of cache entries"):
+        _ = DiskCacheConfig(path=tmp_path, encryption_key=key, max_entries=0)
+    with pytest.raises(LiminalError, match="Invalid cache TTL: 0"):
+        _ = DiskCacheConfig(path=tmp_path, encryption_key=key, ttl=0)
+
+    with (
+        patch.dict(sys.modules, {"fcntl": None}),
+        pytest.raises(LiminalError, match="not supported on this platform"),
+    ):
+        _ = DiskCache(DiskCacheConfig(path=tmp_path, encryption_key=key))
+
+
+def test_disk_cache_eviction(
+    prompt_cleanse_response: dict[str, Any], tmp_path: Path
+) -> None:
+    """Test that the least recently used entries are evicted to bound the cache.
+
+    Args:
+    ----
+        prompt_cleanse_response: A cleanse response.
+        tmp_path: A temporary directory.
+
+    """
+    cleansed = CleanseResponse.from_dict(prompt_cleanse_response).data
+    key = Fernet.generate_key()
+
+    # Entries are bounded by count:
+    cache = DiskCache(
+        DiskCacheConfig(path=tmp_path, encryption_key=key, max_entries=10)
     )
-    assert len(findings.findings) == 5
+    for index in range(10):
+        cache.put(cache.get_key(index), cleansed)
+    assert cache.get(cache.get_key(0), CleanseData) == cleansed
+    cache.put(cache.get_key(10), cleansed)
+
+    # Entry 1 was the least recently used (and entry 2 is evicted with it, so that
+    # the next few entries fit without another eviction):
+    assert cache.get(cache.get_key(1), CleanseData) is None
+    assert cache.get(cache.get_key(2), CleanseData) is None
+    for index in (0, *range(3, 11)):
+        assert cache.get(cache.get_key(index), CleanseData) == cleansed
+    stats = cache.get_stats()
+    assert stats.entries == 9
+    assert stats.evictions == 2
+    size = stats.size_bytes // 9
+    cache.close()
+
+    # A cache that other processes may share is never resized:
+    with pytest.raises(LiminalError, match="holds up to 10 entries"):
+        _ = DiskCache(DiskCacheConfig(path=tmp_path, encryption_key=key))
+    cache = DiskCache(
+        DiskCacheConfig(path=tmp_path, encryption_key=key, max_entries=10)
+    )
+    assert cache.get_stats().entries == 9
+    cache.close()
+
+    # Entries are bounded by size:
+    cache = DiskCache(
+        DiskCacheConfig(path=tmp_path / "sized", encryption_key=key, max_bytes=2 * size)
+    )
+    for index in range(3):
+        cache.put(cache.get_key(index), cleansed)
+    assert cache.get_stats().entries == 1
+
+    # Entries that are larger than the cache are never cached:
+    cache.put(cache.get_key("large"), replace(cleansed, text="A" * size))
+    assert cache.get(cache.get_key("large"), CleanseData) is None
+    cache.close()
+
+
+def test_disk_cache_index(
+    prompt_cleanse_response: dict[str, Any], tmp_path: Path
+) -> None:
+    """Test that the index stays consistent as entries come and go.
+
+    Args:
+    ----
+        prompt_cleanse_response: A cleanse response.
+        tmp_path: A temporary directory.
+
+    """
+    cleansed = CleanseResponse.from_dict(prompt_cleanse_response).data
+    cache = DiskCache(
+        DiskCacheConfig(
+            path=tmp_path, encryption_key=Fernet.generate_key(), max_entries=8
+        )
+    )
+
+    cached: list[int] = []
+    for index in range(200):
+        cache.put(cache.get_key(index), cleansed)
+        cached = [*cached[-6:], index]
+        # Every entry that hasn't been evicted is still found (despite collisions):
+        for cached_index in cached:
+            assert cache.get(cache.get_key(cached_index), CleanseData) == cleansed
+
+    # Replacing an entry doesn't add one:
+    cache.put(cache.get_key(199), cleansed)
+    assert cache.get_stats().entries == len(list((tmp_path / "entries").iterdir()))
+    cache.close()
+
+
+def test_disk_cache_corrupt_index(
+    prompt_cleanse_response: dict[str, Any], tmp_path: Path
+) -> None:
+    """Test that a corrupt index resets the cache (without shrinking the index).
+
+    Args:
+    ----
+        prompt_cleanse_response: A cleanse response.
+        tmp_path: A temporary directory.
+
+    """
+    cleansed = CleanseResponse.from_dict(prompt_cleanse_response).data
+    config = DiskCacheConfig(
+        path=tmp_path, encryption_key=Fernet.generate_key(), max_entries=8
+    )
+    cache = DiskCache(config)
+    cache.put(cache.get_key(0), cleansed)
+    cache.close()
+
+    index_size = (tmp_path / "index").stat().st_size
+    (tmp_path / "index").write_bytes(b"\xff" * (2 * index_size))
+    cache = DiskCache(config)
+    assert cache.get_stats().entries == 0
+    assert cache.get(cache.get_key(0), CleanseData) is None
+    assert not list((tmp_path / "entries").iterdir())
+    assert (tmp_path / "index").stat().st_size == 2 * index_size
+    cache.close()
+
+
+def test_disk_cache_unreadable_entries(
+    prompt_cleanse_response: dict[str, Any], tmp_path: Path
+) -> None:
+    """Test that entries that expire (or can't be read) are removed.
+
+    Args:
+    ----
+        prompt_cleanse_response: A cleanse response.
+        tmp_path: A temporary directory.
+
+    """
+    cleansed = CleanseResponse.from_dict(prompt_cleanse_response).data
+    cache = DiskCache(
+        DiskCacheConfig(path=tmp_path, encryption_key=Fernet.generate_key(), ttl=10.0)
+    )
+
+    with patch("liminal.endpoints.prompt.disk_cache.time.time", return_value=100.0):
+        cache.put(cache.get_key("expired"), cleansed)
+    cache.put(cache.get_key("corrupt"), cleansed)
+    cache.put(cache.get_key("missing"), cleansed)
+    (tmp_path / "entries" / cache.get_key("corrupt").hex()).write_bytes(b"corrupt")
+    (tmp_path / "entries" / cache.get_key("missing").hex()).unlink()
+
+    with patch("liminal.endpoints.prompt.disk_cache.time.time", return_value=110.0):
+        assert cache.get(cache.get_key("expired"), CleanseData) is None
+    for key in ("corrupt", "missing"):
+        assert cache.get(cache.get_key(key), CleanseData) is None
+
+    stats = cache.get_stats()
+    assert stats.entries == 0
+    assert stats.size_bytes == 0
+    assert stats.misses == 3
+
+    # Removing an entry that is already gone (e.g., that another process removed) does
+    # nothing:
+    cache._remove(cache.get_key("missing"))
+    assert cache.get_stats().entries == 0
+    cache.close()
+
+
+def _put_entries(config: DiskCacheConfig, worker: int, data: CleanseData) -> None:
+    """Put entries into an on-disk cache (from another process).
+
+    Args:
+    ----
+        config: The cache configuration.
+        worker: The index of the worker process.
+        data: The object to cache.
+
+    """
+    cache = DiskCache(config)
+    for index in range(25):
+        cache.put(cache.get_key(worker, index), data)
+    cache.close()
+
+
+def test_disk_cache_processes(
+    prompt_cleanse_response: dict[str, Any], tmp_path: Path
+) -> None:
+    """Test that several processes can share an on-disk cache.
+
+    Args:
+    ----
+        prompt_cleanse_response: A cleanse response.
+        tmp_path: A temporary directory.
+
+    """
+    cleansed = CleanseResponse.from_dict(prompt_cleanse_response).data
+    config = DiskCacheConfig(path=tmp_path, encryption_key=Fernet.generate_key())
+    DiskCache(config).close()
+
+    context = multiprocessing.get_context("fork")
+    processes = [
+        context.Process(target=_put_entries, args=(config, worker, cleansed))
+        for worker in range(4)
+    ]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+
+    cache = DiskCache(config)
+    assert cache.get_stats().entries == 100
+    for worker in range(4):
+        for index in range(25):
+            assert cache.get(cache.get_key(worker, index), CleanseData) == cleansed
+    cache.close()
 
 
 @pytest.mark.asyncio
-async def test_cleanse_and_hydrate(
+async def test_pipeline(
     httpx_mock: HTTPXMock,
     mock_client: Client,
     prompt_analyze_response: dict[str, Any],
     prompt_cleanse_response: dict[str, Any],
-    prompt_hydrate_response: dict[str, Any],
+    prompt_submit_response: dict[str, Any],
 ) -> None:
-    """Test the cleanse endpoint.
+    """Test running prompts through a pipeline (capturing per-prompt errors).
 
     Args:
     ----
@@ -61,62 +1455,105 @@ async def test_cleanse_and_hydrate(
         mock_client: A mock Liminal client.
         prompt_analyze_response: An analyze response.
         prompt_cleanse_response: A cleanse response.
-        prompt_hydrate_response: A hydrate response.
+        prompt_submit_response: A submit response.
 
     """
     httpx_mock.add_response(
         method="POST",
         url=f"{TEST_API_SERVER_URL}/api/v1/prompts/analyze",
         json=prompt_analyze_response,
+        is_reusable=True,
     )
-    httpx_mock.add_response(
+    httpx_mock.add_callback(
+        lambda request: (
+            httpx.Response(400, content=b"Bad Request")
+            if b"Oops" in request.content
+            else httpx.Response(200, json=prompt_cleanse_response)
+        ),
         method="POST",
         url=f"{TEST_API_SERVER_URL}/api/v1/prompts/cleanse",
-        json=prompt_cleanse_response,
+        is_reusable=True,
     )
     httpx_mock.add_response(
         method="POST",
-        url=f"{TEST_API_SERVER_URL}/api/v1/prompts/hydrate",
-        json=prompt_hydrate_response,
+        url=f"{TEST_API_SERVER_URL}/api/v1/prompts/submit",
+        json=prompt_submit_response,
+        is_reusable=True,
     )
 
-    findings = await mock_client.prompt.analyze(
+    pipeline = mock_client.prompt.pipeline(
         123,
-        (
-            "Write a short marketing email for a banking customer Jane Gansbuhler, "
-            "whose email address is egansbuhler0@pinterest.com and who lives at 14309 "
-            "Lindbergh Circle Alexander City Alabama. Jane was born on 6/5/1961 and "
-            "identifies as Female"
+        config=PromptPipelineConfig(
+            analyze_concurrency=2, cleanse_concurrency=2, submit_concurrency=1
         ),
+        thread_id=456,
     )
-    assert len(findings.findings) == 5
+    results = sorted(
+        [result async for result in pipeline.run(["Hello", "Oops", "World"])],
+        key=lambda result: result.index,
+    )
+    assert [result.prompt for result in results] == ["Hello", "Oops", "World"]
 
-    cleansed = await mock_client.prompt.cleanse(
-        123,
-        (
-            "Write a short marketing email for a banking customer Jane Gansbuhler, "
-            "whose email address is egansbuhler0@pinterest.com and who lives at 14309 "
-            "Lindbergh Circle Alexander City Alabama. Jane was born on 6/5/1961 and "
-            "identifies as Female"
-        ),
-        findings=findings,
-        thread_id=123,
+    assert results[0].findings
+    assert results[0].cleansed
+    assert results[0].response
+    assert results[0].error is None
+
+    # The prompt that fails to be cleansed is not submitted:
+    assert results[1].findings
+    assert results[1].cleansed is None
+    assert results[1].response is None
+    assert isinstance(results[1].error, RequestError)
+    assert results[1].failed_stage == "cleanse"
+
+    assert [(stats.name, stats.completed) for stats in pipeline.get_stats()] == [
+        ("analyze", 3),
+        ("cleanse", 3),
+        ("submit", 2),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_pipeline_stage_errors(
+    httpx_mock: HTTPXMock, mock_client: Client, prompt_analyze_response: dict[str, Any]
+) -> None:
+    """Test that errors in the analyze and submit stages are captured.
+
+    Args:
+    ----
+        httpx_mock: The HTTPX mock fixture.
+        mock_client: A mock Liminal client.
+        prompt_analyze_response: An analyze response.
+
+    """
+    httpx_mock.add_response(
+        method="POST",
+        url=f"{TEST_API_SERVER_URL}/api/v1/prompts/analyze",
+        match_json={"modelInstanceId": 123, "source": SOURCE, "text": "Hello"},
+        json=prompt_analyze_response,
     )
-    assert len(cleansed.items) == 5
-    assert len(cleansed.items_hashed) == 5
-    assert cleansed.text == (
-        "Write a short marketing email for a banking customer PERSON_0, whose email "
-        "address is EMAIL_ADDRESS_0 and who lives at LOCATION_0. PERSON_1 was born on "
-        "DATE_0 and identifies as Female"
+    httpx_mock.add_response(
+        method="POST",
+        url=f"{TEST_API_SERVER_URL}/api/v1/prompts/analyze",
+        match_json={"modelInstanceId": 123, "source": SOURCE, "text": "Oops"},
+        content=b"Bad Request",
+        status_code=400,
     )
-
-    hydrated = await mock_client.prompt.hydrate(
-        123, "Tell PERSON_0 that we are grateful for their business.", thread_id=123
+    httpx_mock.add_response(
+        method="POST",
+        url=f"{TEST_API_SERVER_URL}/api/v1/prompts/submit",
+        content=b"Bad Request",
+        status_code=400,
     )
-    assert len(hydrated.items) == 1
-    assert hydrated.text == (
-        "Tell Jane Gansbuhler that we are grateful for their business."
+
+    pipeline = mock_client.prompt.pipeline(
+        123, config=PromptPipelineConfig(cleanse=False)
     )
+    results = {
+        result.prompt: result async for result in pipeline.run(["Hello", "Oops"])
+    }
+    assert results["Hello"].failed_stage == "submit"
+    assert results["Oops"].failed_stage == "analyze"
 
 
 class StreamTest(NamedTuple):
@@ -148,6 +1585,19 @@ class StreamTest(NamedTuple):
             ),
             should_log_warning=True,
         ),
+        StreamTest(
+            prompt_stream_response_iterator=pytest.param(
+                IteratorStream(
+                    [
+                        b'data: {"content": "This ", "finishReason": null}\n\nda',
+                        b'ta: {"content": "is ", "finis',
+                        b'hReason": null}\n\ndata: {"content": "split.", ',
+                        b'"finishReason": "stop"}\n\ndata: [DONE]\n\n',
+                    ]
+                )
+            ),
+            should_log_warning=False,
+        ),
     ],
     indirect=["prompt_stream_response_iterator"],
 )
@@ -214,7 +1664,10 @@ async def test_stream(
         assert isinstance(chunk, StreamResponseChunk)
 
     log_generator = (
-        m for m in caplog.messages if "Stream returned incomplete JSON chunk" in m
+        m
+        for m in caplog.messages
+        if "Stream returned incomplete JSON chunk" in m
+        or "Stream returned invalid JSON chunk" in m
     )
 
     if should_log_warning:
@@ -223,6 +1676,110 @@ async def test_stream(
         assert not any(log_generator)
 
 
+@pytest.mark.asyncio
+async def test_stream_error(httpx_mock: HTTPXMock, mock_client: Client) -> None:
+    """Test that a failed stream raises an error (rather than yielding chunks).
+
+    Args:
+    ----
+        httpx_mock: The HTTPX mock fixture.
+        mock_client: A mock Liminal client.
+
+    """
+    httpx_mock.add_response(
+        method="POST",
+        url=f"{TEST_API_SERVER_URL}/api/v1/prompts/submit",
+        content=b"Service Unavailable",
+        status_code=503,
+    )
+
+    with pytest.raises(RequestError, match="Service Unavailable"):
+        _ = [chunk async for chunk in mock_client.prompt.stream(123, "Hello")]
+
+
+@pytest.mark.asyncio
+async def test_stream_hydrator(
+    httpx_mock: HTTPXMock, mock_client: Client, prompt_cleanse_response: dict[str, Any]
+) -> None:
+    """Test that a streamed response is rehydrated as it arrives.
+
+    Args:
+    ----
+        httpx_mock: The HTTPX mock fixture.
+        mock_client: A mock Liminal client.
+        prompt_cleanse_response: A cleanse response.
+
+    """
+    httpx_mock.add_response(
+        method="POST",
+        url=SUBMIT_URL,
+        stream=IteratorStream(
+            [
+                b'data: {"content": "Dear PER", "finishReason": null}\n\n',
+                b'data: {"content": "SON_0, happy ", "finishReason": null}\n\n',
+                b'data: {"content": "birthday on DATE_0", "finishReason": null}\n\n',
+                b'data: {"content": "!", "finishReason": "stop"}\n\n',
+            ]
+        ),
+    )
+    hydrator = mock_client.prompt.local_hydrator(
+        PROMPT, CleanseData.from_dict(prompt_cleanse_response["data"])
+    )
+
+    chunks = [
+        chunk
+        async for chunk in mock_client.prompt.stream(
+            123, PROMPT, thread_id=123, hydrator=hydrator
+        )
+    ]
+
+    # Only text that may be the start of a token is held back:
+    assert [(chunk.content, chunk.finish_reason) for chunk in chunks] == [
+        ("Dear ", None),
+        ("Jane Gansbuhler, happy ", None),
+        ("birthday on 6/5/1961", None),
+        ("!", "stop"),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_stream_hydrator_chunking(
+    prompt_cleanse_response: dict[str, Any],
+) -> None:
+    """Test that streamed responses are rehydrated the same, however they're split.
+
+    Args:
+    ----
+        prompt_cleanse_response: A cleanse response.
+
+    """
+    cleansed = CleanseData.from_dict(prompt_cleanse_response["data"])
+    hydrator = LocalHydrator(PROMPT, cleansed)
+    text = f"PERSON_0PERSON_1 PERSON_10 {cleansed.text_hashed} PERSON_ DATE_0 PERSON_1"
+
+    async def split(
+        chunk_sizes: list[int], finish_reason: str | None
+    ) -> AsyncIterator[StreamResponseChunk]:
+        position = 0
+        for size in chunk_sizes:
+            yield StreamResponseChunk(
+                content=text[position : position + size], finish_reason=None
+            )
+            position += size
+        yield StreamResponseChunk(content=text[position:], finish_reason=finish_reason)
+
+    rng = random.Random(0)  # noqa: S311
+    for finish_reason in (None, "stop") * 50:
+        chunk_sizes = [rng.randint(0, 12) for _ in range(rng.randint(0, 60))]
+        chunks = [
+            chunk.content
+            async for chunk in hydrator.hydrate_stream(
+                split(chunk_sizes, finish_reason)
+            )
+        ]
+        assert "".join(chunks) == hydrator.hydrate(text).text
+
+
 @pytest.mark.asyncio
 async def test_submit(
     httpx_mock: HTTPXMock,
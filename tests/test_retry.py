@@ -0,0 +1,314 @@
+"""Define retry tests."""
+
+from __future__ import annotations
+
+from collections.abc import Callable
+from datetime import UTC, datetime, timedelta
+from email.utils import format_datetime
+from unittest.mock import AsyncMock, patch
+
+import httpx
+import pytest
+
+from liminal import Client
+from liminal.errors import LiminalError, RequestError
+from liminal.retry import RetryBudget, RetryPolicy, get_retry_after
+from tests.common import TEST_API_SERVER_URL
+
+FaultT = Callable[[httpx.Request], httpx.Response]
+
+
+def connect_error(request: httpx.Request) -> httpx.Response:
+    """Fail to connect.
+
+    Args:
+    ----
+        request: The request.
+
+    Raises:
+    ------
+        ConnectError: Always.
+
+    """
+    msg = "Connection refused"
+    raise httpx.ConnectError(msg, request=request)
+
+
+def read_error(request: httpx.Request) -> httpx.Response:
+    """Lose the connection after the request is sent.
+
+    Args:
+    ----
+        request: The request.
+
+    Raises:
+    ------
+        ReadError: Always.
+
+    """
+    msg = "Connection reset by peer"
+    raise httpx.ReadError(msg, request=request)
+
+
+def unavailable(_: httpx.Request) -> httpx.Response:
+    """Respond that the service is unavailable.
+
+    Returns
+    -------
+        A 503 response.
+
+    """
+    return httpx.Response(503, content=b"Service Unavailable")
+
+
+def too_many_requests(_: httpx.Request) -> httpx.Response:
+    """Respond that there are too many requests (and when to retry).
+
+    Returns
+    -------
+        A 429 response.
+
+    """
+    return httpx.Response(429, headers={"Retry-After": "2"}, content=b"Slow Down")
+
+
+class FaultInjectingTransport(httpx.AsyncBaseTransport):
+    """Define a transport that injects faults before succeeding."""
+
+    def __init__(self, *faults: FaultT) -> None:
+        """Initialize.
+
+        Args:
+        ----
+            *faults: The faults to inject (in order) before responses succeed.
+
+        """
+        self.faults = list(faults)
+        self.requests: list[httpx.Request] = []
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        """Handle a request.
+
+        Args:
+        ----
+            request: The request.
+
+        Returns:
+        -------
+            A response.
+
+        """
+        self.requests.append(request)
+        if self.faults:
+            return self.faults.pop(0)(request)
+        return httpx.Response(200, json={"ok": True})
+
+
+async def send(
+    transport: FaultInjectingTransport,
+    method: str,
+    endpoint: str,
+    retry_policy: RetryPolicy | None = None,
+) -> httpx.Response:
+    """Send a request through a client that uses a fault-injecting transport.
+
+    Args:
+    ----
+        transport: The fault-injecting transport.
+        method: The HTTP method to use.
+        endpoint: The endpoint to request.
+        retry_policy: An optional retry policy.
+
+    Returns:
+    -------
+        The response.
+
+    """
+    async with httpx.AsyncClient(transport=transport) as httpx_client:
+        client = Client(
+            TEST_API_SERVER_URL, httpx_client=httpx_client, retry_policy=retry_policy
+        )
+        return await client._request(method, endpoint)
+
+
+def test_invalid_policy() -> None:
+    """Test that invalid retry policies are rejected."""
+    with pytest.raises(LiminalError, match="Invalid maximum number of attempts"):
+        _ = RetryPolicy(max_attempts=0)
+    with pytest.raises(LiminalError, match="Invalid retry budget ratio"):
+        _ = RetryPolicy(budget_ratio=2.0)
+
+
+def test_declared_idempotence() -> None:
+    """Test that a request's declared idempotence overrides its method and endpoint."""
+    policy = RetryPolicy()
+    unavailable_response = httpx.Response(503)
+    error = httpx.ReadTimeout("Timed out")
+
+    for endpoint in ("/api/v1/prompts/cleanse", "/api/v1/prompts/hydrate"):
+        assert not policy.is_retryable("POST", endpoint, error=error)
+        assert policy.is_retryable("POST", endpoint, error=error, idempotent=True)
+        assert not policy.is_retryable(
+            "GET", endpoint, response=unavailable_response, idempotent=False
+        )
+        # Requests that were never processed are always retried:
+        assert policy.is_retryable(
+            "POST", endpoint, error=httpx.ConnectError("Refused"), idempotent=False
+        )
+
+
+def test_backoff() -> None:
+    """Test that backoff grows exponentially (up to a maximum) with full jitter."""
+    policy = RetryPolicy(backoff_base=0.5, backoff_max=3.0)
+    with patch("liminal.retry.random.uniform", side_effect=lambda _, high: high):
+        assert [policy.get_backoff(attempt) for attempt in range(4)] == [
+            0.5,
+            1.0,
+            2.0,
+            3.0,
+        ]
+    assert 0.0 <= policy.get_backoff(1) <= 1.0
+
+
+def test_retry_after() -> None:
+    """Test parsing Retry-After headers."""
+    assert get_retry_after(httpx.Response(503)) is None
+    assert get_retry_after(httpx.Response(503, headers={"Retry-After": "3"})) == 3.0
+    assert get_retry_after(httpx.Response(503, headers={"Retry-After": "-3"})) == 0.0
+    assert get_retry_after(httpx.Response(503, headers={"Retry-After": "soon"})) is None
+
+    retry_at = format_datetime(datetime.now(UTC) + timedelta(seconds=60), usegmt=True)
+    delay = get_retry_after(httpx.Response(503, headers={"Retry-After": retry_at}))
+    assert delay is not None
+    assert 55.0 < delay <= 60.0
+
+    # Dates without a known zone (which are parsed as naive) are UTC:
+    retry_at = format_datetime(
+        datetime.now(UTC).replace(tzinfo=None) + timedelta(seconds=60)
+    )
+    assert retry_at.endswith("-0000")
+    delay = get_retry_after(httpx.Response(503, headers={"Retry-After": retry_at}))
+    assert delay is not None
+    assert 55.0 < delay <= 60.0
+    past = "Wed, 21 Oct 2015 07:28:00 -0000"
+    assert get_retry_after(httpx.Response(503, headers={"Retry-After": past})) == 0.0
+
+
+def test_retry_budget() -> None:
+    """Test that the retry budget bounds retries to a fraction of requests."""
+    budget = RetryBudget(0.5, 1)
+    assert budget.try_withdraw()
+    assert not budget.try_withdraw()
+
+    budget.record_request()
+    assert not budget.try_withdraw()
+    budget.record_request()
+    budget.record_request()
+    assert budget.balance == 1.0
+    assert budget.try_withdraw()
+
+
+@pytest.mark.asyncio
+async def test_retry_transient_faults() -> None:
+    """Test that idempotent requests are retried after transient faults."""
+    transport = FaultInjectingTransport(connect_error, read_error, unavailable)
+    with patch("liminal.client.asyncio.sleep", AsyncMock()) as mock_sleep:
+        response = await send(
+            transport, "GET", "/api/v1/threads", RetryPolicy(max_attempts=4)
+        )
+
+    assert response.json() == {"ok": True}
+    assert len(transport.requests) == 4
+    assert mock_sleep.await_count == 3
+
+
+@pytest.mark.asyncio
+async def test_retry_idempotent_endpoint() -> None:
+    """Test that POSTs to idempotent endpoints are retried."""
+    transport = FaultInjectingTransport(unavailable)
+    with patch("liminal.client.asyncio.sleep", AsyncMock()):
+        _ = await send(transport, "POST", "/api/v1/prompts/analyze")
+    assert len(transport.requests) == 2
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    ("fault", "expected_requests", "error_match"),
+    [
+        # The request may have been processed:
+        (unavailable, 1, "Service Unavailable"),
+        (read_error, 1, "Connection reset by peer"),
+        # The request was never sent (or processed):
+        (connect_error, 2, None),
+        (too_many_requests, 2, None),
+    ],
+)
+async def test_retry_non_idempotent_request(
+    fault: FaultT, expected_requests: int, error_match: str | None
+) -> None:
+    """Test that non-idempotent requests are only retried when it is safe to.
+
+    Args:
+    ----
+        fault: The fault to inject.
+        expected_requests: The number of requests that should be sent.
+        error_match: The error that should be raised (if any).
+
+    """
+    transport = FaultInjectingTransport(fault)
+    with patch("liminal.client.asyncio.sleep", AsyncMock()):
+        if error_match:
+            with pytest.raises(RequestError, match=error_match):
+                _ = await send(transport, "POST", "/api/v1/prompts/submit")
+        else:
+            _ = await send(transport, "POST", "/api/v1/prompts/submit")
+
+    assert len(transport.requests) == expected_requests
+
+
+@pytest.mark.asyncio
+async def test_retry_after_is_honored() -> None:
+    """Test that the delay requested by the server is honored (within reason)."""
+    transport = FaultInjectingTransport(too_many_requests)
+    with patch("liminal.client.asyncio.sleep", AsyncMock()) as mock_sleep:
+        _ = await send(transport, "GET", "/api/v1/threads")
+    mock_sleep.assert_awaited_once_with(2.0)
+
+    transport = FaultInjectingTransport(too_many_requests)
+    with (
+        patch("liminal.client.asyncio.sleep", AsyncMock()) as mock_sleep,
+        pytest.raises(RequestError, match="Slow Down"),
+    ):
+        _ = await send(
+            transport, "GET", "/api/v1/threads", RetryPolicy(max_retry_after=1.0)
+        )
+    mock_sleep.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_retries_exhausted() -> None:
+    """Test that the last error is raised once every attempt has failed."""
+    transport = FaultInjectingTransport(read_error, read_error, read_error)
+    with (
+        patch("liminal.client.asyncio.sleep", AsyncMock()),
+        pytest.raises(RequestError, match="Connection reset by peer"),
+    ):
+        _ = await send(transport, "GET", "/api/v1/threads")
+    assert len(transport.requests) == 3
+
+
+@pytest.mark.asyncio
+async def test_retry_budget_exhausted() -> None:
+    """Test that requests are not retried once the retry budget is spent."""
+    transport = FaultInjectingTransport(unavailable)
+    with (
+        patch("liminal.client.asyncio.sleep", AsyncMock()),
+        pytest.raises(RequestError, match="Service Unavailable"),
+    ):
+        _ = await send(
+            transport,
+            "GET",
+            "/api/v1/threads",
+            RetryPolicy(budget_ratio=0.0, budget_reserve=0),
+        )
+    assert len(transport.requests) == 1
@@ -2,16 +2,43 @@
 
 from __future__ import annotations
 
+import asyncio
+from contextlib import aclosing
 from datetime import UTC, datetime
+import json
+import re
 from typing import Any
 
 import pytest
-from pytest_httpx import HTTPXMock
+from pytest_httpx import HTTPXMock, IteratorStream
 
 from liminal import Client
+from liminal.endpoints.thread.pagination import ThreadPaginationConfig
+from liminal.errors import LiminalError, RequestError
 from tests.common import TEST_API_SERVER_URL
 
 
+def get_page(response: dict[str, Any], first_id: int, count: int) -> dict[str, Any]:
+    """Get a page of copies of the threads in an available threads response.
+
+    Args:
+    ----
+        response: The response.
+        first_id: The ID of the first thread in the page.
+        count: The number of threads in the page.
+
+    Returns:
+    -------
+        The response with the page of threads.
+
+    """
+    [thread] = response["data"]
+    return {
+        **response,
+        "data": [{**thread, "id": first_id + index} for index in range(count)],
+    }
+
+
 @pytest.mark.asyncio
 async def test_create(
     httpx_mock: HTTPXMock, mock_client: Client, threads_create_response: dict[str, Any]
@@ -67,6 +94,372 @@ async def test_get_available(
     assert len(threads) == 1
 
 
+@pytest.mark.asyncio
+async def test_get_available_compact(
+    httpx_mock: HTTPXMock,
+    mock_client: Client,
+    threads_get_available_response: dict[str, Any],
+) -> None:
+    """Test that large thread listings are stored compactly.
+
+    Args:
+    ----
+        httpx_mock: The HTTPX mock fixture.
+        mock_client: A mock Liminal client.
+        threads_get_available_response: The response from the endpoint.
+
+    """
+    httpx_mock.add_response(
+        method="GET",
+        url=f"{TEST_API_SERVER_URL}/api/v1/threads?source=sdk",
+        json={
+            **threads_get_available_response,
+            "data": threads_get_available_response["data"] * 2,
+        },
+    )
+
+    first, second = await mock_client.thread.get_available()
+    first_connection = first.model_instance.model_connections[0]
+    second_connection = second.model_instance.model_connections[0]
+
+    # Models are slotted:
+    for model in (first, first.model_instance, first_connection):
+        assert not hasattr(model, "__dict__")
+
+    # The model instance that both threads embed is decoded once and shared:
+    assert first.model_instance is second.model_instance
+
+    # Repeated strings are stored once:
+    assert first_connection.model is second_connection.model
+    assert first_connection.provider_key is second_connection.provider_key
+
+
+@pytest.mark.asyncio
+async def test_get_available_fields(
+    httpx_mock: HTTPXMock,
+    mock_client: Client,
+    threads_get_available_response: dict[str, Any],
+) -> None:
+    """Test getting projections of the available threads.
+
+    Args:
+    ----
+        httpx_mock: The HTTPX mock fixture.
+        mock_client: A mock Liminal client.
+        threads_get_available_response: The response from the endpoint.
+
+    """
+    httpx_mock.add_response(
+        method="GET",
+        url=f"{TEST_API_SERVER_URL}/api/v1/threads?source=sdk",
+        json=threads_get_available_response,
+        is_reusable=True,
+    )
+
+    [thread] = await mock_client.thread.get_available(
+        fields=("id", "name", "model_instance_id")
+    )
+    assert thread.id == 160
+    assert thread.name == "My thread"
+    assert thread.model_instance_id == 1
+    assert not hasattr(thread, "model_instance")
+    assert not hasattr(thread, "__dict__")
+
+    # Projections of the same fields share a type:
+    [other] = await mock_client.thread.get_available(
+        fields=["model_instance_id", "name", "id"]
+    )
+    assert type(other) is type(thread)
+    assert other == thread
+
+    # Nested and optional fields are decoded as usual:
+    [full] = await mock_client.thread.get_available()
+    [thread] = await mock_client.thread.get_available(
+        fields=("model_instance", "deleted_at")
+    )
+    assert thread.model_instance == full.model_instance
+    assert thread.deleted_at is None
+
+    with pytest.raises(LiminalError, match="Unknown fields of Thread: chats, title"):
+        await mock_client.thread.get_available(fields=("id", "title", "chats"))
+
+
+@pytest.mark.parametrize(
+    ("max_pages", "page_size", "prefetch", "error"),
+    [
+        (0, 100, 1, "Invalid maximum number of pages: 0"),
+        (10, 0, 1, "Invalid page size: 0"),
+        (10, 100, -1, "Invalid prefetch: -1"),
+    ],
+)
+def test_invalid_pagination_config(
+    max_pages: int, page_size: int, prefetch: int, error: str
+) -> None:
+    """Test that an invalid pagination configuration is rejected.
+
+    Args:
+    ----
+        max_pages: The maximum number of pages.
+        page_size: The number of threads per page.
+        prefetch: The number of pages requested ahead.
+        error: The expected error message.
+
+    """
+    with pytest.raises(LiminalError, match=error):
+        ThreadPaginationConfig(
+            max_pages=max_pages, page_size=page_size, prefetch=prefetch
+        )
+
+
+@pytest.mark.asyncio
+async def test_iter_available(
+    httpx_mock: HTTPXMock,
+    mock_client: Client,
+    threads_get_available_response: dict[str, Any],
+) -> None:
+    """Test iterating over available threads, page by page.
+
+    Args:
+    ----
+        httpx_mock: The HTTPX mock fixture.
+        mock_client: A mock Liminal client.
+        threads_get_available_response: The response from the endpoint.
+
+    """
+    for offset, count in ((0, 2), (2, 2)):
+        httpx_mock.add_response(
+            method="GET",
+            url=f"{TEST_API_SERVER_URL}/api/v1/threads?source=sdk&limit=2&offset={offset}",
+            json=get_page(threads_get_available_response, offset, count),
+        )
+    # A page that arrives in chunks (the last of which completes its thread):
+    last_page = json.dumps(get_page(threads_get_available_response, 4, 1)).encode()
+    httpx_mock.add_response(
+        method="GET",
+        url=f"{TEST_API_SERVER_URL}/api/v1/threads?source=sdk&limit=2&offset=4",
+        stream=IteratorStream([last_page[:-100], last_page[-100:]]),
+    )
+    # The page after the last one may already have been requested:
+    httpx_mock.add_response(
+        method="GET",
+        url=f"{TEST_API_SERVER_URL}/api/v1/threads?source=sdk&limit=2&offset=6",
+        json=get_page(threads_get_available_response, 6, 0),
+        is_optional=True,
+    )
+
+    threads = [
+        thread
+        async for thread in mock_client.thread.iter_available(
+            config=ThreadPaginationConfig(page_size=2)
+        )
+    ]
+    assert [thread.id for thread in threads] == [0, 1, 2, 3, 4]
+    # The model instance that every thread embeds is decoded once and shared:
+    assert all(thread.model_instance is threads[0].model_instance for thread in threads)
+
+
+@pytest.mark.asyncio
+async def test_iter_available_errors(
+    httpx_mock: HTTPXMock,
+    mock_client: Client,
+    threads_get_available_response: dict[str, Any],
+) -> None:
+    """Test that errors while iterating over available threads are raised.
+
+    Args:
+    ----
+        httpx_mock: The HTTPX mock fixture.
+        mock_client: A mock Liminal client.
+        threads_get_available_response: The response from the endpoint.
+
+    """
+    config = ThreadPaginationConfig(page_size=1, prefetch=0)
+    httpx_mock.add_response(
+        method="GET",
+        url=f"{TEST_API_SERVER_URL}/api/v1/threads?source=sdk&limit=1&offset=0",
+        json=get_page(threads_get_available_response, 0, 1),
+    )
+    httpx_mock.add_response(
+        method="GET",
+        url=f"{TEST_API_SERVER_URL}/api/v1/threads?source=sdk&limit=1&offset=1",
+        status_code=500,
+        text="Internal Server Error",
+    )
+
+    threads = mock_client.thread.iter_available(config=config)
+    assert (await anext(threads)).id == 0
+    with pytest.raises(RequestError, match="Internal Server Error"):
+        await anext(threads)
+
+    httpx_mock.add_response(
+        method="GET",
+        url=f"{TEST_API_SERVER_URL}/api/v1/threads?source=sdk&limit=1&offset=0",
+        json={"data": [{"id": 0}]},
+    )
+
+    with pytest.raises(RequestError, match="Could not validate response"):
+        async for _ in mock_client.thread.iter_available(config=config):
+            pass
+
+
+@pytest.mark.asyncio
+async def test_iter_available_stops(
+    httpx_mock: HTTPXMock,
+    mock_client: Client,
+    threads_get_available_response: dict[str, Any],
+) -> None:
+    """Test that pages that are no longer needed are dropped (even if they failed).
+
+    Args:
+    ----
+        httpx_mock: The HTTPX mock fixture.
+        mock_client: A mock Liminal client.
+        threads_get_available_response: The response from the endpoint.
+
+    """
+    # A server that ignores paging returns every thread at once:
+    httpx_mock.add_response(
+        method="GET",
+        url=f"{TEST_API_SERVER_URL}/api/v1/threads?source=sdk&limit=2&offset=0",
+        json=get_page(threads_get_available_response, 0, 3),
+    )
+    httpx_mock.add_response(
+        method="GET",
+        url=f"{TEST_API_SERVER_URL}/api/v1/threads?source=sdk&limit=2&offset=2",
+        status_code=500,
+    )
+
+    threads = []
+    async for thread in mock_client.thread.iter_available(
+        config=ThreadPaginationConfig(page_size=2), fields=("id", "name")
+    ):
+        # Let the prefetched page fail in the meantime:
+        await asyncio.sleep(0.01)
+        threads.append(thread)
+    assert [thread.id for thread in threads] == [0, 1, 2]
+    assert not hasattr(threads[0], "model_instance")
+
+    # Pages in progress are cancelled when iteration stops early:
+    httpx_mock.add_response(
+        method="GET",
+        url=f"{TEST_API_SERVER_URL}/api/v1/threads?source=sdk&limit=2&offset=0",
+        json=get_page(threads_get_available_response, 0, 2),
+    )
+    httpx_mock.add_response(
+        method="GET",
+        url=f"{TEST_API_SERVER_URL}/api/v1/threads?source=sdk&limit=2&offset=2",
+        json=get_page(threads_get_available_response, 2, 2),
+        is_optional=True,
+    )
+    async with aclosing(
+        mock_client.thread.iter_available(config=ThreadPaginationConfig(page_size=2))
+    ) as iterator:
+        async for thread in iterator:
+            assert thread.id == 0
+            break
+
+
+@pytest.mark.asyncio
+async def test_iter_available_ignored_offset(
+    httpx_mock: HTTPXMock,
+    mock_client: Client,
+    threads_get_available_response: dict[str, Any],
+) -> None:
+    """Test that iteration ends when the server ignores the offset.
+
+    Args:
+    ----
+        httpx_mock: The HTTPX mock fixture.
+        mock_client: A mock Liminal client.
+        threads_get_available_response: The response from the endpoint.
+
+    """
+    # Every thread fits in exactly one (full) page, which is returned for any offset:
+    httpx_mock.add_response(
+        method="GET",
+        url=re.compile(rf"{re.escape(TEST_API_SERVER_URL)}/api/v1/threads\?.*"),
+        json=get_page(threads_get_available_response, 0, 2),
+        is_reusable=True,
+    )
+
+    threads = [
+        thread
+        async for thread in mock_client.thread.iter_available(
+            config=ThreadPaginationConfig(page_size=2)
+        )
+    ]
+    assert [thread.id for thread in threads] == [0, 1]
+
+
+@pytest.mark.asyncio
+async def test_iter_available_projection(
+    httpx_mock: HTTPXMock,
+    mock_client: Client,
+    threads_get_available_response: dict[str, Any],
+) -> None:
+    """Test that pages of projections without IDs are told apart by ID.
+
+    Args:
+    ----
+        httpx_mock: The HTTPX mock fixture.
+        mock_client: A mock Liminal client.
+        threads_get_available_response: The response from the endpoint.
+
+    """
+    for offset, count in ((0, 2), (2, 2), (4, 1)):
+        httpx_mock.add_response(
+            method="GET",
+            url=f"{TEST_API_SERVER_URL}/api/v1/threads?source=sdk&limit=2&offset={offset}",
+            json=get_page(threads_get_available_response, offset, count),
+        )
+    httpx_mock.add_response(
+        method="GET",
+        url=f"{TEST_API_SERVER_URL}/api/v1/threads?source=sdk&limit=2&offset=6",
+        json=get_page(threads_get_available_response, 6, 0),
+        is_optional=True,
+    )
+
+    # Every projection is equal (since the threads only differ by ID):
+    threads = [
+        thread
+        async for thread in mock_client.thread.iter_available(
+            config=ThreadPaginationConfig(page_size=2), fields=("model_instance_id",)
+        )
+    ]
+    assert len(threads) == 5
+    assert not hasattr(threads[0], "id")
+
+
+@pytest.mark.asyncio
+async def test_iter_available_max_pages(
+    httpx_mock: HTTPXMock,
+    mock_client: Client,
+    threads_get_available_response: dict[str, Any],
+) -> None:
+    """Test that iteration fails once the maximum number of pages is reached.
+
+    Args:
+    ----
+        httpx_mock: The HTTPX mock fixture.
+        mock_client: A mock Liminal client.
+        threads_get_available_response: The response from the endpoint.
+
+    """
+    for offset in (0, 2):
+        httpx_mock.add_response(
+            method="GET",
+            url=f"{TEST_API_SERVER_URL}/api/v1/threads?source=sdk&limit=2&offset={offset}",
+            json=get_page(threads_get_available_response, offset, 2),
+        )
+
+    threads = mock_client.thread.iter_available(
+        config=ThreadPaginationConfig(max_pages=2, page_size=2)
+    )
+    assert [(await anext(threads)).id for _ in range(4)] == [0, 1, 2, 3]
+    with pytest.raises(LiminalError, match="Stopped iterating over threads after 2"):
+        await anext(threads)
+
+
 @pytest.mark.asyncio
 async def test_get_by_id(
     httpx_mock: HTTPXMock,
@@ -0,0 +1,109 @@
+"""Define tracing tests."""
+
+from __future__ import annotations
+
+import logging
+
+import pytest
+from pytest_httpx import HTTPXMock, IteratorStream
+
+from liminal import Client
+from liminal.errors import LiminalError
+from liminal.tracing import StreamSummary, Tracer, TracingConfig, redact_payload
+from tests.common import TEST_API_SERVER_URL
+
+
+def test_invalid_sample_rate() -> None:
+    """Test that the sample rate must be a fraction."""
+    with pytest.raises(LiminalError, match="Invalid tracing sample rate"):
+        _ = TracingConfig(sample_rate=1.5)
+
+
+def test_sampling() -> None:
+    """Test that requests are only traced when sampled."""
+    assert not Tracer().sample()
+    assert Tracer(TracingConfig(sample_rate=1.0)).sample()
+
+
+@pytest.mark.asyncio
+async def test_untraced_client(
+    caplog: pytest.LogCaptureFixture, httpx_mock: HTTPXMock
+) -> None:
+    """Test that nothing is logged for untraced responses and streams.
+
+    Args:
+    ----
+        caplog: The caplog fixture.
+        httpx_mock: The HTTPX mock fixture.
+
+    """
+    caplog.set_level(logging.DEBUG)
+    httpx_mock.add_response(
+        url=f"{TEST_API_SERVER_URL}/api/v1/users/me", content=b"secret"
+    )
+    httpx_mock.add_response(
+        url=f"{TEST_API_SERVER_URL}/api/v1/prompts/submit",
+        stream=IteratorStream([b"secret ", b"stream"]),
+    )
+
+    async with Client(TEST_API_SERVER_URL) as client:
+        _ = await client._request("GET", "/api/v1/users/me")
+        assert [
+            chunk async for chunk in client._stream("POST", "/api/v1/prompts/submit")
+        ] == [b"secret ", b"stream"]
+
+    assert not any("secret" in message for message in caplog.messages)
+    assert not any("Stream from" in message for message in caplog.messages)
+
+
+@pytest.mark.asyncio
+async def test_traced_client(
+    caplog: pytest.LogCaptureFixture, httpx_mock: HTTPXMock
+) -> None:
+    """Test that traced responses and streams are summarized (and redacted).
+
+    Args:
+    ----
+        caplog: The caplog fixture.
+        httpx_mock: The HTTPX mock fixture.
+
+    """
+    caplog.set_level(logging.DEBUG)
+    httpx_mock.add_response(
+        url=f"{TEST_API_SERVER_URL}/api/v1/users/me", content=b"secret"
+    )
+    httpx_mock.add_response(
+        url=f"{TEST_API_SERVER_URL}/api/v1/prompts/submit",
+        stream=IteratorStream([b"secret ", b"stream"]),
+    )
+
+    summaries: list[StreamSummary] = []
+    tracing_config = TracingConfig(
+        sample_rate=1.0, log_payloads=True, on_stream_summary=summaries.append
+    )
+
+    async with Client(TEST_API_SERVER_URL, tracing_config=tracing_config) as client:
+        _ = await client._request("GET", "/api/v1/users/me")
+        assert [
+            chunk async for chunk in client._stream("POST", "/api/v1/prompts/submit")
+        ] == [b"secret ", b"stream"]
+
+    assert not any("secret" in message for message in caplog.messages)
+    assert f"Received data from {TEST_API_SERVER_URL}/api/v1/users/me: <6 bytes>" in (
+        caplog.messages
+    )
+    assert (
+        f"Received chunk 2 of stream from {TEST_API_SERVER_URL}/api/v1/prompts/submit: "
+        "<6 bytes>"
+    ) in caplog.messages
+
+    assert len(summaries) == 1
+    assert summaries[0].url == f"{TEST_API_SERVER_URL}/api/v1/prompts/submit"
+    assert summaries[0].chunks == 2
+    assert summaries[0].size == 13
+    assert summaries[0].duration >= 0
+
+
+def test_redact_payload() -> None:
+    """Test the default redactor."""
+    assert redact_payload(b"Jane Gansbuhler") == "<15 bytes>"
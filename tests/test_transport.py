@@ -0,0 +1,152 @@
+"""Define transport tests."""
+
+from __future__ import annotations
+
+import asyncio
+from typing import Any
+from unittest.mock import Mock, patch
+
+import httpx
+import pytest
+from pytest_httpx import HTTPXMock
+
+from liminal import Client
+from liminal.errors import LiminalError
+from liminal.transport import RequestGate, TransportConfig, get_pool_stats
+from tests.common import TEST_API_SERVER_URL, TEST_HTTPX_DEFAULT_TIMEOUT, TEST_TOKEN
+
+
+def test_http2_requires_h2() -> None:
+    """Test that HTTP/2 cannot be enabled without the h2 package."""
+    with (
+        patch("liminal.transport.find_spec", return_value=None),
+        pytest.raises(LiminalError, match="HTTP/2 support requires the h2 package"),
+    ):
+        _ = TransportConfig(http2=True)
+
+    with patch("liminal.transport.find_spec", return_value=Mock()):
+        assert TransportConfig(http2=True).http2
+
+
+@pytest.mark.asyncio
+async def test_transport_config(
+    httpx_mock: HTTPXMock, model_instances_response: dict[str, Any]
+) -> None:
+    """Test that the owned HTTPX client uses the transport configuration.
+
+    Args:
+    ----
+        httpx_mock: The HTTPX mock fixture.
+        model_instances_response: A model instances response.
+
+    """
+    httpx_mock.add_response(
+        method="POST",
+        url=f"{TEST_API_SERVER_URL}/api/v1/auth/test-automation/login",
+        headers=[("Set-Cookie", "session=session-id")],
+    )
+    httpx_mock.add_response(
+        method="GET",
+        url=f"{TEST_API_SERVER_URL}/api/v1/model-instances",
+        json=model_instances_response,
+    )
+
+    client = await Client.authenticate_from_token(
+        TEST_API_SERVER_URL,
+        TEST_TOKEN,
+        transport_config=TransportConfig(
+            max_connections=10,
+            max_keepalive_connections=5,
+            keepalive_expiry=30.0,
+            max_requests_per_host=2,
+        ),
+    )
+    _ = await client.llm.get_available_model_instances()
+
+    transport = client._get_httpx_client()._transport
+    assert isinstance(transport, httpx.AsyncHTTPTransport)
+    assert transport._pool._max_connections == 10
+    assert transport._pool._max_keepalive_connections == 5
+    assert transport._pool._keepalive_expiry == 30.0
+
+    stats = client.get_pool_stats()
+    assert stats.in_flight_requests == 0
+    assert stats.queued_requests == 0
+
+    await client.aclose()
+
+
+@pytest.mark.asyncio
+async def test_request_gate() -> None:
+    """Test that the request gate bounds concurrent requests per host."""
+    gate = RequestGate(max_requests_per_host=1)
+    entered = asyncio.Event()
+    release = asyncio.Event()
+
+    async def hold(host: str) -> None:
+        async with gate.enter(host):
+            entered.set()
+            await release.wait()
+
+    first = asyncio.create_task(hold("api.domain.liminal.ai"))
+    await entered.wait()
+    entered.clear()
+
+    # A second request to the same host must wait:
+    second = asyncio.create_task(hold("api.domain.liminal.ai"))
+    await asyncio.sleep(0)
+    assert not entered.is_set()
+    assert gate.in_flight == 1
+
+    # ...but a request to a different host may proceed:
+    async with gate.enter("other.domain.liminal.ai"):
+        assert gate.in_flight == 2
+
+    release.set()
+    await asyncio.gather(first, second)
+    assert gate.in_flight == 0
+
+
+@pytest.mark.asyncio
+async def test_pool_stats() -> None:
+    """Test getting connection pool statistics."""
+    assert get_pool_stats(None, 0).connections == 0
+
+    async with httpx.AsyncClient(
+        transport=httpx.MockTransport(lambda _: httpx.Response(200))
+    ) as mock_transport_client:
+        assert get_pool_stats(mock_transport_client, 3).in_flight_requests == 3
+
+    async with httpx.AsyncClient(timeout=TEST_HTTPX_DEFAULT_TIMEOUT) as httpx_client:
+        pool = httpx_client._transport._pool  # type: ignore[attr-defined]
+        pool._connections = [
+            Mock(
+                info=Mock(return_value="'https://a', HTTP/1.1, IDLE"),
+                is_closed=Mock(return_value=False),
+                is_idle=Mock(return_value=True),
+            ),
+            Mock(
+                info=Mock(return_value="'https://a', HTTP/2, ACTIVE"),
+                is_closed=Mock(return_value=False),
+                is_idle=Mock(return_value=False),
+            ),
+            Mock(is_closed=Mock(return_value=True)),
+        ]
+        pool._requests = [
+            Mock(is_queued=Mock(return_value=True)),
+            Mock(is_queued=Mock(return_value=False)),
+        ]
+
+        stats = get_pool_stats(httpx_client, 1)
+        assert stats.connections == 2
+        assert stats.active_connections == 1
+        assert stats.idle_connections == 1
+        assert stats.http2_connections == 1
+        assert stats.queued_requests == 1
+        assert stats.in_flight_requests == 1
+
+        pool._connections = []
+        pool._requests = []
+
+        client = Client(TEST_API_SERVER_URL, httpx_client=httpx_client)
+        assert client.get_pool_stats().connections == 0